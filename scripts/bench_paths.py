@@ -0,0 +1,98 @@
+"""Benchmark the subscript fast path against generic evaluation.
+
+Replays the TUI's hot loop: a path typed keystroke by keystroke, each
+prefix evaluated as it appears. The fast path is evaluate_query, which
+resolves pure subscript chains by direct traversal. The generic path
+parses, validates, compiles and evals every prefix, as evaluate_query does
+for any other query. The compile cache is cleared before each pass, since
+a typed prefix is normally seen once.
+
+Usage:
+    uv run python scripts/bench_paths.py [--number N] [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import timeit
+from functools import partial
+from typing import Any
+
+from pq.evaluator import (
+    ALLOWED_BUILTINS,
+    _validate_ast,
+    compile_query,
+    evaluate_query,
+)
+
+PATH = "_['items'][0]['address']['city']"
+
+
+def keystroke_prefixes(path: str) -> list[str]:
+    """Return the valid queries seen while typing path one key at a time."""
+    prefixes = []
+    for end in range(1, len(path) + 1):
+        prefix = path[:end]
+        try:
+            ast.parse(prefix, mode="eval")
+        except SyntaxError:
+            continue
+        prefixes.append(prefix)
+    return prefixes
+
+
+def sample_document(records: int = 1_000) -> dict[str, Any]:
+    """Build a document shaped like the examples, with many records."""
+    return {
+        "items": [
+            {
+                "id": i,
+                "name": f"user{i}",
+                "address": {"city": f"city{i % 50}", "zip": f"{i:05d}"},
+            }
+            for i in range(records)
+        ],
+    }
+
+
+def fast_path(queries: list[str], data: Any) -> None:
+    """Evaluate each query as the TUI does."""
+    compile_query.cache_clear()
+    for query in queries:
+        evaluate_query(query, data)
+
+
+def generic_path(queries: list[str], data: Any) -> None:
+    """Parse, validate, compile and eval each query."""
+    for query in queries:
+        tree = ast.parse(query, mode="eval")
+        _validate_ast(tree)
+        code = compile(tree, "<query>", "eval")
+        eval(code, {"__builtins__": ALLOWED_BUILTINS, "_": data}, {})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--number", type=int, default=2_000, help="passes over the prefixes per run"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="runs; best is kept")
+    args = parser.parse_args()
+
+    queries = keystroke_prefixes(PATH)
+    data = sample_document()
+    print(f"{len(queries)} prefixes of {PATH}, best of {args.repeat} runs:")
+
+    timings = {}
+    for name, func in (("fast", fast_path), ("generic", generic_path)):
+        runs = timeit.repeat(
+            partial(func, queries, data), number=args.number, repeat=args.repeat
+        )
+        timings[name] = min(runs) / (args.number * len(queries))
+        print(f"  {name:8} {timings[name] * 1e6:8.2f} us per keystroke")
+    print(f"  speedup  {timings['generic'] / timings['fast']:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Batch mode: evaluate many queries against one loaded document."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, NamedTuple
+import multiprocessing
+
+from pq.budget import Budget, needs_supervision, run_with_budget
+from pq.evaluator import evaluate_query, extract_static_path
+from pq.output import OutputFormatter
+
+__all__ = [
+    "BatchRecord",
+    "common_static_path",
+    "iter_batch",
+    "read_queries",
+    "run_batch_query",
+]
+
+
+# Document shared with forked workers, which inherit it copy-on-write
+# instead of receiving a pickled copy.
+_worker_data: Any = None
+
+
+def read_queries(file_path: Path) -> list[str]:
+    """Read queries from a file, one per line.
+
+    Blank lines and lines starting with '#' are skipped.
+
+    Args:
+        file_path: File to read
+
+    Returns:
+        Queries in file order
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    with file_path.open(encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def common_static_path(queries: Iterable[str]) -> tuple[str | int, ...]:
+    """Find the constant subscript path every use of '_' in every query starts with.
+
+    Args:
+        queries: Python expressions to analyse
+
+    Returns:
+        Common leading path, or an empty tuple if the whole document is needed
+    """
+    common: tuple[str | int, ...] | None = None
+    for query in queries:
+        path = extract_static_path(query)
+        if common is None:
+            common = path
+            continue
+        length = 0
+        for a, b in zip(common, path):
+            if a != b or type(a) is not type(b):
+                break
+            length += 1
+        common = common[:length]
+    return common or ()
+
+
+class BatchRecord(NamedTuple):
+    """Outcome of one query in a batch."""
+
+    line: str
+    failed: bool
+
+
+def _format_result(query: str, data: Any, indexed: bool) -> str:
+    result = evaluate_query(query, data, indexed)
+    return OutputFormatter.format_labeled_record({"query": query, "result": result})
+
+
+def run_batch_query(
+    query: str, data: Any, budget: Budget = Budget(), indexed: bool = False
+) -> BatchRecord:
+    """Evaluate a query and format the outcome as one line of JSON.
+
+    Args:
+        query: Python expression to evaluate
+        data: Document data available as '_'
+        budget: Resources the evaluation may use
+        indexed: Answer key filters from cached indexes, see evaluate_query
+
+    Returns:
+        Record whose line is {"query": ..., "result": ...} on success, or
+        {"query": ..., "error": ...} if the query failed, exceeded the
+        budget or its result is not JSON serializable
+    """
+    try:
+        if needs_supervision(query, budget):
+            # Formatted in the worker, so only the line is copied back.
+            line = run_with_budget(
+                partial(_format_result, query, data, indexed), budget
+            )
+        else:
+            line = _format_result(query, data, indexed)
+        return BatchRecord(line, False)
+    except Exception as e:
+        # Generator results are evaluated while they are formatted, so any
+        # error a query raises can surface here.
+        line = OutputFormatter.format_labeled_record({"query": query, "error": str(e)})
+        return BatchRecord(line, True)
+
+
+def _run_in_worker(query: str, budget: Budget, indexed: bool) -> BatchRecord:
+    return run_batch_query(query, _worker_data, budget, indexed)
+
+
+def iter_batch(
+    queries: list[str],
+    data: Any,
+    jobs: int = 1,
+    budget: Budget = Budget(),
+    indexed: bool = False,
+) -> Iterator[BatchRecord]:
+    """Evaluate queries against a document, yielding one record per query.
+
+    With more than one job, queries run in a pool of forked processes that
+    share the already loaded document. Records are yielded in query order
+    either way. Where fork is unavailable, queries run in this process.
+    Indexes are cached per process, so each worker builds its own.
+
+    Args:
+        queries: Python expressions to evaluate
+        data: Document data available as '_'
+        jobs: Number of worker processes
+        budget: Resources each query may use
+        indexed: Answer key filters from cached indexes, see evaluate_query
+
+    Yields:
+        Records as produced by run_batch_query
+    """
+    if (
+        jobs <= 1
+        or len(queries) <= 1
+        or "fork" not in multiprocessing.get_all_start_methods()
+    ):
+        for query in queries:
+            yield run_batch_query(query, data, budget, indexed)
+        return
+
+    global _worker_data
+    _worker_data = data
+    try:
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+            yield from pool.map(
+                partial(_run_in_worker, budget=budget, indexed=indexed), queries
+            )
+    finally:
+        _worker_data = None
@@ -0,0 +1,277 @@
+"""CPU time and memory budgets for query evaluation."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any, NamedTuple, TypeVar
+import io
+import os
+import pickle
+import select
+import signal
+import sys
+import time
+
+from pq.evaluator import QueryEvaluationError, compile_query
+from pq.types import LazyMapping, LazySequence
+
+__all__ = ["Budget", "needs_supervision", "run_with_budget"]
+
+
+T = TypeVar("T")
+
+# How often the supervising thread wakes up while waiting for the worker,
+# so a cancellation raised in it is noticed promptly.
+_POLL_INTERVAL = 0.05
+
+_READ_SIZE = 64 * 1024
+
+# Exit status of a worker that ran out of memory before it could report.
+_EXIT_OUT_OF_MEMORY = 3
+
+# A worker under a CPU limit is killed once this many times its CPU seconds,
+# plus the grace period, have passed on the wall clock: a query blocked
+# rather than computing never reaches its CPU limit.
+_WALL_CLOCK_FACTOR = 2
+_WALL_CLOCK_GRACE = 5.0
+
+# Wall-clock seconds a worker under a memory limit only may run, so one
+# blocked for good, e.g. on a lock, is still stopped.
+_WALL_CLOCK_DEFAULT = 600.0
+
+
+class Budget(NamedTuple):
+    """Resources a single query evaluation may use.
+
+    Attributes:
+        cpu_time: CPU seconds, or None for no limit
+        memory: Megabytes of memory on top of what the document already
+            uses, or None for no limit
+    """
+
+    cpu_time: int | None = None
+    memory: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any limit is set."""
+        return self.cpu_time is not None or self.memory is not None
+
+    def __str__(self) -> str:
+        limits = []
+        if self.cpu_time is not None:
+            limits.append(f"{self.cpu_time}s")
+        if self.memory is not None:
+            limits.append(f"{self.memory}MB")
+        return " / ".join(limits) or "unlimited"
+
+
+def needs_supervision(expression: str, budget: Budget) -> bool:
+    """Check whether an expression has to run in a supervised worker.
+
+    Plain subscript paths such as _['items'][0] do a bounded amount of work
+    and always run in-process, so their results are never copied.
+
+    Args:
+        expression: Python expression about to be evaluated
+        budget: Budget the evaluation runs under
+
+    Returns:
+        True if a limit is set and the expression is not a plain path
+
+    Raises:
+        QueryEvaluationError: If expression is invalid or unsafe
+    """
+    if not budget.enabled or not hasattr(os, "fork"):
+        return False
+    return compile_query(expression).path is None
+
+
+def run_with_budget(func: Callable[[], T], budget: Budget) -> T:
+    """Call func in a forked worker process whose resources are limited.
+
+    The worker shares the parent's memory copy-on-write, so func can use
+    an already loaded document. CPU time is limited with RLIMIT_CPU and
+    memory with RLIMIT_AS, counted from the worker's size when it starts.
+    The return value, or the exception func raised, is pickled back; lazy
+    containers in it, e.g. from --lazy or --out-of-core documents, are
+    materialized first. Output func writes to stdout goes straight to the
+    parent's stdout. Under a CPU limit, a worker still running well past
+    that many seconds of wall-clock time is killed as well; under a memory
+    limit only, one still running after _WALL_CLOCK_DEFAULT seconds is.
+
+    If the calling thread is interrupted while it waits, e.g. by
+    cancel_evaluation, the worker is killed. Where fork is unavailable,
+    func is called directly without limits; the memory limit also needs
+    /proc/self/statm.
+
+    Args:
+        func: Function to call
+        budget: Limits for the worker
+
+    Returns:
+        Return value of func
+
+    Raises:
+        QueryEvaluationError: If the worker exceeded the budget, or func's
+            result cannot be pickled
+        Exception: Whatever func raised
+    """
+    if not budget.enabled or not hasattr(os, "fork"):
+        return func()
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        _run_worker(func, budget, write_fd)
+
+    os.close(write_fd)
+    if budget.cpu_time is not None:
+        wall_time = budget.cpu_time * _WALL_CLOCK_FACTOR + _WALL_CLOCK_GRACE
+    else:
+        wall_time = _WALL_CLOCK_DEFAULT
+    deadline = time.monotonic() + wall_time
+    chunks = []
+    timed_out = False
+    with os.fdopen(read_fd, "rb", buffering=0) as reply:
+        try:
+            while True:
+                ready, _, _ = select.select([reply], [], [], _POLL_INTERVAL)
+                if ready:
+                    chunk = reply.read(_READ_SIZE)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                elif time.monotonic() > deadline:
+                    timed_out = True
+                    os.kill(pid, signal.SIGKILL)
+                    break
+        except BaseException:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            raise
+    _, status = os.waitpid(pid, 0)
+
+    if timed_out:
+        raise QueryEvaluationError(
+            f"Query exceeded {budget}: it did not finish within {wall_time:g}s "
+            "of wall-clock time."
+        )
+    if os.WIFSIGNALED(status) and os.WTERMSIG(status) == signal.SIGXCPU:
+        raise QueryEvaluationError(
+            f"Query exceeded {budget}: it ran out of CPU time. "
+            "Narrow it down, e.g. filter before sorting."
+        )
+    if os.WIFEXITED(status) and os.WEXITSTATUS(status) == _EXIT_OUT_OF_MEMORY:
+        raise QueryEvaluationError(
+            f"Query exceeded {budget}: it ran out of memory. "
+            "Narrow it down, e.g. use a generator instead of a list."
+        )
+    if os.WIFSIGNALED(status):
+        number = os.WTERMSIG(status)
+        message = f"Query worker was killed by signal {number}"
+        if number == signal.SIGKILL:
+            # Not sent by the CPU limit, which is reached at SIGXCPU first.
+            message += " (SIGKILL), e.g. because the system ran out of memory"
+        raise QueryEvaluationError(message)
+    if not chunks:
+        raise QueryEvaluationError(
+            f"Query worker stopped unexpectedly (wait status {status})"
+        )
+
+    succeeded, value = pickle.loads(b"".join(chunks))
+    if not succeeded:
+        raise value
+    return value
+
+
+def _run_worker(func: Callable[[], Any], budget: Budget, write_fd: int) -> None:
+    """Apply the limits, call func and report the outcome; never returns."""
+    status = 0
+    try:
+        _apply_limits(budget)
+        try:
+            outcome = (True, func())
+        except Exception as e:
+            if _caused_by_memory_error(e):
+                raise MemoryError from e
+            outcome = (False, e)
+        try:
+            payload = _dumps(outcome)
+        except MemoryError:
+            raise
+        except Exception:
+            error = QueryEvaluationError(
+                f"A result of type {type(outcome[1]).__name__} cannot be "
+                "returned from a query run under a budget"
+            )
+            payload = pickle.dumps((False, error))
+        with os.fdopen(write_fd, "wb") as pipe:
+            pipe.write(payload)
+    except MemoryError:
+        status = _EXIT_OUT_OF_MEMORY
+    finally:
+        # Skip interpreter cleanup, which would run the parent's atexit
+        # handlers and flush its buffers a second time.
+        os._exit(status)
+
+
+class _ResultPickler(pickle.Pickler):
+    """Pickler that sends lazy containers as the dicts and lists they stand for.
+
+    Lazy documents hold memory maps and database connections, which cannot
+    be pickled and would be meaningless in the parent anyway.
+    """
+
+    def reducer_override(self, obj: Any) -> Any:
+        if isinstance(obj, LazyMapping):
+            return dict, (obj.materialize(),)
+        if isinstance(obj, LazySequence):
+            return list, (obj.materialize(),)
+        return NotImplemented
+
+
+def _dumps(outcome: Any) -> bytes:
+    """Pickle a worker's outcome, materializing lazy containers in it."""
+    buffer = io.BytesIO()
+    _ResultPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(outcome)
+    return buffer.getvalue()
+
+
+def _caused_by_memory_error(error: BaseException) -> bool:
+    """Check whether an exception is, or was raised while handling, a MemoryError."""
+    while error is not None:
+        if isinstance(error, MemoryError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _apply_limits(budget: Budget) -> None:
+    """Limit the CPU time and address space of the current process."""
+    import resource
+
+    if budget.cpu_time is not None:
+        # SIGXCPU at the soft limit; SIGKILL a second later if it is caught.
+        resource.setrlimit(resource.RLIMIT_CPU, (budget.cpu_time, budget.cpu_time + 1))
+
+    size = _address_space_size()
+    if budget.memory is not None and size is not None:
+        limit = size + budget.memory * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _address_space_size() -> int | None:
+    """Return the virtual memory size of the current process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
@@ -0,0 +1,191 @@
+"""Persistent on-disk cache of parsed documents."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+import hashlib
+import os
+import pickle
+import tempfile
+
+from pq.config import Config
+from pq.loader import DocumentLoadError, parser_identity
+from pq.types import FileTypes
+
+__all__ = ["ParseCache"]
+
+
+_CACHE_SUFFIX = ".pickle"
+
+
+def _parser_version() -> str:
+    """Version string that invalidates cache entries when pq itself changes.
+
+    The parser backend is part of each entry's key, see ParseCache.load.
+    """
+    import importlib.metadata
+
+    try:
+        version = importlib.metadata.version("pq-cli")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    return f"pickle-{pickle.HIGHEST_PROTOCOL},pq-cli-{version}"
+
+
+class ParseCache:
+    """Cache parsed documents on disk, keyed by file state and parser backend.
+
+    The key covers the file's path, size and mtime, and the name and version
+    of the backend parsing it, so switching backends never serves a result
+    parsed by another one.
+
+    Entries are stored as pickles, which load far faster than re-parsing
+    the source text. The total size of the cache directory is kept under
+    a budget by evicting the least recently used entries.
+    """
+
+    def __init__(self, cache_dir: Path, max_size_bytes: int) -> None:
+        """Initialize cache.
+
+        Args:
+            cache_dir: Directory to store cache entries in
+            max_size_bytes: Maximum total size of all cache entries
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self._parser_version = _parser_version()
+
+    @classmethod
+    def from_config(cls, config: Config) -> ParseCache | None:
+        """Create cache from configuration.
+
+        Args:
+            config: Loaded application configuration
+
+        Returns:
+            ParseCache instance, or None if caching is disabled
+        """
+        if not config.cache_enabled:
+            return None
+        return cls(config.cache_dir, config.cache_max_size_mb * 1024 * 1024)
+
+    def _entry_path(self, file_path: Path, parser: str | None = None) -> Path:
+        """Get the cache entry path for a source file.
+
+        Args:
+            file_path: Source document path
+            parser: Parser backend name, or None for the default one
+
+        Returns:
+            Path of the cache entry for the file's current state
+
+        Raises:
+            ValueError: If the file type is not supported
+            DocumentLoadError: If the parser backend is not available
+        """
+        stat = file_path.stat()
+        backend = parser_identity(FileTypes(file_path.suffix.lstrip(".")), parser)
+        key = "\0".join(
+            [
+                str(file_path.resolve()),
+                str(stat.st_size),
+                str(stat.st_mtime_ns),
+                self._parser_version,
+                backend,
+            ]
+        )
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}{_CACHE_SUFFIX}"
+
+    def load(
+        self,
+        file_path: Path,
+        loader: Callable[[Path], Any],
+        parser: str | None = None,
+    ) -> Any:
+        """Load a document from cache, parsing and storing it on a miss.
+
+        Cache failures are never fatal: an unreadable entry is deleted and
+        treated as a miss, and a failed write leaves the parsed document
+        usable.
+
+        Args:
+            file_path: Source document path
+            loader: Function that parses the document, e.g. load_document
+            parser: Parser backend loader uses, or None for the default one
+
+        Returns:
+            Parsed document
+        """
+        if not file_path.exists():
+            return loader(file_path)
+
+        try:
+            entry = self._entry_path(file_path, parser)
+        except (ValueError, DocumentLoadError):
+            # Let the loader report the unsupported type or backend.
+            return loader(file_path)
+        try:
+            with open(entry, "rb") as f:
+                data = pickle.load(f)
+            os.utime(entry)
+            return data
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # A corrupted pickle can fail with almost any exception.
+            try:
+                entry.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+        data = loader(file_path)
+        self._store(entry, data)
+        return data
+
+    def _store(self, entry: Path, data: Any) -> None:
+        """Atomically write a cache entry and enforce the size budget.
+
+        Args:
+            entry: Cache entry path
+            data: Parsed document to store
+        """
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                if os.path.getsize(tmp_name) > self.max_size_bytes:
+                    os.unlink(tmp_name)
+                    return
+                os.replace(tmp_name, entry)
+            except BaseException:
+                if os.path.exists(tmp_name):
+                    os.unlink(tmp_name)
+                raise
+            self._evict()
+        except (OSError, pickle.PicklingError, RecursionError):
+            pass
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until under the size budget."""
+        entries = []
+        for path in self.cache_dir.glob(f"*{_CACHE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
@@ -3,41 +3,199 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Annotated, Any
 import sys
 
 import typer
 
-from pq.config import load_config
-from pq.evaluator import evaluate_query
-from pq.loader import content_from_file, load_content
+from pq.budget import Budget, needs_supervision, run_with_budget
+from pq.cache import ParseCache
+from pq.columnar import to_columnar
+from pq.config import Config, load_config
+from pq.evaluator import evaluate_query, extract_static_path
+from pq.loader import (
+    ProgressFunc,
+    iter_records,
+    load_document,
+    load_stream,
+    records_from_file,
+)
 from pq.cli_arg import (
+    BatchQuery,
+    Columnar,
+    Complete,
+    CpuLimit,
     Query,
     FilePath,
     FileTypeJSON,
     FileTypeYAML,
     FileTypeXML,
     FileTypeTOML,
+    FileTypeJSONL,
+    Index,
+    Jobs,
+    Lazy,
+    MemoryLimit,
+    OutOfCore,
+    Parser,
+    QueriesFile,
+    Socket,
     Theme,
     Version,
     consolidate_file_type_flags,
 )
 from pq.output import OutputFormatter
-from pq.tui import QueryApp
+from pq.projection import PathSegment, load_projected
+from pq.types import FileTypes
 
-__all__ = ["app"]
+__all__ = ["app", "daemon_app", "run"]
 
 app = typer.Typer()
 
+daemon_app = typer.Typer(help="Keep documents resident in a query daemon.")
+
+_DAEMON_COMMANDS = {"serve", "client"}
+
+
+def _load_file(
+    file_path: Path,
+    config: Config,
+    parser: str | None,
+    path: tuple[PathSegment, ...] = (),
+    out_of_core: bool = False,
+    lazy: bool = False,
+    progress: ProgressFunc | None = None,
+    columnar: bool = False,
+) -> Any:
+    """Load a document from file, going through the parse cache if enabled.
+
+    Without a cache, only the subtree at path is loaded for large files.
+    With a cache, the full document is loaded so it can be stored. In
+    out-of-core mode the document is served lazily from an on-disk store,
+    and in lazy mode it is parsed on access from a memory map of the file.
+    In columnar mode, arrays of records in a document loaded into memory
+    are stored column by column.
+
+    Args:
+        file_path: Path to the file to load
+        config: Loaded application configuration
+        parser: Parser backend name, or None to pick the fastest available
+        path: Leading subscript path every use of '_' in the query starts with
+        out_of_core: Whether to serve the document from an on-disk store
+        lazy: Whether to parse the document on access from a memory map
+        progress: Function called with (bytes read, file size) while the
+            file is parsed
+        columnar: Whether to store arrays of records column by column
+
+    Returns:
+        Parsed document, or a skeleton of it containing the subtree at path
+    """
+    if out_of_core:
+        from pq.store import DocumentStore
+
+        return DocumentStore.open(file_path, config.cache_dir / "stores").root()
+    if lazy:
+        from pq.lazy import LazyDocument
+
+        return LazyDocument(file_path).root()
+
+    cache = ParseCache.from_config(config)
+    if cache is None:
+        data = load_projected(file_path, path, parser, progress)
+    else:
+        data = cache.load(
+            file_path, lambda path: load_document(path, parser, progress), parser
+        )
+    return to_columnar(data) if columnar else data
+
+
+def _run_batch(
+    queries: list[str],
+    queries_file: Path | None,
+    file_path: Path | None,
+    file_type: FileTypes | None,
+    config: Config,
+    parser: str | None,
+    out_of_core: bool,
+    lazy: bool,
+    columnar: bool,
+    jobs: int,
+    budget: Budget,
+    indexed: bool,
+) -> None:
+    """Load a document once and print one labeled record per query.
+
+    JSON Lines input is loaded as a list of records rather than streamed.
+
+    Raises:
+        typer.BadParameter: If the queries file cannot be read or no input
+            was given
+        typer.Exit: With code 1 if any query failed
+    """
+    from pq.batch import common_static_path, iter_batch, read_queries
+
+    if queries_file is not None:
+        try:
+            queries = queries + read_queries(queries_file)
+        except OSError as e:
+            raise typer.BadParameter(f"Cannot read queries file: {e}") from e
+
+    if file_path is not None:
+        data = _load_file(
+            file_path,
+            config,
+            parser,
+            common_static_path(queries),
+            out_of_core,
+            lazy,
+            columnar=columnar,
+        )
+    elif file_type is not None:
+        data = load_stream(
+            stream=sys.stdin.buffer, file_type=file_type, src="stdin", parser=parser
+        )
+        if columnar:
+            data = to_columnar(data)
+    else:
+        raise typer.BadParameter(
+            "Must supply file path, or use a file type flag (-j/-y/-x/-t/-l) "
+            "when reading from stdin"
+        )
+
+    # The on-disk store's SQLite connection must not be shared with forks.
+    if out_of_core:
+        jobs = 1
+
+    failed = False
+    for record in iter_batch(queries, data, jobs, budget, indexed):
+        failed = failed or record.failed
+        sys.stdout.write(record.line)
+        sys.stdout.write("\n")
+    sys.stdout.flush()
+    if failed:
+        raise typer.Exit(1)
+
 
 @app.command()
 def main(
-    query: Query,
+    query: Query = None,
     file_path: FilePath = None,
     file_type_json: FileTypeJSON = False,
     file_type_yaml: FileTypeYAML = False,
     file_type_xml: FileTypeXML = False,
     file_type_toml: FileTypeTOML = False,
+    file_type_jsonl: FileTypeJSONL = False,
+    parser: Parser = None,
+    out_of_core: OutOfCore = False,
+    lazy: Lazy = False,
+    columnar: Columnar = False,
     theme: Theme = None,
+    batch_queries: BatchQuery = None,
+    queries_file: QueriesFile = None,
+    jobs: Jobs = 1,
+    index: Index = False,
+    cpu_limit: CpuLimit = None,
+    memory_limit: MemoryLimit = None,
     v: Version = None,
 ) -> None:
     """Run a query against a document.
@@ -45,44 +203,235 @@ def main(
     Query a document using Python syntax.
     Reads from a file or stdin and evaluates the query against document data.
     """
-    if query is None:
-        raise typer.BadParameter("A query expression is required")
-
     file_type = consolidate_file_type_flags(
-        file_type_json, file_type_yaml, file_type_xml, file_type_toml
+        file_type_json, file_type_yaml, file_type_xml, file_type_toml, file_type_jsonl
+    )
+    if columnar and (lazy or out_of_core):
+        # Those documents are never held in memory as lists to convert.
+        raise typer.BadParameter(
+            "--columnar cannot be combined with --lazy or --out-of-core"
+        )
+
+    config = load_config()
+    budget = Budget(
+        cpu_limit if cpu_limit is not None else config.cpu_time_limit,
+        memory_limit if memory_limit is not None else config.memory_limit_mb,
     )
 
+    if batch_queries or queries_file is not None:
+        # Without a positional query, the only positional argument is the file.
+        if file_path is None and query is not None:
+            file_path = Path(query)
+        elif query is not None:
+            raise typer.BadParameter(
+                "A query argument cannot be combined with -q/--queries"
+            )
+        _run_batch(
+            batch_queries or [],
+            queries_file,
+            file_path,
+            file_type,
+            config,
+            parser,
+            out_of_core,
+            lazy,
+            columnar,
+            jobs,
+            budget,
+            index,
+        )
+        return
+
+    if query is None:
+        raise typer.BadParameter("A query expression is required")
+
     query_path = Path(query)
     is_tui_mode = query_path.exists() and file_path is None
 
     if is_tui_mode:
-        content, resolved_type = content_from_file(file_path=query_path)
-        data = load_content(content=content, file_type=resolved_type, src=query)
+        # Textual is only imported for the TUI, keeping one-shot queries fast
+        # to start.
+        from pq.tui import QueryApp
 
-        config = load_config()
         selected_theme = theme or config.theme
 
-        tui = QueryApp(data=data, theme=selected_theme)
+        tui = QueryApp(
+            theme=selected_theme,
+            schema_index=config.completion_schema,
+            max_indices=config.completion_max_indices,
+            budget=budget,
+            loader=lambda progress: _load_file(
+                query_path,
+                config,
+                parser,
+                out_of_core=out_of_core,
+                lazy=lazy,
+                progress=progress,
+                columnar=columnar,
+            ),
+        )
         tui.run()
+        if tui.load_error is not None:
+            raise tui.load_error
+        if not tui.loaded:
+            raise typer.Exit(130)
         OutputFormatter.print_to_stdout(str(tui.query_string))
         raise typer.Exit(0)
 
+    is_stream_mode = file_type == FileTypes.jsonl or (
+        file_path is not None and file_path.suffix == ".jsonl"
+    )
+
+    if is_stream_mode:
+        # Records are parsed and evaluated one at a time, so options about
+        # holding or supervising a whole document do not apply.
+        unsupported = [
+            option
+            for option, given in (
+                ("--lazy", lazy),
+                ("--out-of-core", out_of_core),
+                ("--columnar", columnar),
+                ("--index", index),
+                ("--cpu-limit", cpu_limit is not None),
+                ("--memory-limit", memory_limit is not None),
+            )
+            if given
+        ]
+        if unsupported:
+            raise typer.BadParameter(
+                f"{', '.join(unsupported)} cannot be used with JSON Lines input, "
+                "which is evaluated record by record"
+            )
+        if file_path is not None:
+            records = records_from_file(file_path, parser)
+        else:
+            records = iter_records(sys.stdin.buffer, "stdin", parser)
+        OutputFormatter.print_records(
+            evaluate_query(query, record) for record in records
+        )
+        return
+
     if file_path is not None:
-        content, resolved_type = content_from_file(file_path=file_path)
-        src = str(file_path)
+        data = _load_file(
+            file_path,
+            config,
+            parser,
+            extract_static_path(query),
+            out_of_core,
+            lazy,
+            columnar=columnar,
+        )
     elif file_type is not None:
-        content = sys.stdin.read()
-        resolved_type = file_type
-        src = "stdin"
+        data = load_stream(
+            stream=sys.stdin.buffer, file_type=file_type, src="stdin", parser=parser
+        )
+        if columnar:
+            data = to_columnar(data)
     else:
         raise typer.BadParameter(
-            "Must supply file path, or use a file type flag (-j/-y/-x/-t) when reading from stdin"
+            "Must supply file path, or use a file type flag (-j/-y/-x/-t/-l) "
+            "when reading from stdin"
         )
 
-    data = load_content(content=content, file_type=resolved_type, src=src)
-    result = evaluate_query(query, data)
+    if needs_supervision(query, budget):
+        # The worker prints the result itself, so it is never copied back.
+        run_with_budget(
+            lambda: OutputFormatter.print_to_stdout(evaluate_query(query, data, index)),
+            budget,
+        )
+        return
+
+    result = evaluate_query(query, data, index)
     OutputFormatter.print_to_stdout(result)
 
 
+def _socket_path(socket: Path | None, config: Config) -> Path:
+    """Return the daemon socket path, defaulting to the cache directory."""
+    return socket or config.cache_dir / "daemon.sock"
+
+
+@daemon_app.command()
+def serve(
+    file_paths: Annotated[
+        list[Path] | None,
+        typer.Argument(help="Documents to load before accepting queries"),
+    ] = None,
+    parser: Parser = None,
+    socket: Socket = None,
+    index: Index = False,
+    columnar: Columnar = False,
+    cpu_limit: CpuLimit = None,
+    memory_limit: MemoryLimit = None,
+) -> None:
+    """Serve queries against resident documents on a UNIX socket.
+
+    Documents are parsed once and kept in memory; each is reloaded when its
+    file's modification time or size changes. Stop the daemon with Ctrl+C.
+    """
+    from pq.daemon import DaemonError, QueryServer
+
+    config = load_config()
+    socket_path = _socket_path(socket, config)
+    budget = Budget(
+        cpu_limit if cpu_limit is not None else config.cpu_time_limit,
+        memory_limit if memory_limit is not None else config.memory_limit_mb,
+    )
+    try:
+        server = QueryServer(
+            socket_path,
+            lambda path: _load_file(path, config, parser, columnar=columnar),
+            index,
+            budget,
+        )
+    except DaemonError as e:
+        raise typer.BadParameter(str(e)) from e
+
+    with server:
+        for file_path in file_paths or ():
+            server.preload(file_path)
+        typer.echo(f"pq-cli daemon listening on {socket_path}", err=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+@daemon_app.command()
+def client(
+    query: Annotated[str, typer.Argument(help="Python expression to evaluate")],
+    file_path: Annotated[Path, typer.Argument(help="Document to query")],
+    socket: Socket = None,
+    complete: Complete = False,
+) -> None:
+    """Send a query to a running daemon and print the result."""
+    from pq.daemon import DaemonError, request_completions, request_query
+
+    socket_path = _socket_path(socket, load_config())
+    try:
+        if complete:
+            for suggestion in request_completions(socket_path, file_path, query):
+                typer.echo(suggestion)
+        else:
+            sys.stdout.flush()
+            request_query(socket_path, file_path, query, sys.stdout.buffer)
+    except DaemonError as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1) from e
+
+
+def run() -> None:
+    """Console script entry point.
+
+    The query command takes its arguments directly, so the daemon
+    subcommands are dispatched on the first argument before it is parsed.
+    An existing file of the same name is opened as a document instead.
+    """
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command in _DAEMON_COMMANDS and not Path(command).exists():
+        daemon_app(args=sys.argv[1:], prog_name="pq-cli")
+    else:
+        app()
+
+
 if __name__ == "__main__":
-    app()
+    run()
@@ -1,12 +1,13 @@
 from typing import Annotated
 from pathlib import Path
 import typer
-import importlib.metadata
 from pq.types import FileTypes
 
 
 def version_callback(v: bool) -> None:
     if v:
+        import importlib.metadata
+
         typer.echo(
             f"pq-cli Version: {importlib.metadata.version(distribution_name='pq-cli')}"
         )
@@ -52,6 +53,53 @@ FileTypeTOML = Annotated[
         help="Specify TOML format for stdin input",
     ),
 ]
+FileTypeJSONL = Annotated[
+    bool,
+    typer.Option(
+        "-l",
+        "--jsonl",
+        help="Specify JSON Lines format for stdin input, evaluated per record",
+    ),
+]
+Parser = Annotated[
+    str | None,
+    typer.Option(
+        "--parser",
+        "-p",
+        help=(
+            "Parser backend, e.g. orjson, json, libyaml, pyyaml "
+            "(default: fastest available)"
+        ),
+    ),
+]
+OutOfCore = Annotated[
+    bool,
+    typer.Option(
+        "--out-of-core",
+        help=(
+            "Ingest a JSON file into an on-disk store and load data on demand, "
+            "for files too large for memory"
+        ),
+    ),
+]
+Lazy = Annotated[
+    bool,
+    typer.Option(
+        "--lazy",
+        help="Memory-map a JSON file and parse only the parts a query touches",
+    ),
+]
+Columnar = Annotated[
+    bool,
+    typer.Option(
+        "--columnar",
+        help=(
+            "Store arrays of records that share the same keys column by column "
+            "once parsed, so a resident document takes less memory and sum/min/max "
+            "over a key run faster"
+        ),
+    ),
+]
 Theme = Annotated[
     str | None,
     typer.Option(
@@ -70,12 +118,91 @@ Version = Annotated[
     ),
 ]
 
+BatchQuery = Annotated[
+    list[str] | None,
+    typer.Option(
+        "--query",
+        "-q",
+        help=(
+            "Query to run in batch mode; repeat to run several against one load "
+            "of the document"
+        ),
+    ),
+]
+QueriesFile = Annotated[
+    Path | None,
+    typer.Option(
+        "--queries",
+        help="File of queries to run in batch mode, one per line",
+    ),
+]
+Jobs = Annotated[
+    int,
+    typer.Option(
+        "--jobs",
+        min=1,
+        help="Number of worker processes for batch mode",
+    ),
+]
+Index = Annotated[
+    bool,
+    typer.Option(
+        "--index",
+        help=(
+            "Answer filters like r['id'] == value over record lists from cached "
+            "hash indexes; pays off for repeated queries in batch mode or the daemon"
+        ),
+    ),
+]
+CpuLimit = Annotated[
+    int | None,
+    typer.Option(
+        "--cpu-limit",
+        min=1,
+        help=(
+            "CPU seconds a query may use before it is stopped (overrides config file)"
+        ),
+    ),
+]
+MemoryLimit = Annotated[
+    int | None,
+    typer.Option(
+        "--memory-limit",
+        min=1,
+        help=(
+            "Megabytes of memory a query may allocate before it is stopped "
+            "(overrides config file)"
+        ),
+    ),
+]
+Socket = Annotated[
+    Path | None,
+    typer.Option(
+        "--socket",
+        "-S",
+        help=(
+            "UNIX socket of the query daemon "
+            "(default: daemon.sock in the cache directory)"
+        ),
+    ),
+]
+Complete = Annotated[
+    bool,
+    typer.Option(
+        "--complete",
+        help=(
+            "Print completion suggestions for a partial query instead of evaluating it"
+        ),
+    ),
+]
+
 
 def consolidate_file_type_flags(
     json_flag: bool,
     yaml_flag: bool,
     xml_flag: bool,
     toml_flag: bool,
+    jsonl_flag: bool = False,
 ) -> FileTypes | None:
     """Consolidate mutually exclusive file type flags.
 
@@ -84,6 +211,7 @@ def consolidate_file_type_flags(
         yaml_flag: YAML format flag
         xml_flag: XML format flag
         toml_flag: TOML format flag
+        jsonl_flag: JSON Lines format flag
 
     Returns:
         FileTypes value if exactly one flag is set, None otherwise
@@ -91,7 +219,7 @@ def consolidate_file_type_flags(
     Raises:
         typer.BadParameter: If more than one flag is set
     """
-    flags_set = [json_flag, yaml_flag, xml_flag, toml_flag]
+    flags_set = [json_flag, yaml_flag, xml_flag, toml_flag, jsonl_flag]
     flags_count = sum(flags_set)
 
     if flags_count == 0:
@@ -106,4 +234,6 @@ def consolidate_file_type_flags(
         return FileTypes.yaml
     if xml_flag:
         return FileTypes.xml
+    if jsonl_flag:
+        return FileTypes.jsonl
     return FileTypes.toml
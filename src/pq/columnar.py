@@ -0,0 +1,257 @@
+"""Column-wise storage for arrays of records that all have the same keys."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any
+import operator
+
+from pq.types import LazyMapping, LazySequence
+
+__all__ = [
+    "MIN_ROWS",
+    "Column",
+    "ColumnarRecords",
+    "RowView",
+    "aggregate_column",
+    "column",
+    "to_columnar",
+]
+
+
+# Shorter arrays stay lists of dicts: the saving does not pay for the
+# indirection.
+MIN_ROWS = 8
+
+# Aggregates that give the same result over a column as over the values
+# of its records.
+_COLUMN_AGGREGATES = (sum, min, max)
+
+
+class RowView(LazyMapping):
+    """Read-only view of one record of a ColumnarRecords.
+
+    Views are created on access and only hold their table and position.
+    """
+
+    def __init__(self, table: ColumnarRecords, index: int) -> None:
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._table._columns[key][self._index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.keys)
+
+    def __len__(self) -> int:
+        return len(self._table.keys)
+
+    def materialize(self) -> dict[str, Any]:
+        """Copy the record into a dict."""
+        columns = self._table._columns
+        return {key: columns[key][self._index] for key in self._table.keys}
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Pickle as a plain dict rather than with the whole table.
+        return dict, (self.materialize(),)
+
+    def __repr__(self) -> str:
+        return f"RowView({self.materialize()!r})"
+
+
+class Column(LazySequence):
+    """Read-only view of the values of one key in a ColumnarRecords.
+
+    Iterating runs over the underlying array in C, so sum, min, max and
+    sorted over a numeric column do not touch the records.
+    """
+
+    def __init__(self, values: Sequence[Any]) -> None:
+        self._values = values
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return Column(self._values[index])
+        return self._values[index]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def materialize(self) -> list[Any]:
+        """Copy the values into a list."""
+        return list(self._values)
+
+    def __repr__(self) -> str:
+        return f"Column({self.materialize()!r})"
+
+
+class ColumnarRecords(LazySequence):
+    """Read-only list of records stored column by column.
+
+    Integer and float columns are compact arrays, strings repeated within
+    a column share one object, and other values are kept as they are.
+    Indexing and iterating yield RowView records; output and equality treat
+    the whole like a list of dicts.
+    """
+
+    def __init__(self, keys: tuple[str, ...], columns: dict[str, Sequence[Any]]):
+        """Initialize from already built columns.
+
+        Args:
+            keys: Keys of every record, in order
+            columns: Values of each key, all of the same length
+        """
+        self.keys = keys
+        self._columns = columns
+        self._length = len(columns[keys[0]])
+
+    @classmethod
+    def from_records(cls, records: list[dict[str, Any]]) -> ColumnarRecords:
+        """Store records that all have the same keys, in the same order.
+
+        Args:
+            records: Non-empty list of dicts
+
+        Returns:
+            Columnar copy of records
+        """
+        keys = tuple(records[0])
+        columns = {key: _compact([record[key] for record in records]) for key in keys}
+        return cls(keys, columns)
+
+    def column(self, key: str) -> Column:
+        """Return the values of a key.
+
+        Raises:
+            KeyError: If the records do not have key
+        """
+        return Column(self._columns[key])
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            columns = {key: values[index] for key, values in self._columns.items()}
+            return ColumnarRecords(self.keys, columns)
+        try:
+            index = operator.index(index)
+        except TypeError:
+            raise TypeError(
+                f"list indices must be integers or slices, not {type(index).__name__}"
+            ) from None
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("list index out of range")
+        return RowView(self, index)
+
+    def __iter__(self) -> Iterator[RowView]:
+        for index in range(self._length):
+            yield RowView(self, index)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def materialize(self) -> list[dict[str, Any]]:
+        """Copy the records into a list of dicts."""
+        keys = self.keys
+        columns = [self._columns[key] for key in keys]
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+
+    def __repr__(self) -> str:
+        return f"ColumnarRecords({len(self)} records: {', '.join(self.keys)})"
+
+
+def _compact(values: list[Any]) -> Sequence[Any]:
+    """Store the values of one column as compactly as their types allow."""
+    types = set(map(type, values))
+    if types == {int}:
+        try:
+            return array("q", values)
+        except OverflowError:
+            return values
+    if types == {float}:
+        return array("d", values)
+    if types == {str}:
+        seen: dict[str, str] = {}
+        return [seen.setdefault(value, value) for value in values]
+    return [to_columnar(value) for value in values]
+
+
+def _is_homogeneous(records: list[Any]) -> bool:
+    """Check whether a list holds enough dicts that all have the same keys."""
+    if len(records) < MIN_ROWS or type(records[0]) is not dict or not records[0]:
+        return False
+    keys = tuple(records[0])
+    return all(type(record) is dict and tuple(record) == keys for record in records)
+
+
+def to_columnar(data: Any) -> Any:
+    """Store every array of homogeneous records in a document column-wise.
+
+    A list of at least MIN_ROWS dicts that have the same keys in the same
+    order becomes a ColumnarRecords; other lists and dicts are converted in
+    place, so the parsed document must not be shared. The conversion only
+    shrinks the document once it is parsed: it does not lower the peak
+    memory use of loading it.
+
+    Args:
+        data: Parsed document
+
+    Returns:
+        The document with its record arrays replaced
+    """
+    if type(data) is dict:
+        for key, value in data.items():
+            data[key] = to_columnar(value)
+    elif type(data) is list:
+        if _is_homogeneous(data):
+            return ColumnarRecords.from_records(data)
+        for index, value in enumerate(data):
+            data[index] = to_columnar(value)
+    return data
+
+
+def column(records: Any, key: Any) -> Sequence[Any]:
+    """Return the value of key in each record.
+
+    For columnar records this is the stored column, so aggregating it
+    does not touch the records.
+
+    Args:
+        records: List of records, e.g. dicts
+        key: Key or index every record is looked up with
+
+    Returns:
+        Values in record order
+
+    Raises:
+        KeyError: If a record does not have key
+    """
+    if isinstance(records, ColumnarRecords):
+        return records.column(key)
+    return [record[key] for record in records]
+
+
+def aggregate_column(func: Callable[[Any], Any], records: Any, key: Any) -> Any:
+    """Evaluate func(r[key] for r in records), over the column when possible.
+
+    Stands in for a sum, min or max of one key over a list of records. For
+    any other function or records, the generator is built as written.
+
+    Args:
+        func: Function the values are passed to
+        records: Iterable the generator loops over
+        key: Constant key the generator yields
+
+    Returns:
+        Result of func
+    """
+    if isinstance(records, ColumnarRecords) and key in records.keys:
+        for aggregate in _COLUMN_AGGREGATES:
+            if func is aggregate:
+                return func(records.column(key))
+    return func(record[key] for record in records)
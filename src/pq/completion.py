@@ -2,156 +2,706 @@
 
 from __future__ import annotations
 
+from collections import Counter, OrderedDict
+from collections.abc import Iterable, Iterator
+from itertools import islice
+import ast
+import heapq
 import re
-from typing import Any
+from typing import Any, NamedTuple
 
-__all__ = ["PathExtractor", "FuzzyMatcher"]
+from pq.loader import DocumentLoadError
+from pq.types import LazyMapping, LazySequence
 
+__all__ = [
+    "ANY_INDEX",
+    "BUILD_CHUNK_SIZE",
+    "DEFAULT_MAX_INDICES",
+    "FieldStats",
+    "LAZY_NODE_CACHE_SIZE",
+    "LazyPathIndex",
+    "fuzzy_score",
+    "PathExtractor",
+    "PathIndex",
+    "SchemaIndex",
+    "FuzzyMatcher",
+]
 
-class PathExtractor:
-    """Extract valid paths from document structure."""
 
-    def __init__(self, data: dict[str, Any]) -> None:
-        """Initialize with document data.
+PathNode = dict[Any, "PathNode | None"]
+
+DEFAULT_MAX_INDICES = 100
+
+
+class _AnyIndex:
+    """Key standing for every element of a collapsed list."""
+
+    def __repr__(self) -> str:
+        return "*"
+
+
+ANY_INDEX = _AnyIndex()
+
+_TYPE_NAMES = {dict: "dict", list: "list", str: "str", int: "int", float: "float"}
+
+BUILD_CHUNK_SIZE = 10_000
+
+LAZY_NODE_CACHE_SIZE = 64
+
+_SCORE_MATCH = 16
+_BONUS_CONSECUTIVE = 8
+_BONUS_BOUNDARY = 8
+_PENALTY_GAP_START = 3
+_PENALTY_GAP_EXTENSION = 1
+_PENALTY_CASE = 1
+_MAX_LEADING_GAP = 8
+
+_SEGMENT_RE = re.compile(r"""\[\s*(-?\d+|'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")\s*\]""")
+
+
+def format_segment(key: Any) -> str:
+    """Format one subscript of a path, e.g. "['name']", "[0]" or "[*]".
+
+    Args:
+        key: Mapping key or sequence index
+
+    Returns:
+        Subscript as it would be written in a query
+    """
+    if isinstance(key, str) and "'" not in key and "\\" not in key:
+        return f"['{key}']"
+    return f"[{key!r}]"
+
+
+def parse_path(text: str) -> tuple[list[Any], str]:
+    """Split a query prefix into its complete subscripts and the rest.
+
+    Args:
+        text: Text after the leading '_', e.g. "['items'][0]['na"
+
+    Returns:
+        Tuple of (subscript keys, unparsed remainder)
+    """
+    segments: list[Any] = []
+    pos = 0
+    while match := _SEGMENT_RE.match(text, pos):
+        segments.append(ast.literal_eval(match.group(1)))
+        pos = match.end()
+    return segments, text[pos:]
+
+
+def fuzzy_score(pattern: str, text: str) -> int | None:
+    """Score text as a fuzzy match for pattern.
+
+    The characters of pattern must appear in text in order, ignoring case.
+    Matches score higher when their characters are consecutive, start a
+    word or the text, and have the same case, and lower the more text is
+    skipped between them.
+
+    Args:
+        pattern: Characters typed by the user
+        text: Candidate to match against
+
+    Returns:
+        Score, higher is better, or None if text does not match
+    """
+    if not pattern:
+        return 0
+    lower = text.lower()
+    pattern_lower = pattern.lower()
+
+    pos = -1
+    for char in pattern_lower:
+        pos = lower.find(char, pos + 1)
+        if pos < 0:
+            return None
+
+    # Walk back from the end of the first match to find the shortest
+    # window ending there, then match forward inside it.
+    pos += 1
+    for char in reversed(pattern_lower):
+        pos = lower.rfind(char, 0, pos)
+
+    score = -_PENALTY_GAP_EXTENSION * min(pos, _MAX_LEADING_GAP)
+    prev = pos - 1
+    for i, (char, char_lower) in enumerate(zip(pattern, pattern_lower)):
+        pos = lower.find(char_lower, prev + 1)
+        score += _SCORE_MATCH
+        if i:
+            if pos == prev + 1:
+                score += _BONUS_CONSECUTIVE
+            else:
+                score -= _PENALTY_GAP_START
+                score -= _PENALTY_GAP_EXTENSION * (pos - prev - 2)
+        if (
+            pos == 0
+            or not text[pos - 1].isalnum()
+            or (text[pos].isupper() and text[pos - 1].islower())
+        ):
+            score += _BONUS_BOUNDARY
+        if text[pos] != char:
+            score -= _PENALTY_CASE
+        prev = pos
+    return score
+
+
+def _iter_entries(obj: Any) -> tuple[Iterator[tuple[Any, Any]], bool, bool] | None:
+    """Get an iterator over a container's entries for walking its structure.
+
+    Args:
+        obj: Value to walk
+
+    Returns:
+        Tuple of (entries, whether obj is a sequence, whether obj is lazy),
+        or None if obj is not a container
+    """
+    if isinstance(obj, dict):
+        return iter(obj.items()), False, False
+    if isinstance(obj, LazyMapping):
+        return obj.iter_structure(), False, True
+    if isinstance(obj, LazySequence):
+        return obj.iter_structure(), True, True
+    if isinstance(obj, (list, tuple)):
+        return enumerate(obj), True, False
+    return None
+
+
+def _type_name(value: Any, is_lazy: bool) -> str:
+    """Name the type of a value for FieldStats, e.g. "dict" or "str".
+
+    Args:
+        value: Value to name the type of
+        is_lazy: Whether the value came from a lazy container's structure
+
+    Returns:
+        Type name
+    """
+    name = _TYPE_NAMES.get(type(value))
+    if name is not None:
+        return name
+    if isinstance(value, LazyMapping):
+        return "dict"
+    if isinstance(value, (tuple, LazySequence)):
+        return "list"
+    if value is None:
+        return "unknown" if is_lazy else "None"
+    return type(value).__name__
+
+
+class PathIndex:
+    """Tree of the subscript paths in a document.
+
+    Each node maps the keys or indices under a path to the child node, or
+    to None for scalar values, so looking up the children of a path costs
+    one dict lookup per subscript.
+    """
+
+    def __init__(self, root: PathNode | None = None) -> None:
+        """Initialize with a root node.
 
         Args:
-            data: Document data to extract paths from
+            root: Children of '_', or None for an empty index
         """
-        self.data = data
-        self.paths: list[str] = []
-        self._extract_paths(self.data, "_")
+        self.root: PathNode = root if root is not None else {}
+
+    @classmethod
+    def from_data(cls, data: Any) -> PathIndex:
+        """Index the structure of document data.
+
+        Args:
+            data: Document data
+
+        Returns:
+            PathIndex of every path in the data
+        """
+        index = cls()
+        for _count in index.build(data):
+            pass
+        return index
+
+    def build(self, data: Any, chunk_size: int = BUILD_CHUNK_SIZE) -> Iterator[int]:
+        """Add the paths of document data to the index, a chunk at a time.
 
-    def _extract_paths(self, obj: Any, current_path: str) -> None:
-        """Recursively extract paths from object.
+        The index can be used between chunks; it then holds the paths seen
+        so far. Lazy containers are walked with iter_structure, so their
+        scalar values are not loaded.
 
         Args:
-            obj: Object to extract paths from
-            current_path: Current path prefix
+            data: Document data
+            chunk_size: Number of values to index between yields
+
+        Yields:
+            Number of values indexed so far
         """
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                new_path = f"{current_path}['{key}']"
-                self.paths.append(new_path)
-                self._extract_paths(value, new_path)
-        elif isinstance(obj, (list, tuple)):
-            for i, value in enumerate(obj):
-                new_path = f"{current_path}[{i}]"
-                self.paths.append(new_path)
-                self._extract_paths(value, new_path)
+        stack: list[tuple[Iterator[tuple[Any, Any]], PathNode]] = []
+        entries = _iter_entries(data)
+        if entries is not None:
+            stack.append((entries[0], self.root))
+
+        count = 0
+        while stack:
+            entries_iter, node = stack[-1]
+            for key, value in entries_iter:
+                count += 1
+                if count % chunk_size == 0:
+                    yield count
+                child_entries = _iter_entries(value)
+                if child_entries is None:
+                    node[key] = None
+                    continue
+                child: PathNode = {}
+                node[key] = child
+                stack.append((child_entries[0], child))
+                break
+            else:
+                stack.pop()
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str]) -> PathIndex:
+        """Index path strings such as "_['items'][0]".
 
-    def get_paths(self) -> list[str]:
-        """Get all extracted paths.
+        Args:
+            paths: Path strings starting with '_'
 
         Returns:
-            List of path strings
+            PathIndex containing the paths
         """
-        return self.paths
+        root: PathNode = {}
+        for path in paths:
+            segments, _rest = parse_path(path[1:])
+            node = root
+            for key in segments:
+                child = node.get(key)
+                if child is None:
+                    child = node[key] = {}
+                node = child
+        return cls(root)
+
+    def children(self, segments: Iterable[Any]) -> PathNode | None:
+        """Get the children of a path.
 
+        Args:
+            segments: Subscript keys of the path
 
-class FuzzyMatcher:
-    """Fuzzy matching for path suggestions."""
+        Returns:
+            Mapping of child keys to their nodes, or None if the path does
+            not exist or has no children. Indices of a collapsed list that
+            were not enumerated resolve to its merged element shape.
+        """
+        node: PathNode | None = self.root
+        for key in segments:
+            if node is None:
+                return None
+            try:
+                if key in node:
+                    node = node[key]
+                elif isinstance(key, int) and ANY_INDEX in node:
+                    node = node[ANY_INDEX]
+                else:
+                    return None
+            except TypeError:
+                return None
+        return node
+
+    def iter_paths(self) -> Iterator[str]:
+        """Yield every path, parents before their children.
+
+        Yields:
+            Path strings such as "_['items'][0]['name']"
+        """
+        stack: list[tuple[str, Iterator[tuple[Any, PathNode | None]]]] = [
+            ("_", iter(self.root.items()))
+        ]
+        while stack:
+            prefix, entries = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                continue
+            key, child = entry
+            path = prefix + format_segment(key)
+            yield path
+            if child:
+                stack.append((path, iter(child.items())))
+
+
+class FieldStats(NamedTuple):
+    """How often a path occurs in the document, and with which types."""
+
+    count: int
+    types: dict[str, int]
 
-    def __init__(self, paths: list[str]) -> None:
-        """Initialize with paths.
+
+class SchemaIndex(PathIndex):
+    """PathIndex that collapses the elements of each list into one shape.
+
+    The elements of a list are merged into a single node under ANY_INDEX,
+    holding the union of their keys, so index size depends on how varied
+    the document's structure is rather than on how much data it holds.
+    The first max_indices indices of each list point at the merged shape
+    so they can still be suggested.
+    """
+
+    def __init__(
+        self,
+        root: PathNode | None = None,
+        stats: dict[tuple[Any, ...], Counter[str]] | None = None,
+        max_indices: int = DEFAULT_MAX_INDICES,
+    ) -> None:
+        """Initialize with a root node and per-path type counts.
 
         Args:
-            paths: List of path strings to match against
+            root: Children of '_', or None for an empty index
+            stats: Type name counts keyed by path, with ANY_INDEX in place
+                of list indices
+            max_indices: Number of concrete indices to enumerate per list
         """
-        self.paths = paths
+        super().__init__(root)
+        self.stats = stats if stats is not None else {}
+        self.max_indices = max_indices
 
-    def _get_path_depth(self, path: str) -> int:
-        """Calculate depth of bracket access in path.
+    @classmethod
+    def from_data(
+        cls, data: Any, max_indices: int = DEFAULT_MAX_INDICES
+    ) -> SchemaIndex:
+        """Summarize the structure of document data.
 
         Args:
-            path: Path string to analyze
+            data: Document data
+            max_indices: Number of concrete indices to enumerate per list
 
         Returns:
-            Number of bracket access levels
+            SchemaIndex of the document's shape
         """
-        complete_brackets = re.findall(r"\[[^\]]+\]", path)
-        return len(complete_brackets)
+        index = cls(max_indices=max_indices)
+        for _count in index.build(data):
+            pass
+        return index
+
+    def build(self, data: Any, chunk_size: int = BUILD_CHUNK_SIZE) -> Iterator[int]:
+        """Add the shape of document data to the index, a chunk at a time.
+
+        The index can be used between chunks; it then holds the shape seen
+        so far, and the indices of a list are enumerated once the whole
+        list has been walked. Scalars of lazy containers are not loaded and
+        are counted with the type "unknown".
 
-    def _matches_prefix(self, path: str, query: str) -> bool:
-        """Check if path matches query prefix.
+        Args:
+            data: Document data
+            chunk_size: Number of values to summarize between yields
 
-        Handles partial keys with fuzzy matching.
+        Yields:
+            Number of values summarized so far
+        """
+        stats = self.stats
+        # Type counts of each node's children, so the path tuple of a
+        # field is only built the first time the field is seen.
+        field_counts: dict[int, dict[Any, Counter[str]]] = {}
+        stack: list[list[Any]] = []
+        entries = _iter_entries(data)
+        if entries is not None:
+            stack.append([*entries, self.root, (), 0])
+
+        count = 0
+        while stack:
+            frame = stack[-1]
+            entries_iter, is_sequence, is_lazy, node, path, length = frame
+            fields = field_counts.get(id(node))
+            if fields is None:
+                fields = field_counts[id(node)] = {}
+            for key, value in entries_iter:
+                count += 1
+                if count % chunk_size == 0:
+                    yield count
+                if is_sequence:
+                    length = key + 1
+                    key = ANY_INDEX
+                counts = fields.get(key)
+                if counts is None:
+                    counts = fields[key] = stats[(*path, key)] = Counter()
+                counts[_type_name(value, is_lazy)] += 1
+
+                child_entries = _iter_entries(value)
+                if child_entries is None:
+                    if key not in node:
+                        node[key] = None
+                    continue
+                child = node.get(key)
+                if child is None:
+                    child = node[key] = {}
+                frame[-1] = length
+                stack.append([*child_entries, child, (*path, key), 0])
+                break
+            else:
+                stack.pop()
+                if is_sequence:
+                    element = node.get(ANY_INDEX)
+                    for i in range(min(length, self.max_indices)):
+                        node[i] = element
+
+    def field_stats(self, segments: Iterable[Any]) -> FieldStats | None:
+        """Get how often a path occurs, and the types of its values.
 
         Args:
-            path: Full path string
-            query: Query prefix (may be partial)
+            segments: Subscript keys of the path; any index of a collapsed
+                list refers to all of its elements
 
         Returns:
-            True if path matches query prefix
+            FieldStats for the path, or None if it does not exist
         """
-        if not query or query == "_":
-            return path.startswith("_")
+        node: PathNode | None = self.root
+        path: list[Any] = []
+        for key in segments:
+            if node is None:
+                return None
+            if isinstance(key, int) and ANY_INDEX in node:
+                key = ANY_INDEX
+            try:
+                node = node.get(key)
+            except TypeError:
+                return None
+            path.append(key)
+
+        counts = self.stats.get(tuple(path))
+        if counts is None:
+            return None
+        return FieldStats(sum(counts.values()), dict(counts))
+
+
+class LazyPathIndex(PathIndex):
+    """PathIndex that lists the children of a path when they are asked for.
+
+    Walking a lazy or out-of-core document up front would load its whole
+    structure into memory. This index instead looks up the path being
+    completed in the document and lists only its children, up to
+    max_indices items of a list. The nodes of the last LAZY_NODE_CACHE_SIZE
+    paths are kept, so typing on under one path does not list it again.
+    """
+
+    def __init__(self, data: Any = None, max_indices: int = DEFAULT_MAX_INDICES):
+        """Initialize over document data.
+
+        Args:
+            data: Document data, e.g. the root of a lazy document
+            max_indices: Number of indices listed per list
+        """
+        super().__init__()
+        self.max_indices = max_indices
+        self._nodes: OrderedDict[tuple[Any, ...], PathNode | None] = OrderedDict()
+        self._set_data(data)
 
-        if path.startswith(query):
-            return True
+    @classmethod
+    def from_data(
+        cls, data: Any, max_indices: int = DEFAULT_MAX_INDICES
+    ) -> LazyPathIndex:
+        """Index document data on demand.
 
-        path_lower = path.lower()
+        Args:
+            data: Document data
+            max_indices: Number of indices listed per list
 
-        bracket_match = re.search(r"\['([^']*)$", query)
-        if bracket_match:
-            partial_key = bracket_match.group(1)
-            base_prefix = query[: bracket_match.start()]
-            if path_lower.startswith(base_prefix.lower()):
-                key_match = re.search(r"\['([^']+)'\]", path[len(base_prefix) :])
-                if key_match:
-                    actual_key = key_match.group(1)
-                    return partial_key.lower() in actual_key.lower()
+        Returns:
+            LazyPathIndex over the data
+        """
+        return cls(data, max_indices)
 
-        return False
+    def build(self, data: Any, chunk_size: int = BUILD_CHUNK_SIZE) -> Iterator[int]:
+        """Index document data on demand; nothing is walked up front.
 
-    def _has_partial_key(self, query: str) -> bool:
-        """Check if query ends with a partial key.
+        Args:
+            data: Document data
+            chunk_size: Unused, for compatibility with PathIndex.build
+
+        Yields:
+            Nothing
+        """
+        self._set_data(data)
+        yield from ()
+
+    def _set_data(self, data: Any) -> None:
+        self.data = data
+        self._nodes.clear()
+        self.root = self._lookup(()) or {}
+
+    def children(self, segments: Iterable[Any]) -> PathNode | None:
+        """Get the children of a path, looking the path up in the document.
 
         Args:
-            query: Query string to check
+            segments: Subscript keys of the path
 
         Returns:
-            True if query ends with a partial key
+            Mapping of child keys to an empty node for containers and None
+            for scalars, or None if the path does not exist or has no
+            children
+        """
+        path = tuple(segments)
+        if not path:
+            return self.root
+        try:
+            node = self._nodes[path]
+        except TypeError:
+            return None
+        except KeyError:
+            pass
+        else:
+            self._nodes.move_to_end(path)
+            return node
+
+        node = self._lookup(path)
+        self._nodes[path] = node
+        if len(self._nodes) > LAZY_NODE_CACHE_SIZE:
+            self._nodes.popitem(last=False)
+        return node
+
+    def _lookup(self, path: tuple[Any, ...]) -> PathNode | None:
+        """List the keys or first indices of the container at path.
+
+        Values are only checked for being containers, so lazy scalars are
+        not loaded.
         """
-        return bool(re.search(r"\['([^']*)$", query))
+        value = self.data
+        try:
+            for key in path:
+                value = value[key]
+            entries = _iter_entries(value)
+            if entries is None:
+                return None
+            entries_iter, is_sequence, _is_lazy = entries
+            if is_sequence:
+                entries_iter = islice(entries_iter, self.max_indices)
+            return {
+                key: None if _iter_entries(child) is None else {}
+                for key, child in entries_iter
+            }
+        except (LookupError, TypeError, ValueError, DocumentLoadError):
+            # Missing or malformed paths have nothing to complete.
+            return None
 
-    def _filter_to_next_level(self, paths: list[str], query: str) -> list[str]:
-        """Filter paths to only show next-level suggestions.
+
+class PathExtractor:
+    """Extract valid paths from document structure."""
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        """Initialize with document data.
 
         Args:
-            paths: List of all available paths
-            query: Current query string
+            data: Document data to extract paths from
+        """
+        self.data = data
+        self.index = PathIndex.from_data(data)
+
+    def get_paths(self) -> list[str]:
+        """Get all extracted paths.
 
         Returns:
-            List of paths at the next level only
+            List of path strings
         """
-        query_depth = self._get_path_depth(query)
-        target_depth = query_depth + 1
+        return list(self.index.iter_paths())
 
-        matched = []
-        for path in paths:
-            if not self._matches_prefix(path, query):
-                continue
 
-            path_depth = self._get_path_depth(path)
-            if path_depth == target_depth:
-                matched.append(path)
+class FuzzyMatcher:
+    """Fuzzy matching for path suggestions."""
 
-        return matched
+    def __init__(self, paths: PathIndex | list[str]) -> None:
+        """Initialize with paths.
+
+        Args:
+            paths: PathIndex, or list of path strings to match against
+        """
+        if not isinstance(paths, PathIndex):
+            paths = PathIndex.from_paths(paths)
+        self.index = paths
+        # (children, number of children, partial key, keys matching it) of
+        # the last partial key matched, to refine as the user types on.
+        self._last_match: tuple[PathNode, int, str, list[str]] | None = None
 
     def find_matches(self, query: str, max_results: int = 10) -> list[str]:
-        """Find paths that fuzzy match the query.
+        """Find the paths one level below the query that match it.
+
+        A partial key at the end, as in "_['items'][0]['na", matches keys
+        containing its characters in order, ranked by fuzzy_score. A partial
+        index matches indices starting with it. The bare root query "_"
+        lists every top-level path.
 
         Args:
             query: Query string to match
             max_results: Maximum number of results to return
 
         Returns:
-            List of matching paths sorted by relevance
+            List of matching paths, best match first for a partial key and
+            in document order otherwise
         """
         if not query or query == "_":
-            return self._filter_to_next_level(self.paths, "_")
+            query, max_results = "_", -1
+        if not query.startswith("_"):
+            return []
+
+        segments, rest = parse_path(query[1:])
+        children = self.index.children(segments)
+        if not children:
+            return []
+
+        keys: Iterable[Any] = children
+        if rest.startswith(("['", '["')):
+            keys = self._rank_keys(children, rest[2:], max_results)
+        elif rest.startswith("["):
+            digits = rest[1:]
+            if digits and not digits.isdigit():
+                return []
+            keys = (k for k in keys if isinstance(k, int) and str(k).startswith(digits))
+        elif rest:
+            return []
+        else:
+            keys = (k for k in keys if k is not ANY_INDEX)
+
+        if max_results >= 0:
+            keys = islice(keys, max_results)
+        base = "_" + "".join(format_segment(key) for key in segments)
+        return [base + format_segment(key) for key in keys]
+
+    def _rank_keys(self, children: PathNode, partial: str, limit: int) -> list[str]:
+        """Get the best fuzzy matches for a partial key among string keys.
+
+        When partial extends the previous partial key under the same path,
+        only the keys that matched before are scored again.
 
-        return self._filter_to_next_level(self.paths, query)[:max_results]
+        Args:
+            children: Children of the path being completed
+            partial: Partial key typed so far
+            limit: Maximum number of keys to return, or -1 for all
+
+        Returns:
+            Matching keys, best first, ties in document order
+        """
+        if not partial:
+            self._last_match = None
+            keys = (key for key in children if isinstance(key, str))
+            return list(islice(keys, limit if limit >= 0 else None))
+
+        candidates: Iterable[Any] = children
+        last = self._last_match
+        if (
+            last is not None
+            and last[0] is children
+            and last[1] == len(children)
+            and partial.lower().startswith(last[2].lower())
+        ):
+            candidates = last[3]
+
+        scored: list[tuple[int, str]] = []
+        for key in candidates:
+            if isinstance(key, str):
+                score = fuzzy_score(partial, key)
+                if score is not None:
+                    scored.append((score, key))
+        matched = [key for _, key in scored]
+        self._last_match = (children, len(children), partial, matched)
+
+        if limit >= 0:
+            ranked = heapq.nlargest(limit, scored, key=lambda item: item[0])
+        else:
+            ranked = sorted(scored, key=lambda item: item[0], reverse=True)
+        return [key for _, key in ranked]
 
     def get_keys_at_path(self, base_path: str) -> list[str]:
         """Get available keys at a given path.
@@ -162,25 +712,12 @@ class FuzzyMatcher:
         Returns:
             List of available keys (string keys or integer indices)
         """
-        keys: set[str] = set()
-
-        for path in self.paths:
-            if not path.startswith(base_path):
-                continue
-
-            remaining = path[len(base_path) :]
-            if not remaining.startswith("[") or len(remaining) < 2:
-                continue
-
-            bracket_content = remaining[1:].split("]")[0]
-
-            if bracket_content.startswith("'"):
-                keys.add(bracket_content.strip("'"))
-            elif bracket_content.startswith('"'):
-                keys.add(bracket_content.strip('"'))
-            elif bracket_content.isdigit():
-                keys.add(bracket_content)
+        segments, rest = parse_path(base_path[1:])
+        children = self.index.children(segments)
+        if rest or not base_path.startswith("_") or not children:
+            return []
 
+        keys = {str(key) for key in children if isinstance(key, (str, int))}
         return sorted(
             keys, key=lambda x: (not x.isdigit(), int(x) if x.isdigit() else x)
         )
@@ -4,15 +4,38 @@ from __future__ import annotations
 
 from pathlib import Path
 import tomllib
-from typing import NamedTuple
+from typing import Any, NamedTuple
 
-__all__ = ["Config", "load_config"]
+from pq.completion import DEFAULT_MAX_INDICES
+
+__all__ = [
+    "Config",
+    "DEFAULT_CACHE_DIR",
+    "DEFAULT_CACHE_MAX_SIZE_MB",
+    "load_config",
+]
+
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "pq-cli"
+DEFAULT_CACHE_MAX_SIZE_MB = 1024
 
 
 class Config(NamedTuple):
     """Application configuration."""
 
     theme: str | None
+    cache_enabled: bool = False
+    cache_dir: Path = DEFAULT_CACHE_DIR
+    cache_max_size_mb: int = DEFAULT_CACHE_MAX_SIZE_MB
+    completion_schema: bool = False
+    completion_max_indices: int = DEFAULT_MAX_INDICES
+    cpu_time_limit: int | None = None
+    memory_limit_mb: int | None = None
+
+
+def _optional_int(value: Any) -> int | None:
+    """Convert a config value to int, keeping None for an unset option."""
+    return None if value is None else int(value)
 
 
 def load_config() -> Config:
@@ -23,7 +46,7 @@ def load_config() -> Config:
     2. $HOME/.config/pq-cli/config.toml (XDG config dir)
 
     Returns:
-        Config object with loaded settings, or None for missing values
+        Config object with loaded settings, or defaults for missing values
     """
     config_paths = [
         Path(".pq-cli.toml"),
@@ -37,8 +60,24 @@ def load_config() -> Config:
                     data = tomllib.load(f)
 
                 theme = data.get("theme", {}).get("name")
-                return Config(theme=theme)
-            except (tomllib.TOMLDecodeError, OSError, KeyError):
+                cache = data.get("cache", {})
+                completion = data.get("completion", {})
+                limits = data.get("limits", {})
+                return Config(
+                    theme=theme,
+                    cache_enabled=bool(cache.get("enabled", False)),
+                    cache_dir=Path(cache.get("dir", DEFAULT_CACHE_DIR)).expanduser(),
+                    cache_max_size_mb=int(
+                        cache.get("max_size_mb", DEFAULT_CACHE_MAX_SIZE_MB)
+                    ),
+                    completion_schema=bool(completion.get("schema", False)),
+                    completion_max_indices=int(
+                        completion.get("max_indices", DEFAULT_MAX_INDICES)
+                    ),
+                    cpu_time_limit=_optional_int(limits.get("cpu_time")),
+                    memory_limit_mb=_optional_int(limits.get("memory_mb")),
+                )
+            except (tomllib.TOMLDecodeError, OSError, KeyError, ValueError):
                 continue
 
     return Config(theme=None)
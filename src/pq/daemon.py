@@ -0,0 +1,336 @@
+"""Query daemon keeping parsed documents resident behind a UNIX socket."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any, BinaryIO
+import json
+import os
+import socket
+import socketserver
+import threading
+
+from pq.budget import Budget, needs_supervision, run_with_budget
+from pq.evaluator import QueryEvaluationError, evaluate_query
+from pq.index import clear_indexes
+from pq.loader import DocumentLoadError
+from pq.output import OutputFormatter
+
+__all__ = [
+    "DOCUMENT_CACHE_SIZE",
+    "DaemonError",
+    "QueryServer",
+    "request_completions",
+    "request_query",
+]
+
+
+# Documents kept resident at once; the least recently queried is dropped.
+DOCUMENT_CACHE_SIZE = 8
+
+_ERROR_TYPES: dict[str, type[Exception]] = {
+    "QueryEvaluationError": QueryEvaluationError,
+    "DocumentLoadError": DocumentLoadError,
+}
+
+LoaderFunc = Callable[[Path], Any]
+
+
+class DaemonError(Exception):
+    """Raised when the daemon cannot be reached or breaks the protocol."""
+
+
+def _file_stamp(file_path: Path) -> tuple[int, int]:
+    """Return the (mtime_ns, size) pair used to detect a changed file.
+
+    Raises:
+        DocumentLoadError: If the file cannot be stat'ed
+    """
+    try:
+        stat = file_path.stat()
+    except OSError as e:
+        raise DocumentLoadError(f"Cannot read {file_path}: {e}") from e
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _ResidentDocument:
+    """A parsed document kept in memory, reloaded when its file changes."""
+
+    def __init__(self, file_path: Path, loader: LoaderFunc) -> None:
+        self.file_path = file_path
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._stamp: tuple[int, int] | None = None
+        self._data: Any = None
+        # Serializes completion index builds without blocking data().
+        self._matcher_lock = threading.Lock()
+        self._matcher: Any = None
+        self._matcher_data: Any = None
+
+    def data(self) -> Any:
+        """Return the document, reloading it first if the file changed.
+
+        Concurrent requests for a stale document wait for a single reload;
+        requests already evaluating keep the version they started with.
+
+        Raises:
+            DocumentLoadError: If the file cannot be loaded
+        """
+        with self._lock:
+            stamp = _file_stamp(self.file_path)
+            if stamp != self._stamp:
+                if self._stamp is not None:
+                    # Indexes hold on to the previous version's lists.
+                    clear_indexes()
+                self._data = self._loader(self.file_path)
+                # Drop the previous version's index; a build still running
+                # for it is replaced on the next completion.
+                self._matcher = self._matcher_data = None
+                self._stamp = stamp
+            return self._data
+
+    def matcher(self) -> Any:
+        """Return a FuzzyMatcher over the document, building it on first use.
+
+        The index is built without holding the document lock, so queries
+        are not held up while a large document is walked.
+
+        Raises:
+            DocumentLoadError: If the file cannot be loaded
+        """
+        from pq.completion import FuzzyMatcher, PathIndex
+
+        data = self.data()
+        with self._matcher_lock:
+            if self._matcher is None or self._matcher_data is not data:
+                self._matcher = FuzzyMatcher(PathIndex.from_data(data))
+                self._matcher_data = data
+            return self._matcher
+
+
+class QueryServer(socketserver.ThreadingUnixStreamServer):
+    """Threaded server answering queries against resident documents.
+
+    Each connection carries one request: a line of JSON with an "op"
+    ("query" or "complete"), an absolute "file" path and a "query". The
+    reply is a sequence of JSON lines: {"output": text} pieces of the
+    formatted result, or one {"suggestions": [...]} for completions,
+    followed by {"done": true} or a final {"error": message, "type": name}.
+
+    Documents are loaded on first use and stay resident, keyed by path, up
+    to DOCUMENT_CACHE_SIZE of them. Every request checks the file's mtime
+    and size and reloads it if either changed. Compiled queries are cached
+    by the evaluator across requests, and so are the indexes of indexed
+    filters. Under a budget, each query runs in a forked worker with its
+    limits, so a runaway query cannot pin a thread or grow the daemon.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: Path,
+        loader: LoaderFunc,
+        indexed: bool = False,
+        budget: Budget = Budget(),
+    ) -> None:
+        """Bind the server to socket_path, replacing a stale socket file.
+
+        Args:
+            socket_path: Path of the UNIX socket to listen on
+            loader: Function that parses the document at a path
+            indexed: Answer key filters from cached indexes, see
+                evaluate_query
+            budget: CPU time and memory each query may use
+
+        Raises:
+            DaemonError: If another daemon is already listening on socket_path
+        """
+        self.socket_path = socket_path
+        self._loader = loader
+        self.indexed = indexed
+        self.budget = budget
+        self._documents: OrderedDict[Path, _ResidentDocument] = OrderedDict()
+        self._documents_lock = threading.Lock()
+
+        if socket_path.exists():
+            if _is_listening(socket_path):
+                raise DaemonError(f"A daemon is already listening on {socket_path}")
+            socket_path.unlink()
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Only the owner may connect: queries can read any file they can.
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), _RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def document(self, file_path: Path) -> _ResidentDocument:
+        """Return the resident document for a path, registering it if new.
+
+        Registering a document beyond DOCUMENT_CACHE_SIZE drops the least
+        recently used one; requests still evaluating against it finish.
+        """
+        with self._documents_lock:
+            document = self._documents.get(file_path)
+            if document is not None:
+                self._documents.move_to_end(file_path)
+                return document
+            document = _ResidentDocument(file_path, self._loader)
+            self._documents[file_path] = document
+            if len(self._documents) > DOCUMENT_CACHE_SIZE:
+                self._documents.popitem(last=False)
+                # Indexes would otherwise keep the dropped document alive.
+                clear_indexes()
+            return document
+
+    def preload(self, file_path: Path) -> None:
+        """Load a document ahead of the first request for it.
+
+        Raises:
+            DocumentLoadError: If the file cannot be loaded
+        """
+        self.document(file_path.resolve()).data()
+
+    def server_close(self) -> None:
+        """Close the socket and remove its file."""
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Serve a single request on a client connection."""
+
+    server: QueryServer
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            op = request["op"]
+            document = self.server.document(Path(request["file"]))
+            query = request["query"]
+        except (ValueError, KeyError, TypeError) as e:
+            self._send({"error": f"Malformed request: {e}", "type": "DaemonError"})
+            return
+
+        try:
+            if op == "query":
+                result = self._evaluate(query, document.data())
+                for chunk in OutputFormatter.iter_chunks(result):
+                    self._send({"output": chunk})
+            elif op == "complete":
+                self._send({"suggestions": document.matcher().find_matches(query)})
+            else:
+                raise DaemonError(f"Unknown operation: {op!r}")
+        except (QueryEvaluationError, DocumentLoadError, DaemonError) as e:
+            self._send({"error": str(e), "type": type(e).__name__})
+        except BrokenPipeError:
+            # The client went away, e.g. `| head`.
+            pass
+        except (TypeError, ValueError) as e:
+            # The result cannot be serialized, e.g. a set or a circular list.
+            self._send({"error": str(e), "type": "QueryEvaluationError"})
+        except Exception as e:
+            # A bug in pq rather than in the query: report it as such, and
+            # let socketserver log the traceback.
+            self._send({"error": f"Internal error: {e!r}", "type": "DaemonError"})
+            raise
+        else:
+            self._send({"done": True})
+
+    def _evaluate(self, query: str, data: Any) -> Any:
+        """Evaluate a query, in a worker under the server's budget if set."""
+        budget, indexed = self.server.budget, self.server.indexed
+        if needs_supervision(query, budget):
+            return run_with_budget(lambda: evaluate_query(query, data, indexed), budget)
+        return evaluate_query(query, data, indexed)
+
+    def _send(self, message: dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(message, ensure_ascii=False).encode() + b"\n")
+
+
+def _is_listening(socket_path: Path) -> bool:
+    """Return whether something accepts connections on a UNIX socket."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+def _request(socket_path: Path, request: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Send a request to the daemon and yield its reply messages.
+
+    Raises:
+        DaemonError: If the daemon cannot be reached or the reply is cut short
+        QueryEvaluationError: If the daemon failed to evaluate the query
+        DocumentLoadError: If the daemon failed to load the document
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_path))
+    except OSError as e:
+        sock.close()
+        raise DaemonError(f"Cannot connect to daemon at {socket_path}: {e}") from e
+
+    with sock, sock.makefile("rb") as reply:
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        for line in reply:
+            message = json.loads(line)
+            if "error" in message:
+                error_type = _ERROR_TYPES.get(message.get("type"), DaemonError)
+                raise error_type(message["error"])
+            if message.get("done"):
+                return
+            yield message
+    raise DaemonError("Connection to daemon closed before the reply was complete")
+
+
+def request_query(
+    socket_path: Path, file_path: Path, query: str, out: BinaryIO
+) -> None:
+    """Evaluate a query in the daemon, streaming the result to out.
+
+    The output is byte-for-byte what a local run would print.
+
+    Args:
+        socket_path: Path of the daemon's UNIX socket
+        file_path: Document to query; resolved before it is sent
+        query: Python expression to evaluate
+        out: Binary stream the formatted result is written to
+
+    Raises:
+        DaemonError: If the daemon cannot be reached
+        QueryEvaluationError: If the query fails
+        DocumentLoadError: If the document cannot be loaded
+    """
+    request = {"op": "query", "file": str(file_path.resolve()), "query": query}
+    for message in _request(socket_path, request):
+        out.write(message["output"].encode())
+        out.flush()
+
+
+def request_completions(socket_path: Path, file_path: Path, query: str) -> list[str]:
+    """Ask the daemon for completion suggestions for a partial query.
+
+    Args:
+        socket_path: Path of the daemon's UNIX socket
+        file_path: Document to complete against; resolved before it is sent
+        query: Partial query, e.g. "_['meta"
+
+    Returns:
+        Suggested queries, best first
+
+    Raises:
+        DaemonError: If the daemon cannot be reached
+        DocumentLoadError: If the document cannot be loaded
+    """
+    request = {"op": "complete", "file": str(file_path.resolve()), "query": query}
+    suggestions: list[str] = []
+    for message in _request(socket_path, request):
+        suggestions.extend(message["suggestions"])
+    return suggestions
@@ -3,16 +3,63 @@
 from __future__ import annotations
 
 import ast
+import copy
+import ctypes
+import sys
 from collections import Counter, defaultdict, OrderedDict, deque, namedtuple
-from typing import Any
+from collections.abc import Callable, Iterator
+from functools import lru_cache
+from itertools import islice
+from types import CodeType
+from typing import Any, NamedTuple
+
+from pq.columnar import aggregate_column, column
+from pq.index import index_by, select_equal, select_member
+from pq.types import LazyMapping, LazySequence
 
 __all__ = [
     "ALLOWED_BUILTINS",
+    "EvaluationCancelled",
+    "IncrementalEvaluator",
+    "MEMO_CACHE_SIZE",
+    "MEMO_MAX_BYTES",
+    "QUERY_CACHE_SIZE",
     "QueryEvaluationError",
+    "CompiledQuery",
+    "PathSegment",
+    "cancel_evaluation",
+    "compile_query",
     "evaluate_query",
+    "extract_static_path",
+    "format_path",
+    "resolve_path",
 ]
 
 
+QUERY_CACHE_SIZE = 256
+
+MEMO_CACHE_SIZE = 64
+
+# Approximate memory the memoized results of a query session may hold.
+MEMO_MAX_BYTES = 64 * 1024 * 1024
+
+# Elements sampled to extrapolate the size of a container.
+_SIZE_SAMPLE = 16
+
+
+def _isinstance(obj: Any, classinfo: Any) -> bool:
+    """isinstance, counting read-only mappings as dicts and sequences as lists.
+
+    Lazy, out-of-core and columnar documents hold such views in place of
+    dicts and lists, and queries should not tell them apart.
+    """
+    if isinstance(obj, LazyMapping):
+        return isinstance(obj, classinfo) or issubclass(dict, classinfo)
+    if isinstance(obj, LazySequence):
+        return isinstance(obj, classinfo) or issubclass(list, classinfo)
+    return isinstance(obj, classinfo)
+
+
 ALLOWED_BUILTINS = {
     "len": len,
     "sum": sum,
@@ -30,7 +77,7 @@ ALLOWED_BUILTINS = {
     "float": float,
     "bool": bool,
     "type": type,
-    "isinstance": isinstance,
+    "isinstance": _isinstance,
     "range": range,
     "zip": zip,
     "enumerate": enumerate,
@@ -44,6 +91,19 @@ ALLOWED_BUILTINS = {
     "OrderedDict": OrderedDict,
     "deque": deque,
     "namedtuple": namedtuple,
+    "index_by": index_by,
+    "column": column,
+}
+
+# Builtins whose call on one key of each record is rewritten to
+# __aggregate_column, see _column_aggregates.
+_COLUMN_AGGREGATES = frozenset({"sum", "min", "max"})
+
+# Helpers that indexed filters are rewritten to call. Queries cannot name
+# them: dunder names are rejected by validation.
+_INDEX_HELPERS = {
+    "__select_equal": select_equal,
+    "__select_member": select_member,
 }
 
 _SAFE_NODE_TYPES = frozenset(
@@ -130,6 +190,8 @@ _ALLOWED_BIN_OPS = frozenset(
 
 _ALLOWED_UNARY_OPS = frozenset({ast.UAdd, ast.USub, ast.Not, ast.Invert})
 
+_ALLOWED_BOOL_OPS = frozenset({ast.And, ast.Or})
+
 _ALLOWED_CMP_OPS = frozenset(
     {
         ast.Eq,
@@ -146,10 +208,54 @@ _ALLOWED_CMP_OPS = frozenset(
 )
 
 
+PathSegment = str | int | slice
+
+# Returned by _constant_segment for a subscript that is not a constant.
+_NOT_CONSTANT = object()
+
+
+class CompiledQuery(NamedTuple):
+    """A parsed and validated query.
+
+    Pure subscript chains such as _['items'][3]['name'] are kept as their
+    path and resolved by direct traversal; every other query is compiled
+    to a code object for eval.
+    """
+
+    code: CodeType | None
+    path: tuple[PathSegment, ...] | None
+
+
 class QueryEvaluationError(Exception):
     """Raised when query evaluation fails."""
 
 
+class EvaluationCancelled(QueryEvaluationError):
+    """Raised inside a thread whose query evaluation was cancelled."""
+
+
+def cancel_evaluation(thread_id: int) -> bool:
+    """Interrupt a query evaluation running in another thread.
+
+    EvaluationCancelled is raised in the thread the next time it runs Python
+    code, so a long comprehension stops promptly while a single long call
+    into C, such as sorting a huge list, finishes first. The caller must
+    make sure the thread is still evaluating the query it means to cancel.
+
+    Args:
+        thread_id: Identifier of the evaluating thread (threading.get_ident)
+
+    Returns:
+        True if the thread was found and interrupted
+    """
+    return (
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(
+            ctypes.c_ulong(thread_id), ctypes.py_object(EvaluationCancelled)
+        )
+        == 1
+    )
+
+
 def _validate_ast(node: ast.AST) -> None:
     """Walk the AST and reject dangerous node types.
 
@@ -180,7 +286,7 @@ def _validate_ast(node: ast.AST) -> None:
                 )
 
         if isinstance(child, ast.BoolOp):
-            if child.op not in (ast.And, ast.Or):
+            if type(child.op) not in _ALLOWED_BOOL_OPS:
                 raise QueryEvaluationError(
                     f"Boolean operator '{type(child.op).__name__}' is not allowed."
                 )
@@ -203,12 +309,100 @@ def _validate_ast(node: ast.AST) -> None:
             )
 
 
-def evaluate_query(expression: str, data: Any) -> Any:
+def _constant_segment(node: ast.expr) -> Any:
+    """Return the value of a constant subscript, or _NOT_CONSTANT.
+
+    String and integer keys, negative integers and slices whose bounds are
+    all such integers or omitted count as constant.
+    """
+    if isinstance(node, ast.Constant) and type(node.value) in (str, int):
+        return node.value
+    if (
+        isinstance(node, ast.UnaryOp)
+        and isinstance(node.op, ast.USub)
+        and isinstance(node.operand, ast.Constant)
+        and type(node.operand.value) is int
+    ):
+        return -node.operand.value
+    if isinstance(node, ast.Slice):
+        bounds = []
+        for bound in (node.lower, node.upper, node.step):
+            value = None if bound is None else _constant_segment(bound)
+            if value is not None and type(value) is not int:
+                return _NOT_CONSTANT
+            bounds.append(value)
+        return slice(*bounds)
+    return _NOT_CONSTANT
+
+
+def _subscript_chain(node: ast.expr) -> tuple[PathSegment, ...] | None:
+    """Return the path of a pure constant-subscript chain on '_', or None.
+
+    For "_['items'][3]['name']" this is ('items', 3, 'name'), and for "_"
+    alone the empty path.
+    """
+    path: list[PathSegment] = []
+    while isinstance(node, ast.Subscript):
+        segment = _constant_segment(node.slice)
+        if segment is _NOT_CONSTANT:
+            return None
+        path.append(segment)
+        node = node.value
+    if not isinstance(node, ast.Name) or node.id != "_":
+        return None
+    path.reverse()
+    return tuple(path)
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_query(expression: str, indexed: bool = False) -> CompiledQuery:
+    """Parse, validate and compile an expression.
+
+    Results are kept in a bounded LRU cache keyed by expression text, so
+    repeated queries skip parsing, validation and compilation. Invalid
+    expressions raise and are therefore never cached. Pure subscript chains
+    only need parsing: they are safe by construction and are not compiled.
+
+    Args:
+        expression: Python expression to compile
+        indexed: Rewrite comprehensions filtering records on a key to look
+            them up in cached indexes; the code then needs the index
+            helpers in its globals, as evaluate_query provides
+
+    Returns:
+        Compiled query holding either the subscript path or a code object
+        ready to be passed to eval
+
+    Raises:
+        QueryEvaluationError: If expression is invalid or unsafe
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+        path = _subscript_chain(tree.body)
+        if path is not None:
+            return CompiledQuery(None, path)
+        _validate_ast(tree)
+        _column_aggregates(tree)
+        if indexed:
+            _index_filters(tree)
+        ast.fix_missing_locations(tree)
+        return CompiledQuery(compile(tree, "<query>", "eval"), None)
+    except SyntaxError as e:
+        raise QueryEvaluationError(
+            f"Invalid Python syntax: {e.msg} at position {e.offset}. Check for missing quotes, brackets, or operators."
+        )
+
+
+def evaluate_query(expression: str, data: Any, indexed: bool = False) -> Any:
     """Safely evaluate a Python expression with data context.
 
     Args:
         expression: Python expression to evaluate
         data: Document data available as '_' variable
+        indexed: Answer filters such as [r for r in _['items'] if
+            r['id'] == 'abc'] from an index of the list built on first use
+            and cached, instead of scanning it. Pays off when the same list
+            is filtered repeatedly, e.g. in batch mode or the daemon
 
     Returns:
         Result of the expression evaluation
@@ -221,58 +415,640 @@ def evaluate_query(expression: str, data: Any) -> Any:
             "Please enter a query. Try: _, _['key'], or _['items'][0]"
         )
 
-    try:
-        tree = ast.parse(expression, mode="eval")
-    except SyntaxError as e:
-        raise QueryEvaluationError(
-            f"Invalid Python syntax: {e.msg} at position {e.offset}. Check for missing quotes, brackets, or operators."
-        )
-
-    _validate_ast(tree)
+    # Unindexed queries share cache entries with other compile_query callers.
+    if indexed:
+        query = compile_query(expression, indexed=True)
+    else:
+        query = compile_query(expression)
+    if query.path is not None:
+        return resolve_path(data, query.path)
 
     restricted_globals = {
         "__builtins__": ALLOWED_BUILTINS,
         "_": data,
+        "__aggregate_column": aggregate_column,
     }
+    if indexed:
+        restricted_globals.update(_INDEX_HELPERS)
 
     try:
-        return eval(expression, restricted_globals, {"__builtins__": {}})
-    except SyntaxError as e:
-        raise QueryEvaluationError(
-            f"Invalid Python syntax: {e.msg} at position {e.offset}. Check for missing quotes, brackets, or operators."
+        result = eval(query.code, restricted_globals, {"__builtins__": {}})
+    except Exception as e:
+        raise _query_error(e)
+
+    if isinstance(result, Iterator):
+        return _translate_errors(result)
+    return result
+
+
+def resolve_path(data: Any, path: tuple[PathSegment, ...], start: int = 0) -> Any:
+    """Follow a subscript path from the document root.
+
+    Equivalent to evaluating _[path[0]][path[1]]..., without eval.
+
+    Args:
+        data: Document data, or the value at path[:start] to resume from
+        path: Keys, indices and slices to apply in order
+        start: Number of leading segments already applied to data
+
+    Returns:
+        Value at the end of the path
+
+    Raises:
+        QueryEvaluationError: Naming the segment that failed
+    """
+    value = data
+    try:
+        for segment in path[start:]:
+            value = value[segment]
+    except Exception as e:
+        # Walk the path again to find the failing segment, keeping the
+        # successful case free of bookkeeping.
+        depth = start
+        value = data
+        for depth in range(start, len(path)):
+            try:
+                value = value[path[depth]]
+            except Exception:
+                break
+        raise _path_error(e, value, path, depth)
+    return value
+
+
+def format_path(path: tuple[PathSegment, ...]) -> str:
+    """Format a subscript path as a query, e.g. _['items'][0][1:3]."""
+    parts = ["_"]
+    for segment in path:
+        if isinstance(segment, slice):
+            bounds = [segment.start, segment.stop]
+            if segment.step is not None:
+                bounds.append(segment.step)
+            text = ":".join("" if bound is None else str(bound) for bound in bounds)
+            parts.append(f"[{text}]")
+        else:
+            parts.append(f"[{segment!r}]")
+    return "".join(parts)
+
+
+def _path_error(
+    error: Exception, value: Any, path: tuple[PathSegment, ...], depth: int
+) -> QueryEvaluationError:
+    """Build a QueryEvaluationError naming the path segment that failed.
+
+    Args:
+        error: Exception raised by the subscript
+        value: Value the failing segment was applied to
+        path: Full subscript path of the query
+        depth: Position of the failing segment in path
+
+    Returns:
+        QueryEvaluationError with a message locating the failure
+    """
+    segment = path[depth]
+    where = format_path(path[:depth])
+    if isinstance(error, QueryEvaluationError):
+        return error
+    if isinstance(error, KeyError):
+        return QueryEvaluationError(
+            f"Key '{segment}' not found in {where}. Check the document structure "
+            "or use fuzzy matching to find available keys."
+        )
+    if isinstance(error, IndexError):
+        return QueryEvaluationError(
+            f"Index out of range: {where} has {len(value)} items, "
+            f"so [{segment}] does not exist."
+        )
+    if isinstance(error, TypeError) and "subscriptable" in str(error):
+        return QueryEvaluationError(
+            f"Cannot use brackets on {where} (type {type(value).__name__}). "
+            "Make sure you're accessing a dictionary or list, not a string or number."
+        )
+    if isinstance(error, TypeError):
+        return QueryEvaluationError(
+            f"Type mismatch at {format_path(path[: depth + 1])}: {error}"
         )
-    except NameError as e:
-        name = str(e).split("'")[1]
+    return QueryEvaluationError(
+        f"{_query_error(error)} (at {format_path(path[: depth + 1])})"
+    )
+
+
+def _translate_errors(results: Iterator[Any]) -> Iterator[Any]:
+    """Re-raise errors from a lazily evaluated result as QueryEvaluationError.
+
+    Generator expressions run while output consumes them, after
+    evaluate_query has returned, so their errors are translated here.
+    """
+    try:
+        yield from results
+    except Exception as e:
+        raise _query_error(e)
+
+
+def _query_error(error: Exception) -> QueryEvaluationError:
+    """Build a user-facing QueryEvaluationError for an evaluation error.
+
+    Args:
+        error: Exception raised while evaluating a query
+
+    Returns:
+        QueryEvaluationError with a helpful message
+    """
+    if isinstance(error, QueryEvaluationError):
+        return error
+    if isinstance(error, NameError):
+        name = str(error).split("'")[1]
         available = ", ".join(sorted(ALLOWED_BUILTINS.keys()))
-        raise QueryEvaluationError(
+        return QueryEvaluationError(
             f"'{name}' is not available. Use '_' to access the document. Available functions: {available}, ..."
         )
-    except TypeError as e:
-        error_msg = str(e)
+    if isinstance(error, TypeError):
+        error_msg = str(error)
         if "subscriptable" in error_msg:
-            raise QueryEvaluationError(
+            return QueryEvaluationError(
                 "Cannot use brackets on this type. Make sure you're accessing a dictionary or list, not a string or number."
             )
         elif "not iterable" in error_msg:
-            raise QueryEvaluationError(
+            return QueryEvaluationError(
                 "This value cannot be iterated over. Use it directly or check if it's a list or dict first."
             )
         else:
-            raise QueryEvaluationError(f"Type mismatch: {error_msg}")
-    except KeyError as e:
-        key = str(e).strip("'\"")
-        raise QueryEvaluationError(
+            return QueryEvaluationError(f"Type mismatch: {error_msg}")
+    if isinstance(error, KeyError):
+        key = str(error).strip("'\"")
+        return QueryEvaluationError(
             f"Key '{key}' not found. Check the document structure or use fuzzy matching to find available keys."
         )
-    except AttributeError as e:
-        raise QueryEvaluationError(
-            f"Invalid attribute access: {e}. Use bracket-style access: _['key']"
+    if isinstance(error, AttributeError):
+        return QueryEvaluationError(
+            f"Invalid attribute access: {error}. Use bracket-style access: _['key']"
         )
-    except ValueError as e:
-        raise QueryEvaluationError(f"Invalid value: {e}")
-    except IndexError:
-        raise QueryEvaluationError(
+    if isinstance(error, ValueError):
+        return QueryEvaluationError(f"Invalid value: {error}")
+    if isinstance(error, IndexError):
+        return QueryEvaluationError(
             "Index out of range. The list is shorter than the index you're trying to access."
         )
-    except Exception as e:
-        raise QueryEvaluationError(f"Query evaluation failed: {e}")
+    return QueryEvaluationError(f"Query evaluation failed: {error}")
+
+
+def extract_static_path(expression: str) -> tuple[str | int, ...]:
+    """Find the constant subscript path that every use of '_' starts with.
+
+    For "[c['name'] for c in _['spec']['containers']]" this is
+    ('spec', 'containers'). Loading only the subtree at this path is enough
+    to evaluate the expression. Negative indices, slices and computed
+    subscripts end the path.
+
+    Args:
+        expression: Python expression to analyse
+
+    Returns:
+        Common leading path, or an empty tuple if the whole document is needed
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        return ()
+
+    parents: dict[ast.AST, ast.AST] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.arg) and node.arg == "_":
+            return ()
+        for child in ast.iter_child_nodes(node):
+            parents[child] = node
+
+    common: list[str | int] | None = None
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Name) or node.id != "_":
+            continue
+        if not isinstance(node.ctx, ast.Load):
+            return ()
+
+        path: list[str | int] = []
+        current: ast.AST = node
+        while True:
+            parent = parents.get(current)
+            if not isinstance(parent, ast.Subscript) or parent.value is not current:
+                break
+            key = parent.slice
+            if not isinstance(key, ast.Constant) or type(key.value) not in (str, int):
+                break
+            if isinstance(key.value, int) and key.value < 0:
+                break
+            path.append(key.value)
+            current = parent
+
+        if common is None:
+            common = path
+        else:
+            length = 0
+            for a, b in zip(common, path):
+                if a != b or type(a) is not type(b):
+                    break
+                length += 1
+            common = common[:length]
+
+    return tuple(common or ())
+
+
+_COMPREHENSIONS = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+# Methods that change their object in place. A query calling one could
+# corrupt a memoized value, so such queries are never memoized.
+_MUTATING_METHODS = frozenset(
+    {
+        "add",
+        "append",
+        "appendleft",
+        "clear",
+        "difference_update",
+        "discard",
+        "extend",
+        "extendleft",
+        "insert",
+        "intersection_update",
+        "move_to_end",
+        "pop",
+        "popitem",
+        "popleft",
+        "remove",
+        "reverse",
+        "rotate",
+        "setdefault",
+        "sort",
+        "subtract",
+        "symmetric_difference_update",
+        "update",
+    }
+)
+
+# Builtins whose results change when read: a defaultdict inserts missing
+# keys on lookup. Queries using one are never memoized either.
+_MUTATING_BUILTINS = frozenset({"defaultdict"})
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _parse_query(expression: str) -> ast.Expression:
+    """Parse an expression that compile_query has already accepted.
+
+    The returned tree is shared between callers and must not be modified.
+    """
+    return ast.parse(expression, mode="eval")
+
+
+def _free_names(node: ast.AST) -> set[str]:
+    """Return the names a subtree reads from its enclosing scope."""
+    if isinstance(node, ast.Name):
+        return {node.id}
+    if isinstance(node, _COMPREHENSIONS):
+        free: set[str] = set()
+        bound: set[str] = set()
+        for generator in node.generators:
+            free |= _free_names(generator.iter) - bound
+            bound |= {
+                name.id
+                for name in ast.walk(generator.target)
+                if isinstance(name, ast.Name)
+            }
+            for condition in generator.ifs:
+                free |= _free_names(condition) - bound
+        elements = (
+            [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+        )
+        for element in elements:
+            free |= _free_names(element) - bound
+        return free
+    if isinstance(node, ast.Lambda):
+        args = node.args
+        params = {arg.arg for arg in (*args.posonlyargs, *args.args, *args.kwonlyargs)}
+        params.update(arg.arg for arg in (args.vararg, args.kwarg) if arg is not None)
+        free = _free_names(node.body) - params
+        for default in (*args.defaults, *args.kw_defaults):
+            if default is not None:
+                free |= _free_names(default)
+        return free
+
+    free = set()
+    for child in ast.iter_child_nodes(node):
+        free |= _free_names(child)
+    return free
+
+
+def _replace_eager(node: ast.expr, replace: Callable[[ast.expr], ast.expr]) -> ast.expr:
+    """Return a shallow copy of node with its eagerly evaluated operands replaced.
+
+    Only operands Python always evaluates before the node itself are
+    passed to replace: the first operand of and/or, the test of a
+    conditional, the first comparison, the outermost iterable of a
+    comprehension and every operand of other expressions. Operands that may
+    be skipped keep their original subtrees, so replacing never raises an
+    error the query would not have raised.
+    """
+    node = copy.copy(node)
+    if isinstance(node, ast.BoolOp):
+        node.values = [replace(node.values[0]), *node.values[1:]]
+    elif isinstance(node, ast.IfExp):
+        node.test = replace(node.test)
+    elif isinstance(node, ast.Compare):
+        node.left = replace(node.left)
+        node.comparators = [replace(node.comparators[0]), *node.comparators[1:]]
+    elif isinstance(node, _COMPREHENSIONS):
+        outermost = copy.copy(node.generators[0])
+        outermost.iter = replace(outermost.iter)
+        node.generators = [outermost, *node.generators[1:]]
+    elif not isinstance(node, ast.Lambda):
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, ast.expr):
+                setattr(node, field, replace(value))
+            elif isinstance(value, list):
+                setattr(node, field, [_replace_item(item, replace) for item in value])
+    return node
+
+
+def _replace_item(item: Any, replace: Callable[[ast.expr], ast.expr]) -> Any:
+    """Replace one element of a list field, e.g. a call argument or keyword."""
+    if isinstance(item, ast.expr):
+        return replace(item)
+    if isinstance(item, ast.keyword):
+        item = copy.copy(item)
+        item.value = replace(item.value)
+    # None stands for a ** entry in a dict's keys.
+    return item
+
+
+def _column_aggregates(tree: ast.Expression) -> None:
+    """Rewrite sum, min and max of one key of each record to run over a column.
+
+    sum(r['x'] for r in L), or the same over a list comprehension, becomes
+    __aggregate_column(sum, L, 'x'). For columnar records this aggregates
+    the stored column; anything else is evaluated as written. The tree is
+    modified in place.
+    """
+    for node in ast.walk(tree):
+        if (
+            not isinstance(node, ast.Call)
+            or not isinstance(node.func, ast.Name)
+            or node.func.id not in _COLUMN_AGGREGATES
+            or len(node.args) != 1
+            or node.keywords
+            or not isinstance(node.args[0], (ast.GeneratorExp, ast.ListComp))
+        ):
+            continue
+        values = node.args[0]
+        if len(values.generators) != 1:
+            continue
+        loop = values.generators[0]
+        element = values.elt
+        if (
+            loop.ifs
+            or loop.is_async
+            or not isinstance(loop.target, ast.Name)
+            or not isinstance(element, ast.Subscript)
+            or not isinstance(element.value, ast.Name)
+            or element.value.id != loop.target.id
+        ):
+            continue
+        key = _constant_segment(element.slice)
+        if type(key) in (str, int):
+            node.args = [node.func, loop.iter, ast.Constant(key)]
+            node.func = ast.Name("__aggregate_column", ast.Load())
+
+
+def _index_filters(tree: ast.Expression) -> None:
+    """Rewrite comprehension filters on a record key into index lookups.
+
+    A comprehension whose outermost loop is filtered first on r[key] == v
+    or r[key] in v, with a constant key and v not depending on r, e.g.
+    [r for r in L if r['id'] == v and ...], loops over
+    __select_equal(L, 'id', lambda: v) instead, keeping the remaining
+    conditions. The tree is modified in place.
+    """
+    for node in ast.walk(tree):
+        if isinstance(node, _COMPREHENSIONS):
+            _index_outermost_filter(node.generators[0])
+
+
+def _index_outermost_filter(generator: ast.comprehension) -> None:
+    """Move the first condition of a loop into its iterable if it is a key test."""
+    if not isinstance(generator.target, ast.Name) or not generator.ifs:
+        return
+    condition = generator.ifs[0]
+    remaining: list[ast.expr] = []
+    if isinstance(condition, ast.BoolOp) and isinstance(condition.op, ast.And):
+        condition, *rest = condition.values
+        remaining = [rest[0] if len(rest) == 1 else ast.BoolOp(ast.And(), rest)]
+
+    test = _key_test(condition, generator.target.id)
+    if test is None:
+        return
+    helper, key, operand = test
+    no_arguments = ast.arguments(
+        posonlyargs=[], args=[], kwonlyargs=[], kw_defaults=[], defaults=[]
+    )
+    generator.iter = ast.Call(
+        ast.Name(helper, ast.Load()),
+        [generator.iter, ast.Constant(key), ast.Lambda(no_arguments, operand)],
+        [],
+    )
+    generator.ifs = remaining + generator.ifs[1:]
+
+
+def _key_test(condition: ast.expr, name: str) -> tuple[str, str | int, ast.expr] | None:
+    """Match name[key] == operand, operand == name[key] or name[key] in operand.
+
+    Returns:
+        The index helper to call, the key and the operand, or None if the
+        condition is not such a test
+    """
+    if not isinstance(condition, ast.Compare) or len(condition.ops) != 1:
+        return None
+    left, right = condition.left, condition.comparators[0]
+    if isinstance(condition.ops[0], ast.Eq):
+        helper, candidates = "__select_equal", [(left, right), (right, left)]
+    elif isinstance(condition.ops[0], ast.In):
+        helper, candidates = "__select_member", [(left, right)]
+    else:
+        return None
+
+    for subscript, operand in candidates:
+        if (
+            isinstance(subscript, ast.Subscript)
+            and isinstance(subscript.value, ast.Name)
+            and subscript.value.id == name
+            and name not in _free_names(operand)
+        ):
+            key = _constant_segment(subscript.slice)
+            if type(key) in (str, int):
+                return helper, key, operand
+    return None
+
+
+class IncrementalEvaluator:
+    """Evaluate queries while reusing the results of their sub-expressions.
+
+    Every sub-expression that only depends on '_' and builtins is memoized,
+    keyed by its normalized AST, so whitespace does not matter. When a
+    query is edited, the parts left unchanged are not recomputed: typing
+    _['a']['b']['c'] resumes from the longest path already resolved, and
+    editing the filter of [r for r in sorted(_['items']) if ...] reuses the
+    sorted list. Results match evaluate_query.
+
+    The memo is bounded to max_entries results and about max_bytes of
+    memory, least recently used first out, and is cleared when a different
+    document is passed in. Parts of the document itself, reached by
+    subscript paths, take no memory of their own; a computed result larger
+    than max_bytes is not memoized at all. Queries
+    that call a method which mutates its object, e.g. append or sort, or
+    build a defaultdict, which inserts keys when read, are evaluated
+    without it. Iterators are never memoized.
+    """
+
+    def __init__(
+        self, max_entries: int = MEMO_CACHE_SIZE, max_bytes: int = MEMO_MAX_BYTES
+    ) -> None:
+        """Initialize with an empty memo.
+
+        Args:
+            max_entries: Maximum number of sub-expression results to keep
+            max_bytes: Approximate memory the kept results may hold
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: Any = None
+        # Key -> (value, approximate size of the value).
+        self._memo: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self._memo_bytes = 0
+
+    def evaluate(self, expression: str, data: Any) -> Any:
+        """Evaluate a query against a document, reusing memoized results.
+
+        Args:
+            expression: Python expression to evaluate
+            data: Document data available as '_' variable
+
+        Returns:
+            Result of the expression evaluation
+
+        Raises:
+            QueryEvaluationError: If expression is invalid or evaluation fails
+        """
+        if data is not self._data:
+            self.clear()
+            self._data = data
+
+        if not expression.strip():
+            return evaluate_query(expression, data)
+        query = compile_query(expression)
+        if query.path is not None:
+            return self._resolve_chain(query.path)
+
+        tree = _parse_query(expression)
+        names = _free_names(tree.body)
+        if (
+            names - ALLOWED_BUILTINS.keys() - {"_"}
+            or names & _MUTATING_BUILTINS
+            or any(
+                isinstance(node, ast.Attribute) and node.attr in _MUTATING_METHODS
+                for node in ast.walk(tree)
+            )
+        ):
+            return evaluate_query(expression, data)
+
+        result = self._value(tree.body)
+        if isinstance(result, Iterator):
+            return _translate_errors(result)
+        return result
+
+    def clear(self) -> None:
+        """Drop all memoized results."""
+        self._memo.clear()
+        self._memo_bytes = 0
+
+    def _value(self, node: ast.expr) -> Any:
+        """Return the value of a sub-expression that only depends on '_'."""
+        path = _subscript_chain(node)
+        if path is not None:
+            return self._resolve_chain(path)
+
+        key = ast.dump(node)
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key][0]
+
+        bindings: dict[str, Any] = {}
+
+        def replace(child: ast.expr) -> ast.expr:
+            if isinstance(child, (ast.Starred, ast.Slice)):
+                return _replace_eager(child, replace)
+            if isinstance(child, (ast.Constant, ast.Name, ast.Lambda)):
+                return child
+            # Dunder names cannot appear in a validated query.
+            name = f"__memo{len(bindings)}"
+            bindings[name] = self._value(child)
+            return ast.Name(name, ast.Load())
+
+        body = _replace_eager(node, replace)
+        code = compile(
+            ast.fix_missing_locations(ast.Expression(body)), "<query>", "eval"
+        )
+        restricted_globals = {"__builtins__": ALLOWED_BUILTINS, "_": self._data}
+        restricted_globals.update(bindings)
+        try:
+            value = eval(code, restricted_globals, {"__builtins__": {}})
+        except Exception as e:
+            raise _query_error(e)
+        self._remember(key, value, _approximate_size(value))
+        return value
+
+    def _resolve_chain(self, path: tuple[PathSegment, ...]) -> Any:
+        """Resolve a subscript path on '_' from its longest memoized prefix.
+
+        Paths are memoized under their query text, e.g. "_['items'][0]",
+        which cannot collide with the AST dumps used for other expressions.
+        """
+        key = format_path(path)
+        for depth in range(len(path), 0, -1):
+            prefix = key if depth == len(path) else format_path(path[:depth])
+            if prefix in self._memo:
+                self._memo.move_to_end(prefix)
+                value = resolve_path(self._memo[prefix][0], path, depth)
+                break
+        else:
+            value = resolve_path(self._data, path)
+        # Values on a path are part of the document, which is held anyway.
+        self._remember(key, value, 0)
+        return value
+
+    def _remember(self, key: str, value: Any, size: int) -> None:
+        """Memoize a value unless it is an iterator, evicting the oldest.
+
+        Args:
+            key: Memo key of the sub-expression
+            value: Its value
+            size: Approximate memory held by value alone
+        """
+        if isinstance(value, Iterator) or size > self.max_bytes:
+            return
+        previous = self._memo.pop(key, None)
+        if previous is not None:
+            self._memo_bytes -= previous[1]
+        self._memo[key] = (value, size)
+        self._memo_bytes += size
+        while len(self._memo) > self.max_entries or self._memo_bytes > self.max_bytes:
+            _, (_, evicted) = self._memo.popitem(last=False)
+            self._memo_bytes -= evicted
+
+
+def _approximate_size(value: Any) -> int:
+    """Estimate the memory held by a computed value.
+
+    Containers are charged for their elements too, extrapolated from the
+    first few; deeper levels are not visited. Elements shared with the
+    document are counted as well, so the estimate errs on the high side.
+    """
+    size = sys.getsizeof(value)
+    if type(value) in (list, tuple, set, frozenset, dict) and value:
+        elements = value.values() if type(value) is dict else value
+        sample = list(islice(elements, _SIZE_SAMPLE))
+        size += len(value) * sum(map(sys.getsizeof, sample)) // len(sample)
+    return size
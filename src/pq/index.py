@@ -0,0 +1,269 @@
+"""Hash indexes answering equality filters over lists of records."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from itertools import chain
+from operator import eq
+from typing import Any
+import os
+import threading
+
+from pq.types import LazyMapping
+
+__all__ = [
+    "INDEX_CACHE_SIZE",
+    "RecordIndex",
+    "clear_indexes",
+    "index_by",
+    "select_equal",
+    "select_member",
+]
+
+
+INDEX_CACHE_SIZE = 16
+
+# Containers whose `in` compares elements by equality, so membership can
+# be answered by looking up each element.
+_MEMBERSHIP_TYPES = (list, tuple, set, frozenset, dict)
+
+# Positions of the records having each value: an int for a single record,
+# a list of ints once the value repeats.
+_Positions = dict[Any, int | list[int]]
+
+
+class RecordIndex(LazyMapping):
+    """Read-only mapping from each value of a key to the records having it.
+
+    Records are listed in their original order. Output treats the index like
+    a dict, so index_by(...) on its own prints each value's records.
+    """
+
+    def __init__(self, records: Sequence[Any], positions: _Positions) -> None:
+        """Initialize over an already built position table.
+
+        Args:
+            records: Indexed records
+            positions: Positions of the records having each value
+        """
+        self._records = records
+        self._positions = positions
+
+    def __getitem__(self, value: Any) -> list[Any]:
+        found = self._positions[value]
+        if type(found) is int:
+            return [self._records[found]]
+        return [self._records[i] for i in found]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+
+# (id(records), type(key), key) -> (records, len(records), positions or None).
+# The records are kept referenced so their id cannot be reused while the
+# entry exists; None marks lists that cannot be indexed on the key.
+_cache: OrderedDict[tuple[int, type, Any], tuple[Any, int, _Positions | None]] = (
+    OrderedDict()
+)
+_cache_lock = threading.Lock()
+
+# Held across os.fork(), e.g. by a daemon thread starting a budgeted worker,
+# so the child never inherits the lock held by another thread.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_cache_lock.acquire,
+        after_in_parent=_cache_lock.release,
+        after_in_child=_cache_lock.release,
+    )
+
+
+def clear_indexes() -> None:
+    """Drop all cached indexes, e.g. after reloading a document."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _build_positions(records: Sequence[Any], key: Any) -> _Positions:
+    """Map each value of record[key] to the positions of its records.
+
+    Raises:
+        LookupError: If a record does not have key
+        TypeError: If a record is not subscriptable or a value is unhashable
+    """
+    positions: _Positions = {}
+    for i, record in enumerate(records):
+        value = record[key]
+        found = positions.setdefault(value, i)
+        if found is i:
+            continue
+        if type(found) is int:
+            positions[value] = [found, i]
+        else:
+            found.append(i)
+    return positions
+
+
+def _cached_positions(records: Any, key: Any) -> _Positions | None:
+    """Return the cached position table of records on key, building it if needed.
+
+    Returns:
+        The position table, or None if records is not a sequence, or some
+        record is not subscriptable or holds an unhashable value under key
+
+    Raises:
+        LookupError: If a record does not have key, as a scan would
+    """
+    if not isinstance(records, Sequence) or isinstance(records, (str, bytes)):
+        return None
+    try:
+        cache_key = (id(records), type(key), key)
+        with _cache_lock:
+            entry = _cache.get(cache_key)
+            if entry is not None:
+                _cache.move_to_end(cache_key)
+    except TypeError:
+        # Unhashable key, e.g. a list.
+        return None
+
+    # In-place changes that keep the length are not detected: documents
+    # are not expected to be modified by queries.
+    if entry is not None and entry[0] is records and entry[1] == len(records):
+        return entry[2]
+
+    try:
+        positions: _Positions | None = _build_positions(records, key)
+    except TypeError:
+        # An unhashable value, or a record that is not subscriptable. A scan
+        # can still compare such records, or raises where the query would.
+        positions = None
+    with _cache_lock:
+        _cache[cache_key] = (records, len(records), positions)
+        _cache.move_to_end(cache_key)
+        if len(_cache) > INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return positions
+
+
+def index_by(records: Sequence[Any], key: Any) -> RecordIndex:
+    """Index a list of records by the value they hold under key.
+
+    The index is built on first use and cached per list and key, so later
+    lookups such as index_by(_['items'], 'id')['abc'] take constant time.
+
+    Args:
+        records: List of records, e.g. dicts
+        key: Key or index every record is looked up with
+
+    Returns:
+        Mapping from each value to the list of records having it
+
+    Raises:
+        KeyError: If a record does not have key
+        TypeError: If records is not a sequence, or a value is unhashable
+    """
+    positions = _cached_positions(records, key)
+    if positions is None:
+        if not isinstance(records, Sequence) or isinstance(records, (str, bytes)):
+            raise TypeError(
+                f"index_by() needs a list of records, not {type(records).__name__}"
+            )
+        # Rebuild to raise the error that made the list unindexable.
+        positions = _build_positions(records, key)
+    return RecordIndex(records, positions)
+
+
+def select_equal(records: Any, key: Any, value: Callable[[], Any]) -> Iterable[Any]:
+    """Return the records r of records for which r[key] == value().
+
+    Stands in for the iterable of a comprehension filtered on
+    r[key] == ...; records are produced in their original order. When the
+    records cannot be indexed, they are scanned like the comprehension
+    would, raising the same errors.
+
+    Args:
+        records: Iterable the comprehension loops over
+        key: Constant key of the filter
+        value: Returns the value compared against; called at most once
+
+    Returns:
+        Matching records
+    """
+    positions = _cached_positions(records, key)
+    if positions is None or not records:
+        return _scan(records, key, eq, value)
+    target = value()
+    try:
+        found = positions.get(target)
+    except TypeError:
+        # Unhashable value, which may still compare equal to some records.
+        return _scan(records, key, eq, lambda: target)
+    if found is None:
+        return []
+    if type(found) is int:
+        return [records[found]]
+    return [records[i] for i in found]
+
+
+def select_member(records: Any, key: Any, values: Callable[[], Any]) -> Iterable[Any]:
+    """Return the records r of records for which r[key] in values().
+
+    Like select_equal, for a filter on r[key] in ... . Only lists, tuples,
+    sets and dicts are looked up element by element; other containers,
+    e.g. strings, are scanned.
+
+    Args:
+        records: Iterable the comprehension loops over
+        key: Constant key of the filter
+        values: Returns the container tested for membership; called at
+            most once
+
+    Returns:
+        Matching records
+    """
+    positions = _cached_positions(records, key)
+    if positions is None or not records:
+        return _scan(records, key, _is_member, values)
+    target = values()
+    try:
+        elements = set(target) if isinstance(target, _MEMBERSHIP_TYPES) else None
+    except TypeError:
+        # An unhashable element, which may still compare equal to some records.
+        elements = None
+    if elements is None:
+        return _scan(records, key, _is_member, lambda: target)
+
+    found = (positions.get(element) for element in elements)
+    matches = sorted(
+        chain.from_iterable(
+            (position,) if type(position) is int else position
+            for position in found
+            if position is not None
+        )
+    )
+    return [records[i] for i in matches]
+
+
+def _is_member(found: Any, target: Any) -> bool:
+    return found in target
+
+
+def _scan(
+    records: Any,
+    key: Any,
+    test: Callable[[Any, Any], Any],
+    operand: Callable[[], Any],
+) -> Iterator[Any]:
+    """Filter records linearly, evaluating the operand on the first record."""
+    target: Any = None
+    evaluated = False
+    for record in records:
+        found = record[key]
+        if not evaluated:
+            target = operand()
+            evaluated = True
+        if test(found, target):
+            yield record
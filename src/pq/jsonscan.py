@@ -0,0 +1,171 @@
+"""Byte-level JSON scanning helpers for skipping values without parsing them."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any
+import json
+import re
+
+__all__ = ["read_key", "skip_value", "skip_ws"]
+
+
+_WS = rb"[ \t\n\r]*+"
+# A string the json module accepts: no raw control characters, only valid
+# escapes, and well-formed UTF-8 (non-ASCII bytes only occur in strings).
+_STRING = (
+    rb'"(?:[\x20\x21\x23-\x5b\x5d-\x7f]++'
+    rb"|[\xc2-\xdf][\x80-\xbf]"
+    rb"|\xe0[\xa0-\xbf][\x80-\xbf]|[\xe1-\xec\xee\xef][\x80-\xbf]{2}"
+    rb"|\xed[\x80-\x9f][\x80-\xbf]"
+    rb"|\xf0[\x90-\xbf][\x80-\xbf]{2}|[\xf1-\xf3][\x80-\xbf]{3}"
+    rb"|\xf4[\x80-\x8f][\x80-\xbf]{2}"
+    rb'|\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4}))*+"'
+)
+_NUMBER = rb"-?(?:0|[1-9][0-9]*+)(?:\.[0-9]++)?(?:[eE][+-]?[0-9]++)?"
+_SCALAR = rb"(?:" + _STRING + rb"|" + _NUMBER + rb"|true|false|null|NaN|-?Infinity)"
+
+
+def _nested(value: bytes) -> bytes:
+    """Pattern of a scalar, or of a container whose values match value."""
+    member = _STRING + _WS + rb":" + _WS + value
+    array = rb"\[" + _WS + rb"(?:(?:" + value + _WS + rb"," + _WS + rb")*+"
+    array += value + _WS + rb")?\]"
+    obj = rb"\{" + _WS + rb"(?:(?:" + member + _WS + rb"," + _WS + rb")*+"
+    obj += member + _WS + rb")?\}"
+    return rb"(?:" + _SCALAR + rb"|" + array + rb"|" + obj + rb")"
+
+
+# Values nested at most two containers deep, such as typical records, are
+# matched in one go; Python only steps through deeper container boundaries.
+_SHALLOW = _nested(_nested(_SCALAR))
+
+_WS_RE = re.compile(_WS)
+_STRING_RE = re.compile(_STRING)
+_SCALAR_RE = re.compile(_SCALAR)
+_MEMBER_KEY_RE = re.compile(_STRING + _WS + rb":" + _WS)
+
+
+@lru_cache(maxsize=None)
+def _run_patterns() -> tuple[re.Pattern[bytes], re.Pattern[bytes]]:
+    """Compile the patterns of leading shallow array and object members.
+
+    Each member is matched with its trailing comma. Compiling takes tens of
+    milliseconds, so it is deferred until a value is first skipped.
+    """
+    array_run = rb"(?:" + _WS + _SHALLOW + _WS + rb",)*+" + _WS
+    object_run = rb"(?:" + _WS + _STRING + _WS + rb":" + _WS + _SHALLOW
+    object_run += _WS + rb",)*+" + _WS
+    return re.compile(array_run), re.compile(object_run)
+
+
+def skip_ws(buf: Any, pos: int) -> int:
+    """Return the position of the next non-whitespace byte.
+
+    Args:
+        buf: Bytes-like JSON buffer, e.g. bytes or an mmap
+        pos: Position to start from
+
+    Returns:
+        Position of the next non-whitespace byte, or len(buf)
+    """
+    return _WS_RE.match(buf, pos).end()
+
+
+def skip_value(buf: Any, pos: int) -> int:
+    """Return the position just past the JSON value starting at pos.
+
+    The value is validated as the json module would parse it, without
+    building any objects. Runs of shallow members are matched by regular
+    expressions, so Python only steps through deeply nested containers.
+
+    Args:
+        buf: Bytes-like JSON buffer
+        pos: Position of the first byte of the value
+
+    Returns:
+        Position just past the value
+
+    Raises:
+        ValueError: If the value is not valid JSON
+    """
+    closers: list[bytes] = []
+    while True:
+        # pos is at the start of a value.
+        char = buf[pos : pos + 1]
+        if char == b"{" or char == b"[":
+            closer = b"}" if char == b"{" else b"]"
+            pos = skip_ws(buf, pos + 1)
+            if buf[pos : pos + 1] != closer:
+                closers.append(closer)
+                pos = _skip_to_member_value(buf, pos, closer)
+                continue
+            pos += 1
+        else:
+            match = _SCALAR_RE.match(buf, pos)
+            if match is None:
+                raise ValueError(f"Expecting value at byte {pos}")
+            pos = match.end()
+
+        # pos is just past a value: close the containers it ends.
+        while closers:
+            pos = skip_ws(buf, pos)
+            char = buf[pos : pos + 1]
+            if char == b",":
+                pos = _skip_to_member_value(buf, pos + 1, closers[-1])
+                break
+            if char != closers[-1]:
+                raise ValueError(f"Expecting ',' delimiter at byte {pos}")
+            closers.pop()
+            pos += 1
+        else:
+            return pos
+
+
+def _skip_to_member_value(buf: Any, pos: int, closer: bytes) -> int:
+    """Skip the shallow members at pos and the key of the next object member.
+
+    Args:
+        buf: Bytes-like JSON buffer
+        pos: Position of the first member, or of whitespace before it
+        closer: Closing bracket of the enclosing container
+
+    Returns:
+        Position of the next member's value
+
+    Raises:
+        ValueError: If an object member does not start with a key and colon
+    """
+    array_run, object_run = _run_patterns()
+    if closer == b"]":
+        return array_run.match(buf, pos).end()
+    pos = object_run.match(buf, pos).end()
+    match = _MEMBER_KEY_RE.match(buf, pos)
+    if match is None:
+        raise ValueError(f"Expecting property name at byte {pos}")
+    return match.end()
+
+
+def read_key(buf: Any, pos: int) -> tuple[str, int]:
+    """Read an object key and the colon after it.
+
+    Args:
+        buf: Bytes-like JSON buffer
+        pos: Position of the opening quote of the key
+
+    Returns:
+        Tuple of (decoded key, position of the member's value)
+
+    Raises:
+        ValueError: If there is no well-formed key and colon at pos
+    """
+    match = _STRING_RE.match(buf, pos)
+    if match is None:
+        raise ValueError(f"Expecting property name at byte {pos}")
+    raw_key = match.group()
+    key = json.loads(raw_key) if b"\\" in raw_key else raw_key[1:-1].decode()
+
+    pos = skip_ws(buf, match.end())
+    if buf[pos : pos + 1] != b":":
+        raise ValueError(f"Expecting ':' delimiter at byte {pos}")
+    return key, skip_ws(buf, pos + 1)
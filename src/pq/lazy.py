@@ -0,0 +1,335 @@
+"""Lazy JSON documents backed by a structural offset index."""
+
+from __future__ import annotations
+
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+import json
+import mmap
+import os
+import threading
+import weakref
+
+from pq.jsonscan import read_key, skip_value, skip_ws
+from pq.loader import DocumentLoadError
+from pq.types import FileTypes, LazyMapping, LazySequence
+
+__all__ = ["LazyDocument", "LazyJSONArray", "LazyJSONObject"]
+
+
+MATERIALIZE_MAX_BYTES = 64 * 1024
+
+NODE_CACHE_SIZE = 4096
+
+# Open documents, whose locks are held across os.fork().
+_open_documents: weakref.WeakSet[LazyDocument] = weakref.WeakSet()
+
+
+class LazyDocument:
+    """A memory-mapped JSON document parsed only where it is touched.
+
+    Opening a document does no parsing at all. Each object or array
+    records the byte offsets of its children as they are discovered, so
+    reaching an index only scans the siblings before it, and whole
+    subtrees are skipped without building Python objects. Containers whose
+    size is known and small are parsed in one go with json.loads. Recently
+    used nodes are kept in an LRU so their offset indexes are reused.
+
+    Parts of the document that are never touched are not validated. As
+    with json.loads, a repeated key resolves to its last occurrence, so
+    looking up a key locates every member of its object, skipping their
+    values. Array items are located up to the one reached.
+    Proxies may be shared between threads, and the document lock is held
+    across os.fork(), so a forked query worker never inherits a proxy that
+    is half-way through an update.
+    """
+
+    def __init__(self, file_path: Path) -> None:
+        """Map a JSON file into memory.
+
+        Args:
+            file_path: Path of the JSON document
+
+        Raises:
+            DocumentLoadError: If the file is missing, not JSON or empty
+        """
+        if not file_path.exists():
+            raise DocumentLoadError(f"File not found: {file_path}")
+        if file_path.suffix.lstrip(".") != FileTypes.json:
+            raise DocumentLoadError(
+                f"Lazy mode supports JSON files only, not {file_path.suffix}"
+            )
+
+        self.source = str(file_path)
+        with file_path.open("rb") as f:
+            try:
+                self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise DocumentLoadError(
+                    f"Invalid JSON in {file_path}: Expecting value at line 1, column 1"
+                )
+        self._nodes: OrderedDict[int, Any] = OrderedDict()
+        self.lock = threading.RLock()
+        _open_documents.add(self)
+
+    def root(self) -> Any:
+        """Get the document root.
+
+        Returns:
+            LazyJSONObject or LazyJSONArray proxy, or the value of a scalar
+            document
+        """
+        return self.value(skip_ws(self.buf, 0))
+
+    def value(self, start: int, end: int | None = None) -> Any:
+        """Get the value starting at an offset.
+
+        Args:
+            start: Offset of the value's first byte
+            end: Offset just past the value, if already known
+
+        Returns:
+            A proxy for large or not yet measured containers, otherwise the
+            parsed value
+        """
+        with self.lock:
+            node = self._nodes.get(start)
+            if node is not None:
+                self._nodes.move_to_end(start)
+                return node
+
+        char = self.buf[start : start + 1]
+        if char in (b"{", b"[") and (
+            end is None or end - start > MATERIALIZE_MAX_BYTES
+        ):
+            node = (
+                LazyJSONObject(self, start)
+                if char == b"{"
+                else LazyJSONArray(self, start)
+            )
+        else:
+            node = self.parse(start, end)
+            if char not in (b"{", b"["):
+                return node
+
+        with self.lock:
+            node = self._nodes.setdefault(start, node)
+            self._nodes.move_to_end(start)
+            if len(self._nodes) > NODE_CACHE_SIZE:
+                self._nodes.popitem(last=False)
+        return node
+
+    def parse(self, start: int, end: int | None = None) -> Any:
+        """Fully parse the value starting at an offset.
+
+        Raises:
+            DocumentLoadError: If the value is not valid JSON
+        """
+        try:
+            if end is None:
+                end = skip_value(self.buf, start)
+            return json.loads(self.buf[start:end])
+        except ValueError as e:
+            raise DocumentLoadError(f"Invalid JSON in {self.source}: {e}")
+
+
+# Documents locked by the thread calling os.fork(), until it returns.
+_forking: list[LazyDocument] = []
+
+
+def _lock_documents() -> None:
+    _forking[:] = list(_open_documents)
+    for document in _forking:
+        document.lock.acquire()
+
+
+def _unlock_documents() -> None:
+    for document in _forking:
+        document.lock.release()
+    _forking.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_lock_documents,
+        after_in_parent=_unlock_documents,
+        after_in_child=_unlock_documents,
+    )
+
+
+class _LazyJSONContainer:
+    """Offset index over the children of one JSON object or array."""
+
+    _closing = b""
+
+    def __init__(self, doc: LazyDocument, start: int) -> None:
+        self._doc = doc
+        self._start = start
+        self._starts = array("q")
+        self._ends = array("q")
+        self._end = -1
+
+    @property
+    def _complete(self) -> bool:
+        return self._end >= 0
+
+    def _read_key(self, pos: int) -> int:
+        """Read a member key at pos; return the value position."""
+        return pos
+
+    def _discover(self) -> bool:
+        """Find the next child, returning False once all are known."""
+        with self._doc.lock:
+            return self._discover_locked()
+
+    def _discover_locked(self) -> bool:
+        if self._complete:
+            return False
+
+        buf = self._doc.buf
+        count = len(self._starts)
+        try:
+            if count == 0:
+                pos = skip_ws(buf, self._start + 1)
+            else:
+                pos = skip_ws(buf, self._measure(count - 1))
+            char = buf[pos : pos + 1]
+            if char == self._closing:
+                self._end = pos + 1
+                return False
+            if count:
+                if char != b",":
+                    raise ValueError(f"Expecting ',' delimiter at byte {pos}")
+                pos = skip_ws(buf, pos + 1)
+            pos = self._read_key(pos)
+        except ValueError as e:
+            raise DocumentLoadError(f"Invalid JSON in {self._doc.source}: {e}")
+
+        self._starts.append(pos)
+        self._ends.append(-1)
+        return True
+
+    def _measure(self, index: int) -> int:
+        """Get the end offset of a child, scanning it if necessary."""
+        end = self._ends[index]
+        if end < 0:
+            end = skip_value(self._doc.buf, self._starts[index])
+            with self._doc.lock:
+                self._ends[index] = end
+        return end
+
+    def _discover_all(self) -> None:
+        while self._discover():
+            pass
+
+    def _child(self, index: int) -> Any:
+        end = self._ends[index]
+        return self._doc.value(self._starts[index], end if end >= 0 else None)
+
+    def _is_container(self, index: int) -> bool:
+        start = self._starts[index]
+        return self._doc.buf[start : start + 1] in (b"{", b"[")
+
+    def _iter_indices(self) -> Iterator[int]:
+        """Yield child indices, measuring each child before yielding it."""
+        index = 0
+        while index < len(self._starts) or self._discover():
+            self._measure(index)
+            yield index
+            index += 1
+
+    def materialize(self) -> Any:
+        """Parse the whole container in one go with json.loads."""
+        if not self._complete and self._starts:
+            self._discover_all()
+        return self._doc.parse(self._start, self._end if self._complete else None)
+
+    def __len__(self) -> int:
+        self._discover_all()
+        return len(self._starts)
+
+
+class LazyJSONObject(_LazyJSONContainer, LazyMapping):
+    """JSON object whose members are located and parsed on access."""
+
+    _closing = b"}"
+
+    def __init__(self, doc: LazyDocument, start: int) -> None:
+        super().__init__(doc, start)
+        self._keys: list[str] = []
+        self._key_index: dict[str, int] = {}
+
+    def _read_key(self, pos: int) -> int:
+        key, pos = read_key(self._doc.buf, pos)
+        self._key_index[key] = len(self._keys)
+        self._keys.append(key)
+        return pos
+
+    def __getitem__(self, key: Any) -> Any:
+        if not isinstance(key, str):
+            raise KeyError(key)
+        # A later repeat of the key takes precedence, as with json.loads.
+        self._discover_all()
+        index = self._key_index.get(key)
+        if index is None:
+            raise KeyError(key)
+        return self._child(index)
+
+    def __iter__(self) -> Iterator[str]:
+        seen: set[str] = set()
+        for index in self._iter_indices():
+            key = self._keys[index]
+            if key not in seen:
+                seen.add(key)
+                yield key
+
+    def __len__(self) -> int:
+        self._discover_all()
+        return len(self._key_index)
+
+    def items(self) -> Iterator[tuple[str, Any]]:  # type: ignore[override]
+        for key in self:
+            yield key, self[key]
+
+    def iter_structure(self) -> Iterator[tuple[str, Any]]:
+        for key in self:
+            index = self._key_index[key]
+            yield key, self._child(index) if self._is_container(index) else None
+
+    def __repr__(self) -> str:
+        return f"<LazyJSONObject at byte {self._start}>"
+
+
+class LazyJSONArray(_LazyJSONContainer, LazySequence):
+    """JSON array whose items are located and parsed on access."""
+
+    _closing = b"]"
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if not isinstance(index, int):
+            raise TypeError(
+                f"list indices must be integers or slices, not {type(index).__name__}"
+            )
+        if index < 0:
+            index += len(self)
+        while index >= len(self._starts) and self._discover():
+            pass
+        if not 0 <= index < len(self._starts):
+            raise IndexError("list index out of range")
+        return self._child(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in self._iter_indices():
+            yield self._child(index)
+
+    def iter_structure(self) -> Iterator[tuple[int, Any]]:
+        for index in self._iter_indices():
+            yield index, self._child(index) if self._is_container(index) else None
+
+    def __repr__(self) -> str:
+        return f"<LazyJSONArray at byte {self._start}>"
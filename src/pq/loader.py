@@ -2,38 +2,293 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, NamedTuple, cast
 from xml.parsers import expat
 import json
+import mmap
+import os
 import tomllib
 
-import xmltodict
-import yaml
-
 from pq.types import FileTypes
 
 __all__ = [
     "DocumentLoadError",
     "MAX_FILE_SIZE",
+    "ParserBackend",
+    "ParserFunc",
+    "ProgressFunc",
+    "StreamParserFunc",
+    "available_parsers",
+    "get_parser",
     "load_document",
     "content_from_file",
+    "iter_records",
     "load_content",
+    "load_stream",
+    "parser_identity",
+    "records_from_file",
+    "register_parser",
 ]
 
 
 MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024
 
+ParserFunc = Callable[[str], Any]
+StreamParserFunc = Callable[[BinaryIO], Any]
+ProgressFunc = Callable[[int, int | None], None]
+
+_PROGRESS_CHUNK_SIZE = 1024 * 1024
+
+
+class ParserBackend(NamedTuple):
+    """Parser backend for one file type."""
+
+    loads: ParserFunc
+    load: StreamParserFunc
+
+
+_PARSERS: dict[FileTypes, dict[str, ParserBackend]] = {
+    FileTypes.json: {},
+    FileTypes.yaml: {},
+    FileTypes.xml: {},
+    FileTypes.toml: {},
+}
+
+# Built-in backends are registered, importing their parser libraries, the
+# first time their file type is used, so startup never pays for formats a
+# run does not read.
+_BUILTIN_PARSERS: dict[FileTypes, Callable[[], None]] = {}
+
 
 class DocumentLoadError(Exception):
     """Raised when document loading fails."""
 
 
-def load_document(file_path: Path) -> Any:
+def register_parser(
+    file_type: FileTypes,
+    name: str,
+    parser: ParserFunc,
+    stream_parser: StreamParserFunc | None = None,
+) -> None:
+    """Register a parser backend for a file type.
+
+    Backends are tried in registration order, so faster backends should be
+    registered first. A backend must raise the same exception types as the
+    default parser for its format so errors are reported consistently.
+
+    Args:
+        file_type: File type the backend parses
+        name: Backend name, used with --parser
+        parser: Function that parses document text
+        stream_parser: Function that parses directly from a binary file. If
+            omitted, the file is read and decoded as UTF-8 for parser.
+    """
+    if stream_parser is None:
+
+        def stream_parser(stream: BinaryIO) -> Any:
+            return parser(stream.read().decode("utf-8"))
+
+    _parsers(file_type)[name] = ParserBackend(parser, stream_parser)
+
+
+def _parsers(file_type: FileTypes) -> dict[str, ParserBackend]:
+    """Get the backends for a file type, registering the built-in ones first.
+
+    Args:
+        file_type: File type to get backends for
+
+    Returns:
+        Backends by name, in registration order
+    """
+    register_builtins = _BUILTIN_PARSERS.pop(file_type, None)
+    if register_builtins is not None:
+        register_builtins()
+    return _PARSERS[file_type]
+
+
+def available_parsers(file_type: FileTypes) -> list[str]:
+    """Get the names of parser backends available for a file type.
+
+    Args:
+        file_type: File type to list backends for
+
+    Returns:
+        Backend names, fastest first
+    """
+    if file_type == FileTypes.jsonl:
+        file_type = FileTypes.json
+    return list(_parsers(file_type))
+
+
+def get_parser(file_type: FileTypes, name: str | None = None) -> ParserBackend:
+    """Select a parser backend for a file type.
+
+    Args:
+        file_type: File type to parse
+        name: Backend name, or None to pick the fastest available
+
+    Returns:
+        Parser backend
+
+    Raises:
+        DocumentLoadError: If the named backend is not available
+    """
+    if file_type == FileTypes.jsonl:
+        file_type = FileTypes.json
+    parsers = _parsers(file_type)
+    if name is None:
+        return next(iter(parsers.values()))
+    if name not in parsers:
+        available = ", ".join(parsers)
+        raise DocumentLoadError(
+            f"Parser '{name}' is not available for {file_type}. "
+            f"Available parsers: {available}"
+        )
+    return parsers[name]
+
+
+# Distributions whose version determines the output of a built-in backend;
+# other backends are looked up as a distribution of their own name.
+_BACKEND_DISTRIBUTIONS = {
+    "libyaml": "pyyaml",
+    "pyyaml": "pyyaml",
+}
+
+# Backends from the standard library, which change with the Python version.
+_STDLIB_BACKENDS = frozenset({"json", "tomllib"})
+
+
+def parser_identity(file_type: FileTypes, name: str | None = None) -> str:
+    """Identify the backend get_parser selects, together with its version.
+
+    Backends can parse the same input differently, e.g. orjson may turn
+    integers wider than 64 bits into floats, so anything keyed on parsed
+    results must include this.
+
+    Args:
+        file_type: File type to parse
+        name: Backend name, or None for the fastest available
+
+    Returns:
+        Backend name and version, e.g. "orjson-3.9.10"
+
+    Raises:
+        DocumentLoadError: If the named backend is not available
+    """
+    import importlib.metadata
+    import platform
+
+    if name is None:
+        name = available_parsers(file_type)[0]
+    else:
+        get_parser(file_type, name)
+
+    if name in _STDLIB_BACKENDS:
+        return f"{name}-python{platform.python_version()}"
+    try:
+        version = importlib.metadata.version(_BACKEND_DISTRIBUTIONS.get(name, name))
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    return f"{name}-{version}"
+
+
+def _orjson_loads(content: str | bytes | memoryview) -> Any:
+    """Parse JSON with orjson, falling back to json for what orjson rejects.
+
+    orjson refuses NaN/Infinity, which the stdlib accepts, so rejected input
+    is re-parsed with json.loads to keep results and error messages
+    identical. Some orjson releases turn integers wider than 64 bits into
+    floats, which is why this backend is opt-in rather than the default.
+    """
+    import orjson
+
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        if isinstance(content, memoryview):
+            content = content.tobytes()
+        return json.loads(content)
+
+
+def _orjson_load(stream: BinaryIO) -> Any:
+    """Parse JSON with orjson straight from a memory-mapped file.
+
+    orjson reads the mapped pages in place, so neither a bytes copy nor a
+    decoded str of the whole file is ever built. Streams that cannot be
+    mapped, such as pipes and empty files, are read instead.
+    """
+    try:
+        mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return _orjson_loads(stream.read())
+    with mapped, memoryview(mapped) as view:
+        return _orjson_loads(view)
+
+
+def _yaml_c_safe_load(content: str | BinaryIO) -> Any:
+    """Parse YAML with the libyaml-backed safe loader."""
+    import yaml
+
+    return yaml.load(content, Loader=yaml.CSafeLoader)
+
+
+def _register_json_parsers() -> None:
+    """Register the JSON backends, orjson only if it is installed."""
+    register_parser(FileTypes.json, "json", json.loads, json.load)
+    try:
+        import orjson  # noqa: F401
+    except ImportError:  # pragma: no cover - optional dependency
+        return
+    register_parser(FileTypes.json, "orjson", _orjson_loads, _orjson_load)
+
+
+def _register_yaml_parsers() -> None:
+    """Register the YAML backends, libyaml only if PyYAML was built with it."""
+    import yaml
+
+    if getattr(yaml, "__with_libyaml__", False):
+        register_parser(FileTypes.yaml, "libyaml", _yaml_c_safe_load, _yaml_c_safe_load)
+    register_parser(FileTypes.yaml, "pyyaml", yaml.safe_load, yaml.safe_load)
+
+
+def _register_xml_parsers() -> None:
+    """Register the XML backend."""
+    import xmltodict
+
+    register_parser(FileTypes.xml, "xmltodict", xmltodict.parse, xmltodict.parse)
+
+
+def _register_toml_parsers() -> None:
+    """Register the TOML backend."""
+    register_parser(FileTypes.toml, "tomllib", tomllib.loads, tomllib.load)
+
+
+_BUILTIN_PARSERS.update(
+    {
+        FileTypes.json: _register_json_parsers,
+        FileTypes.yaml: _register_yaml_parsers,
+        FileTypes.xml: _register_xml_parsers,
+        FileTypes.toml: _register_toml_parsers,
+    }
+)
+
+
+def load_document(
+    file_path: Path, parser: str | None = None, progress: ProgressFunc | None = None
+) -> Any:
     """Load document from file path.
 
+    The file is handed to the parser as a binary stream rather than a
+    decoded string, so backends that can parse incrementally or from a
+    memory map never hold a full copy of the text.
+
     Args:
         file_path: Path to the file to load
+        parser: Parser backend name, or None to pick the fastest available
+        progress: Function called with (bytes read, file size) as the file
+            is read. Backends that memory-map the file do not report.
 
     Returns:
         Parsed document
@@ -41,46 +296,226 @@ def load_document(file_path: Path) -> Any:
     Raises:
         DocumentLoadError: If file loading fails
     """
-    content, file_type = content_from_file(file_path)
-    return load_content(content, file_type, str(file_path))
+    file_type = _file_type_from_path(file_path)
+    with file_path.open("rb") as f:
+        stream: BinaryIO = f
+        if progress is not None:
+            stream = cast(BinaryIO, _ProgressReader(f, progress))
+        return load_stream(stream, file_type, str(file_path), parser)
 
 
-def content_from_file(file_path: Path) -> tuple[str, FileTypes]:
-    """Load document from file path."""
+class _ProgressReader:
+    """Binary file wrapper that reports how much of the file has been read.
+
+    Reading everything at once is done a chunk at a time, so progress is
+    reported while a backend that reads the whole file up front waits.
+    """
+
+    def __init__(self, stream: BinaryIO, progress: ProgressFunc) -> None:
+        self._stream = stream
+        self._progress = progress
+        self._read = 0
+        try:
+            self._size: int | None = os.fstat(stream.fileno()).st_size
+        except (OSError, ValueError):
+            self._size = None
+
+    def _report(self, data: bytes) -> bytes:
+        self._read += len(data)
+        self._progress(self._read, self._size)
+        return data
+
+    def read(self, size: int | None = -1) -> bytes | bytearray:
+        if size is not None and size >= 0:
+            return self._report(self._stream.read(size))
+        # Every backend accepts a bytearray, and returning it avoids
+        # copying the whole file a second time.
+        buffer = bytearray()
+        while chunk := self._stream.read(_PROGRESS_CHUNK_SIZE):
+            buffer += self._report(chunk)
+        return buffer
+
+    def readline(self, size: int | None = -1) -> bytes:
+        return self._report(self._stream.readline(size))
+
+    def __iter__(self) -> Iterator[bytes]:
+        for line in self._stream:
+            yield self._report(line)
+
+    def fileno(self) -> int:
+        return self._stream.fileno()
+
+
+def _file_type_from_path(file_path: Path) -> FileTypes:
+    """Check a file can be loaded and detect its type from the suffix.
+
+    Args:
+        file_path: Path to the file to check
+
+    Returns:
+        File type matching the suffix
+
+    Raises:
+        DocumentLoadError: If the file does not exist or is too large
+    """
     if not file_path.exists():
         raise DocumentLoadError(f"File not found: {file_path}")
 
     file_size = file_path.stat().st_size
     if file_size > MAX_FILE_SIZE:
+        size_gb = file_size / (1024 * 1024 * 1024)
+        max_gb = MAX_FILE_SIZE / (1024 * 1024 * 1024)
         raise DocumentLoadError(
-            f"File too large ({file_size / (1024 * 1024 * 1024):.2f}GB). Maximum size is {MAX_FILE_SIZE / (1024 * 1024 * 1024):.0f}GB"
+            f"File too large ({size_gb:.2f}GB). Maximum size is {max_gb:.0f}GB, "
+            "use --out-of-core for larger JSON files"
         )
 
-    ft = FileTypes(file_path.suffix.lstrip("."))
+    return FileTypes(file_path.suffix.lstrip("."))
+
+
+def content_from_file(file_path: Path) -> tuple[str, FileTypes]:
+    """Load document from file path."""
+    ft = _file_type_from_path(file_path)
     return file_path.read_text(encoding="utf-8"), ft
 
 
-def load_content(content: str, file_type: FileTypes, src: str) -> Any:
-    """Load content using parser based on file type."""
+def records_from_file(file_path: Path, parser: str | None = None) -> Iterator[Any]:
+    """Stream JSON Lines records from a file one at a time.
+
+    Unlike content_from_file, the file is never read into memory as a whole,
+    so there is no size limit.
+
+    Args:
+        file_path: Path to the JSON Lines file
+        parser: JSON parser backend name, or None to pick the fastest available
+
+    Returns:
+        Iterator over parsed records
+
+    Raises:
+        DocumentLoadError: If the file does not exist or a record is invalid
+    """
+    if not file_path.exists():
+        raise DocumentLoadError(f"File not found: {file_path}")
+    get_parser(FileTypes.jsonl, parser)
+
+    def _records() -> Iterator[Any]:
+        with file_path.open("rb") as f:
+            yield from iter_records(f, str(file_path), parser)
+
+    return _records()
+
+
+def iter_records(
+    lines: Iterable[str] | Iterable[bytes], source: str, parser: str | None = None
+) -> Iterator[Any]:
+    """Parse JSON Lines content one record at a time.
+
+    Blank lines are skipped.
+
+    Args:
+        lines: Iterable of text or UTF-8 encoded lines, e.g. an open file
+        source: Source description for error messages
+        parser: JSON parser backend name, or None to pick the fastest available
+
+    Yields:
+        Parsed record for each non-blank line
+
+    Raises:
+        DocumentLoadError: If a line is not valid JSON
+    """
+    loads = get_parser(FileTypes.jsonl, parser).loads
+    for lineno, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield loads(line)
+        except json.JSONDecodeError as e:
+            raise DocumentLoadError(
+                f"Invalid JSON in {source}: {e.msg} at line {lineno}, column {e.colno}"
+            )
+        except UnicodeDecodeError as e:
+            raise DocumentLoadError(f"Invalid UTF-8 in {source} at line {lineno}: {e}")
+
+
+def load_content(
+    content: str, file_type: FileTypes, src: str, parser: str | None = None
+) -> Any:
+    """Load content using parser based on file type.
+
+    Args:
+        content: Document text
+        file_type: Format of the document
+        src: Source description for error messages
+        parser: Parser backend name, or None to pick the fastest available
+
+    Returns:
+        Parsed document
+
+    Raises:
+        DocumentLoadError: If the parser is unavailable or content is invalid
+    """
+    if file_type == FileTypes.jsonl:
+        return list(iter_records(content.splitlines(), src, parser))
+    return _parse(content, file_type, src, get_parser(file_type, parser).loads)
+
+
+def load_stream(
+    stream: BinaryIO, file_type: FileTypes, src: str, parser: str | None = None
+) -> Any:
+    """Load content from a binary stream using parser based on file type.
+
+    Args:
+        stream: Binary file object, e.g. an open file or sys.stdin.buffer
+        file_type: Format of the document
+        src: Source description for error messages
+        parser: Parser backend name, or None to pick the fastest available
+
+    Returns:
+        Parsed document
+
+    Raises:
+        DocumentLoadError: If the parser is unavailable or content is invalid
+    """
+    if file_type == FileTypes.jsonl:
+        return list(iter_records(stream, src, parser))
+    try:
+        return _parse(stream, file_type, src, get_parser(file_type, parser).load)
+    except UnicodeDecodeError as e:
+        raise DocumentLoadError(f"Invalid UTF-8 in {src}: {e}")
+
+
+def _parse(
+    content: str | BinaryIO,
+    file_type: FileTypes,
+    src: str,
+    parse: Callable[[Any], Any],
+) -> Any:
+    """Parse content with a backend, translating errors for the file type."""
     match file_type:
         case "json":
-            return _parse_json(content, src)
+            return _parse_json(content, src, parse)
         case "yaml":
-            return _parse_yaml(content, src)
+            return _parse_yaml(content, src, parse)
         case "xml":
-            return _parse_xml(content, src)
+            return _parse_xml(content, src, parse)
         case "toml":
-            return _parse_toml(content, src)
+            return _parse_toml(content, src, parse)
         case _:
             raise RuntimeError(f"{file_type} currently not supported")
 
 
-def _parse_json(content: str, source: str) -> Any:
+def _parse_json(
+    content: str | BinaryIO,
+    source: str,
+    parse: Callable[[Any], Any] = json.loads,
+) -> Any:
     """Parse JSON content.
 
     Args:
-        content: JSON string to parse
+        content: JSON string or binary stream to parse
         source: Source description for error messages
+        parse: Parser backend function accepting content
 
     Returns:
         Parsed JSON content
@@ -89,19 +524,24 @@ def _parse_json(content: str, source: str) -> Any:
         DocumentLoadError: If JSON is invalid
     """
     try:
-        return json.loads(content)
+        return parse(content)
     except json.JSONDecodeError as e:
         raise DocumentLoadError(
             f"Invalid JSON in {source}: {e.msg} at line {e.lineno}, column {e.colno}"
         )
 
 
-def _parse_yaml(content: str, source: str) -> Any:
+def _parse_yaml(
+    content: str | BinaryIO,
+    source: str,
+    parse: Callable[[Any], Any],
+) -> Any:
     """Parse YAML content.
 
     Args:
-        content: YAML string to parse
+        content: YAML string or binary stream to parse
         source: Source description for error messages
+        parse: Parser backend function accepting content
 
     Returns:
         Parsed YAML content
@@ -109,18 +549,25 @@ def _parse_yaml(content: str, source: str) -> Any:
     Raises:
         DocumentLoadError: If YAML is invalid
     """
+    import yaml
+
     try:
-        return yaml.safe_load(content)
+        return parse(content)
     except yaml.YAMLError as e:
         raise DocumentLoadError(f"Invalid YAML in {source}: {e}")
 
 
-def _parse_xml(content: str, source: str) -> Any:
+def _parse_xml(
+    content: str | BinaryIO,
+    source: str,
+    parse: Callable[[Any], Any],
+) -> Any:
     """Parse XML content.
 
     Args:
-        content: XML string to parse
+        content: XML string or binary stream to parse
         source: Source description for error messages
+        parse: Parser backend function accepting content
 
     Returns:
         Parsed XML content
@@ -129,19 +576,24 @@ def _parse_xml(content: str, source: str) -> Any:
         DocumentLoadError: If XML is invalid
     """
     try:
-        return xmltodict.parse(content)
+        return parse(content)
     except expat.ExpatError as e:
         raise DocumentLoadError(f"Invalid XML in {source}: {e}")
     except Exception as e:
         raise DocumentLoadError(f"Failed to parse XML from {source}: {e}")
 
 
-def _parse_toml(content: str, source: str) -> Any:
+def _parse_toml(
+    content: str | BinaryIO,
+    source: str,
+    parse: Callable[[Any], Any] = tomllib.loads,
+) -> Any:
     """Parse TOML content.
 
     Args:
-        content: TOML string to parse
+        content: TOML string or binary stream to parse
         source: Source description for error messages
+        parse: Parser backend function accepting content
 
     Returns:
         Parsed TOML content
@@ -150,6 +602,6 @@ def _parse_toml(content: str, source: str) -> Any:
         DocumentLoadError: If TOML is invalid
     """
     try:
-        return tomllib.loads(content)
+        return parse(content)
     except tomllib.TOMLDecodeError as e:
         raise DocumentLoadError(f"Invalid TOML in {source}: {e}")
@@ -2,13 +2,120 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator
 import json
+import os
 import sys
 from typing import Any
 
+from pq.types import LazyMapping, LazySequence
+
 __all__ = ["OutputFormatter"]
 
 
+WRITE_CHUNK_SIZE = 64 * 1024
+
+
+def _materialize(obj: Any) -> Any:
+    """Convert lazily loaded containers for json.dumps.
+
+    Args:
+        obj: Object json.dumps cannot serialize natively
+
+    Returns:
+        dict or list with the same contents; iterators are drained into a list
+
+    Raises:
+        TypeError: If obj is not a lazy container
+    """
+    if isinstance(obj, (LazyMapping, LazySequence)):
+        return obj.materialize()
+    if isinstance(obj, Iterator):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _materialize_labeled(obj: Any) -> Any:
+    """Like _materialize, also encoding sets and frozensets as arrays.
+
+    Elements are sorted when they can be compared, so the output does not
+    depend on hash order.
+    """
+    if isinstance(obj, (set, frozenset)):
+        try:
+            return sorted(obj)
+        except TypeError:
+            return list(obj)
+    return _materialize(obj)
+
+
+_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False, default=_materialize)
+
+
+def _write(stream: Any, text: str) -> None:
+    """Write text through the binary buffer of a text stream if it has one."""
+    buffer = getattr(stream, "buffer", None)
+    if buffer is None:
+        stream.write(text)
+        stream.flush()
+    else:
+        buffer.write(text.encode(stream.encoding or "utf-8", stream.errors or "strict"))
+        buffer.flush()
+
+
+def _json_key(key: Any) -> str:
+    """Encode a mapping key the way json.dumps does."""
+    if isinstance(key, str):
+        text = key
+    elif key is True or key is False or key is None:
+        text = json.dumps(key)
+    elif isinstance(key, (int, float)):
+        text = _ENCODER.encode(key)
+    else:
+        raise TypeError(
+            f"keys must be str, int, float, bool or None, not {type(key).__name__}"
+        )
+    return json.dumps(text, ensure_ascii=False)
+
+
+def _iter_json_lines(
+    value: Any, depth: int, prefix: str = "", suffix: str = ""
+) -> Iterator[str]:
+    """Yield the lines of value pretty-printed at a nesting depth.
+
+    Args:
+        value: Value to print
+        depth: Nesting depth, indented by two spaces per level
+        prefix: Text before the value on its first line, e.g. a key
+        suffix: Text after the value on its last line, e.g. a comma
+    """
+    pad = "  " * depth
+    if isinstance(value, (dict, LazyMapping)):
+        entries: Iterator[tuple[str, Any]] = (
+            (_json_key(key) + ": ", item) for key, item in value.items()
+        )
+        opening, closing = "{", "}"
+    elif isinstance(value, (list, tuple, LazySequence, Iterator)):
+        entries = (("", item) for item in value)
+        opening, closing = "[", "]"
+    else:
+        text = json.dumps(value, ensure_ascii=False, default=_materialize)
+        yield f"{pad}{prefix}{text}{suffix}"
+        return
+
+    previous = next(entries, None)
+    if previous is None:
+        yield f"{pad}{prefix}{opening}{closing}{suffix}"
+        return
+
+    yield f"{pad}{prefix}{opening}"
+    for entry in entries:
+        yield from _iter_json_lines(previous[1], depth + 1, previous[0], ",")
+        previous = entry
+    yield from _iter_json_lines(previous[1], depth + 1, previous[0])
+    yield f"{pad}{closing}{suffix}"
+
+
 class OutputFormatter:
     """Format output for display and piping."""
 
@@ -26,20 +133,148 @@ class OutputFormatter:
             return "null"
         elif isinstance(result, (str, int, float, bool)):
             return json.dumps(result)
-        elif isinstance(result, (dict, list)):
-            return json.dumps(result, indent=2, ensure_ascii=False)
+        elif isinstance(result, (dict, list, LazyMapping, LazySequence, Iterator)):
+            return json.dumps(
+                result, indent=2, ensure_ascii=False, default=_materialize
+            )
         else:
             return str(result)
 
+    @staticmethod
+    def format_record(result: Any) -> str:
+        """Format result as a single line of JSON.
+
+        Args:
+            result: Result to format
+
+        Returns:
+            Compact JSON string without newlines
+        """
+        if isinstance(result, (dict, list, LazyMapping, LazySequence)):
+            return json.dumps(result, ensure_ascii=False, default=_materialize)
+        return OutputFormatter.format_output(result)
+
+    @staticmethod
+    def format_labeled_record(fields: dict[str, Any]) -> str:
+        """Format a mapping of labels to values as a single line of JSON.
+
+        Unlike format_record, values are always encoded as JSON, e.g.
+        tuples and sets as arrays, rather than falling back to str().
+
+        Args:
+            fields: Labels and values, e.g. {"query": ..., "result": ...}
+
+        Returns:
+            Compact JSON object without newlines
+
+        Raises:
+            TypeError: If a value is not JSON serializable
+        """
+        return json.dumps(fields, ensure_ascii=False, default=_materialize_labeled)
+
+    @staticmethod
+    def print_records(results: Iterable[Any]) -> None:
+        """Print each result as one line of JSON as soon as it is produced.
+
+        Args:
+            results: Iterable of results to print
+        """
+        for result in results:
+            sys.stdout.write(OutputFormatter.format_record(result))
+            sys.stdout.write("\n")
+        sys.stdout.flush()
+
+    @staticmethod
+    def iter_output(result: Any) -> Iterator[str]:
+        """Format result like format_output, yielding the text in pieces.
+
+        Iterators and lazy sequences at the top level are consumed one item
+        at a time, so the output of a generator query starts before the
+        last item is produced and is never held in memory as a whole.
+
+        Args:
+            result: Result to format
+
+        Yields:
+            Consecutive pieces of the formatted JSON string
+        """
+        if isinstance(result, (Iterator, LazySequence)):
+            empty = True
+            for item in result:
+                prefix = "[\n  " if empty else ",\n  "
+                empty = False
+                yield prefix + "".join(_ENCODER.iterencode(item)).replace("\n", "\n  ")
+            yield "[]" if empty else "\n]"
+        elif isinstance(result, (dict, list, LazyMapping)):
+            yield from _ENCODER.iterencode(result)
+        else:
+            yield OutputFormatter.format_output(result)
+
+    @staticmethod
+    def iter_lines(result: Any) -> Iterator[str]:
+        """Format result like format_output, yielding one line at a time.
+
+        Containers are walked as the lines are requested, so the first
+        lines of a huge result are available without formatting the rest.
+
+        Args:
+            result: Result to format
+
+        Yields:
+            Lines of the formatted output, without newlines
+        """
+        if isinstance(result, (dict, list, LazyMapping, LazySequence, Iterator)):
+            yield from _iter_json_lines(result, 0)
+        else:
+            yield from OutputFormatter.format_output(result).split("\n")
+
+    @staticmethod
+    def iter_chunks(result: Any) -> Iterator[str]:
+        """Format result for stdout, yielding the text in write-sized chunks.
+
+        The first piece is yielded straight away so downstream consumers see
+        output immediately; the rest is batched into chunks of about
+        WRITE_CHUNK_SIZE characters. The output always ends with a newline.
+
+        Args:
+            result: Result to format
+
+        Yields:
+            Consecutive chunks of the output
+        """
+        pending: list[str] = []
+        pending_size = 0
+        limit = 0
+        last = ""
+        for piece in OutputFormatter.iter_output(result):
+            pending.append(piece)
+            pending_size += len(piece)
+            last = piece or last
+            if pending_size >= limit:
+                yield "".join(pending)
+                pending = []
+                pending_size = 0
+                limit = WRITE_CHUNK_SIZE
+
+        if not last.endswith("\n"):
+            pending.append("\n")
+        yield "".join(pending)
+
     @staticmethod
     def print_to_stdout(result: Any) -> None:
-        """Print result to stdout for piping.
+        """Print result to stdout for piping, streaming it as it is formatted.
+
+        Output is written to the binary stdout in the chunks produced by
+        iter_chunks.
 
         Args:
             result: Result to print
         """
-        output = OutputFormatter.format_output(result)
-        sys.stdout.write(output)
-        if not output.endswith("\n"):
-            sys.stdout.write("\n")
         sys.stdout.flush()
+        try:
+            for chunk in OutputFormatter.iter_chunks(result):
+                _write(sys.stdout, chunk)
+        except BrokenPipeError:
+            # The reader went away, e.g. `| head`; discard the rest quietly.
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
@@ -0,0 +1,174 @@
+"""Projection pushdown: load only the part of a document a query touches."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, BinaryIO
+import mmap
+
+from pq.jsonscan import read_key, skip_value, skip_ws
+from pq.loader import ParserFunc, ProgressFunc, get_parser, load_document
+from pq.types import FileTypes
+
+__all__ = [
+    "PROJECTION_MIN_SIZE",
+    "PathSegment",
+    "load_projected",
+]
+
+
+PROJECTION_MIN_SIZE = 64 * 1024 * 1024
+
+PathSegment = str | int
+
+
+class _Unsupported(Exception):
+    """Raised when a document cannot be projected and must be fully loaded."""
+
+
+def load_projected(
+    file_path: Path,
+    path: tuple[PathSegment, ...],
+    parser: str | None = None,
+    progress: ProgressFunc | None = None,
+) -> Any:
+    """Load only the subtree of a document at a static path.
+
+    The result is a skeleton that mirrors the document along the path, so
+    any query whose uses of '_' all start with that path gives the same
+    result as it would on the full document. Siblings of the path are
+    skipped without building Python objects for them.
+
+    JSON and YAML files of at least PROJECTION_MIN_SIZE bytes are projected;
+    anything else, and any document the projection cannot handle, is fully
+    loaded with load_document. Skipped JSON regions are validated like the
+    rest, so a file is accepted or rejected whatever its size.
+
+    Args:
+        file_path: Path to the file to load
+        path: Leading subscript path of the query, e.g. ('spec', 'containers', 0)
+        parser: Parser backend name, or None to pick the fastest available
+        progress: Function called with (bytes read, file size) while a
+            document is fully loaded; projection does not report progress
+
+    Returns:
+        Document skeleton containing the subtree at path
+
+    Raises:
+        DocumentLoadError: If file loading fails
+    """
+    if not path or not file_path.exists():
+        return load_document(file_path, parser, progress)
+    if file_path.stat().st_size < PROJECTION_MIN_SIZE:
+        return load_document(file_path, parser, progress)
+
+    try:
+        file_type = FileTypes(file_path.suffix.lstrip("."))
+    except ValueError:
+        return load_document(file_path, parser, progress)
+
+    try:
+        with file_path.open("rb") as f:
+            if file_type == FileTypes.json:
+                return _project_json_file(f, path, get_parser(file_type, parser).loads)
+            if file_type == FileTypes.yaml:
+                from pq.projection_yaml import project_yaml
+
+                return project_yaml(f, path, parser)
+    except (_Unsupported, ValueError):
+        pass
+
+    return load_document(file_path, parser, progress)
+
+
+def _project_json_file(
+    stream: BinaryIO, path: tuple[PathSegment, ...], loads: ParserFunc
+) -> Any:
+    """Project a JSON file through a memory map of its contents."""
+    with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        value, end = _project_json(buf, skip_ws(buf, 0), path, loads)
+        if skip_ws(buf, end) != len(buf):
+            raise _Unsupported("trailing data")
+        return value
+
+
+def _project_json(
+    buf: Any, pos: int, path: tuple[PathSegment, ...], loads: ParserFunc
+) -> tuple[Any, int]:
+    """Project the JSON value at pos onto path.
+
+    Returns:
+        Tuple of (projected value, position just past the value)
+    """
+    char = buf[pos : pos + 1]
+    if path and char == b"{":
+        return _project_json_object(buf, pos, path, loads)
+    if path and char == b"[":
+        return _project_json_array(buf, pos, path, loads)
+
+    end = skip_value(buf, pos)
+    return loads(buf[pos:end]), end
+
+
+def _project_json_object(
+    buf: Any, pos: int, path: tuple[PathSegment, ...], loads: ParserFunc
+) -> tuple[dict[str, Any], int]:
+    """Project a JSON object, keeping only the member named by path[0]."""
+    target, rest = path[0], path[1:]
+    result: dict[str, Any] = {}
+
+    pos = skip_ws(buf, pos + 1)
+    if buf[pos : pos + 1] == b"}":
+        return result, pos + 1
+
+    while True:
+        key, pos = read_key(buf, pos)
+        if key == target:
+            result[key], pos = _project_json(buf, pos, rest, loads)
+        else:
+            pos = skip_value(buf, pos)
+
+        pos = skip_ws(buf, pos)
+        char = buf[pos : pos + 1]
+        if char == b"}":
+            return result, pos + 1
+        if char != b",":
+            raise _Unsupported("expected ',' or '}'")
+        pos = skip_ws(buf, pos + 1)
+
+
+def _project_json_array(
+    buf: Any, pos: int, path: tuple[PathSegment, ...], loads: ParserFunc
+) -> tuple[list[Any], int]:
+    """Project a JSON array, keeping only the element indexed by path[0].
+
+    Elements before the target are kept as None placeholders so the
+    target stays at its original index.
+    """
+    target, rest = path[0], path[1:]
+    if not isinstance(target, int):
+        return [], skip_value(buf, pos)
+
+    result: list[Any] = []
+    pos = skip_ws(buf, pos + 1)
+    if buf[pos : pos + 1] == b"]":
+        return result, pos + 1
+
+    index = 0
+    while True:
+        if index == target:
+            value, pos = _project_json(buf, pos, rest, loads)
+            result.append(value)
+        else:
+            pos = skip_value(buf, pos)
+            if index < target:
+                result.append(None)
+        index += 1
+
+        pos = skip_ws(buf, pos)
+        char = buf[pos : pos + 1]
+        if char == b"]":
+            return result, pos + 1
+        if char != b",":
+            raise _Unsupported("expected ',' or ']'")
+        pos = skip_ws(buf, pos + 1)
@@ -0,0 +1,167 @@
+"""Projection pushdown for YAML documents.
+
+Kept apart from pq.projection so that PyYAML is only imported when a YAML
+document is projected.
+"""
+
+from __future__ import annotations
+
+from typing import Any, BinaryIO
+
+import yaml
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.resolver import Resolver
+
+from pq.projection import PathSegment
+
+__all__ = ["project_yaml"]
+
+
+_YAML_MAP_TAGS = (None, "!", "tag:yaml.org,2002:map")
+_YAML_SEQ_TAGS = (None, "!", "tag:yaml.org,2002:seq")
+
+
+class _EventComposer(Composer, SafeConstructor, Resolver):
+    """Build Python objects from events pulled off another YAML parser.
+
+    This lets the fast libyaml parser emit events for the whole stream
+    while only the projected subtree is composed and constructed.
+    """
+
+    def __init__(self, source: Any) -> None:
+        self._source = source
+        Composer.__init__(self)
+        SafeConstructor.__init__(self)
+        Resolver.__init__(self)
+
+    def check_event(self, *choices: Any) -> bool:
+        return self._source.check_event(*choices)
+
+    def peek_event(self) -> Any:
+        return self._source.peek_event()
+
+    def get_event(self) -> Any:
+        return self._source.get_event()
+
+    def build(self) -> Any:
+        """Compose and construct the node starting at the next event."""
+        node = self.compose_node(None, None)
+        data = self.construct_document(node)
+        self.anchors = {}
+        return data
+
+    def scalar_value(self, event: yaml.ScalarEvent) -> Any:
+        """Resolve and construct a scalar event, e.g. a mapping key."""
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = self.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, style=event.style)
+        return self.construct_object(node, deep=True)
+
+
+def project_yaml(
+    stream: BinaryIO, path: tuple[PathSegment, ...], parser: str | None = None
+) -> Any:
+    """Project a single-document YAML stream onto path.
+
+    Args:
+        stream: Binary YAML stream
+        path: Leading subscript path of the query
+        parser: YAML parser backend name; pyyaml uses the pure Python parser
+
+    Returns:
+        Document skeleton containing the subtree at path
+
+    Raises:
+        ValueError: If the document cannot be projected or is invalid, in
+            which case it should be fully loaded instead
+    """
+    loader_class = yaml.CSafeLoader if parser != "pyyaml" else yaml.SafeLoader
+    if loader_class is yaml.CSafeLoader and not getattr(
+        yaml, "__with_libyaml__", False
+    ):
+        loader_class = yaml.SafeLoader
+
+    loader = loader_class(stream)
+    try:
+        composer = _EventComposer(loader)
+        loader.get_event()
+        if loader.check_event(yaml.StreamEndEvent):
+            return None
+
+        loader.get_event()
+        result = _project_yaml_node(composer, path)
+        loader.get_event()
+
+        if not loader.check_event(yaml.StreamEndEvent):
+            raise ValueError("more than one document")
+        return result
+    except yaml.YAMLError as e:
+        raise ValueError(f"invalid YAML: {e}") from e
+    finally:
+        loader.dispose()
+
+
+def _skip_yaml_node(composer: _EventComposer) -> None:
+    """Consume the events of one node without building it."""
+    depth = 0
+    while True:
+        event = composer.get_event()
+        if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+            depth += 1
+        elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+            depth -= 1
+        if depth == 0:
+            return
+
+
+def _project_yaml_node(composer: _EventComposer, path: tuple[PathSegment, ...]) -> Any:
+    """Project the YAML node starting at the next event onto path."""
+    event = composer.peek_event()
+    if not path or isinstance(event, yaml.ScalarEvent):
+        return composer.build()
+    if isinstance(event, yaml.AliasEvent):
+        raise ValueError("alias on projection path")
+
+    target, rest = path[0], path[1:]
+
+    if isinstance(event, yaml.MappingStartEvent):
+        if event.tag not in _YAML_MAP_TAGS:
+            raise ValueError("tagged mapping on projection path")
+        composer.get_event()
+        result: dict[Any, Any] = {}
+        while not composer.check_event(yaml.MappingEndEvent):
+            if not composer.check_event(yaml.ScalarEvent):
+                _skip_yaml_node(composer)
+                _skip_yaml_node(composer)
+                continue
+            key_event = composer.get_event()
+            if key_event.tag is None and key_event.value == "<<":
+                raise ValueError("merge key on projection path")
+            key = composer.scalar_value(key_event)
+            if key == target:
+                result[key] = _project_yaml_node(composer, rest)
+            else:
+                _skip_yaml_node(composer)
+        composer.get_event()
+        return result
+
+    if isinstance(event, yaml.SequenceStartEvent):
+        if event.tag not in _YAML_SEQ_TAGS:
+            raise ValueError("tagged sequence on projection path")
+        composer.get_event()
+        items: list[Any] = []
+        index = 0
+        while not composer.check_event(yaml.SequenceEndEvent):
+            if index == target and isinstance(target, int):
+                items.append(_project_yaml_node(composer, rest))
+            else:
+                _skip_yaml_node(composer)
+                if isinstance(target, int) and index < target:
+                    items.append(None)
+            index += 1
+        composer.get_event()
+        return items
+
+    raise ValueError(f"unexpected event {event}")
@@ -0,0 +1,439 @@
+"""Out-of-core document store backed by SQLite."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import threading
+import weakref
+
+from pq.jsonscan import read_key, skip_value, skip_ws
+from pq.loader import DocumentLoadError
+from pq.types import FileTypes, LazyMapping, LazySequence
+
+__all__ = ["DocumentStore", "StoredDict", "StoredList"]
+
+
+STORE_VERSION = 1
+
+INLINE_MAX_BYTES = 64 * 1024
+
+PAGE_SIZE = 1000
+
+_BATCH_SIZE = 10_000
+
+_KIND_OBJECT = 0
+_KIND_ARRAY = 1
+_KIND_INLINE = 2
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE nodes (
+    id INTEGER PRIMARY KEY,
+    parent INTEGER,
+    pos INTEGER NOT NULL,
+    key TEXT,
+    kind INTEGER NOT NULL,
+    size INTEGER,
+    data BLOB
+);
+"""
+
+_INDEXES = """
+CREATE INDEX nodes_children ON nodes (parent, pos);
+CREATE INDEX nodes_keys ON nodes (parent, key);
+"""
+
+
+# Open stores, whose connections are replaced in forked children.
+_open_stores: weakref.WeakSet[DocumentStore] = weakref.WeakSet()
+
+
+class DocumentStore:
+    """A JSON document ingested once into an indexed on-disk store.
+
+    Objects and arrays larger than INLINE_MAX_BYTES become one row per
+    child, so any node can be reached by key or index without reading its
+    siblings. Smaller values are kept inline as raw JSON and parsed on
+    access. The root is exposed through StoredDict and StoredList proxies
+    that page children in from disk, keeping memory bounded regardless of
+    document size.
+
+    Proxies may be shared between threads. A process forked while the
+    store is open, e.g. a query worker under a budget, gets a connection
+    of its own, since SQLite connections must not be used across a fork.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        """Open an existing store.
+
+        Args:
+            db_path: Path of the SQLite store file
+        """
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Held around every statement, and across os.fork() so a child
+        # never inherits a statement in progress.
+        self.lock = threading.Lock()
+        self._inline = lru_cache(maxsize=1024)(self._load_inline)
+        _open_stores.add(self)
+
+    @classmethod
+    def open(cls, file_path: Path, store_dir: Path) -> DocumentStore:
+        """Open the store for a document, ingesting it first if needed.
+
+        A store is reused as long as the document's size and modification
+        time are unchanged.
+
+        Args:
+            file_path: Path of the JSON document
+            store_dir: Directory holding store files
+
+        Returns:
+            Store for the document
+
+        Raises:
+            DocumentLoadError: If the document is missing, not JSON or invalid
+        """
+        if not file_path.exists():
+            raise DocumentLoadError(f"File not found: {file_path}")
+        if file_path.suffix.lstrip(".") != FileTypes.json:
+            raise DocumentLoadError(
+                f"Out-of-core mode supports JSON files only, not {file_path.suffix}"
+            )
+
+        stat = file_path.stat()
+        stamp = f"{STORE_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+        digest = hashlib.sha256(str(file_path.resolve()).encode("utf-8")).hexdigest()
+        db_path = store_dir / f"{digest[:32]}.sqlite"
+
+        if db_path.exists():
+            store = cls(db_path)
+            if store._meta("stamp") == stamp:
+                return store
+            store.close()
+
+        store_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = db_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            _ingest_json(file_path, tmp_path, stamp)
+            os.replace(tmp_path, db_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return cls(db_path)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        _open_stores.discard(self)
+        self._conn.close()
+
+    def _reconnect_in_child(self) -> None:
+        """Give a forked child a connection of its own."""
+        # The inherited connection is left open: closing it could touch
+        # state the parent still uses, and the child exits without cleanup.
+        self._inherited = self._conn
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+
+    def _fetchone(self, sql: str, params: tuple[Any, ...] = ()) -> Any:
+        with self.lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params: tuple[Any, ...] = ()) -> list[Any]:
+        with self.lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _meta(self, key: str) -> str | None:
+        """Read a metadata value, or None if the store is incomplete."""
+        try:
+            row = self._fetchone("SELECT value FROM meta WHERE key = ?", (key,))
+        except sqlite3.DatabaseError:
+            return None
+        return row[0] if row else None
+
+    def root(self) -> Any:
+        """Get the document root.
+
+        Returns:
+            StoredDict or StoredList proxy, or the value for scalar documents
+        """
+        row = self._fetchone("SELECT id, kind, size FROM nodes WHERE id = 0")
+        return self._node(*row)
+
+    def _node(self, node_id: int, kind: int, size: int | None) -> Any:
+        """Turn a node row into a proxy or a materialized value."""
+        if kind == _KIND_OBJECT:
+            return StoredDict(self, node_id, size or 0)
+        if kind == _KIND_ARRAY:
+            return StoredList(self, node_id, size or 0)
+        return self._inline(node_id)
+
+    def _load_inline(self, node_id: int) -> Any:
+        """Parse the raw JSON of an inline node."""
+        row = self._fetchone("SELECT data FROM nodes WHERE id = ?", (node_id,))
+        return json.loads(row[0])
+
+    def _child_by_key(self, parent: int, key: str) -> tuple[int, int, int] | None:
+        return self._fetchone(
+            "SELECT id, kind, size FROM nodes WHERE parent = ? AND key = ?",
+            (parent, key),
+        )
+
+    def _child_by_pos(self, parent: int, pos: int) -> tuple[int, int, int] | None:
+        return self._fetchone(
+            "SELECT id, kind, size FROM nodes WHERE parent = ? AND pos = ?",
+            (parent, pos),
+        )
+
+    def _children(
+        self, parent: int, start: int = 0, stop: int | None = None
+    ) -> Iterator[tuple[str | None, int, int, int]]:
+        """Page through the children of a node in document order.
+
+        Yields:
+            Tuples of (key, id, kind, size)
+        """
+        pos = start
+        while stop is None or pos < stop:
+            limit = PAGE_SIZE if stop is None else min(PAGE_SIZE, stop - pos)
+            rows = self._fetchall(
+                "SELECT key, id, kind, size, pos FROM nodes"
+                " WHERE parent = ? AND pos >= ? ORDER BY pos LIMIT ?",
+                (parent, pos, limit),
+            )
+            if not rows:
+                return
+            for key, node_id, kind, size, _ in rows:
+                yield key, node_id, kind, size
+            pos = rows[-1][4] + 1
+
+
+# Stores locked by the thread calling os.fork(), until it returns.
+_forking: list[DocumentStore] = []
+
+
+def _lock_stores() -> None:
+    _forking[:] = list(_open_stores)
+    for store in _forking:
+        store.lock.acquire()
+
+
+def _unlock_stores() -> None:
+    for store in _forking:
+        store.lock.release()
+    _forking.clear()
+
+
+def _reconnect_stores() -> None:
+    for store in _forking:
+        store._reconnect_in_child()
+    _unlock_stores()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_lock_stores,
+        after_in_parent=_unlock_stores,
+        after_in_child=_reconnect_stores,
+    )
+
+
+class StoredDict(LazyMapping):
+    """JSON object in a DocumentStore, loading values on access."""
+
+    def __init__(self, store: DocumentStore, node_id: int, size: int) -> None:
+        self._store = store
+        self._id = node_id
+        self._size = size
+
+    def __getitem__(self, key: Any) -> Any:
+        row = self._store._child_by_key(self._id, key) if isinstance(key, str) else None
+        if row is None:
+            raise KeyError(key)
+        return self._store._node(*row)
+
+    def __iter__(self) -> Iterator[str]:
+        for key, *_ in self._store._children(self._id):
+            yield key
+
+    def __len__(self) -> int:
+        return self._size
+
+    def items(self) -> Iterator[tuple[str, Any]]:  # type: ignore[override]
+        for key, *row in self._store._children(self._id):
+            yield key, self._store._node(*row)
+
+    def values(self) -> Iterator[Any]:  # type: ignore[override]
+        for _, *row in self._store._children(self._id):
+            yield self._store._node(*row)
+
+    def __repr__(self) -> str:
+        return f"<StoredDict with {self._size} keys>"
+
+
+class StoredList(LazySequence):
+    """JSON array in a DocumentStore, loading items on access."""
+
+    def __init__(self, store: DocumentStore, node_id: int, size: int) -> None:
+        self._store = store
+        self._id = node_id
+        self._size = size
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._size)
+            if step == 1:
+                return [
+                    self._store._node(*row)
+                    for _, *row in self._store._children(self._id, start, stop)
+                ]
+            return [self[i] for i in range(start, stop, step)]
+        if not isinstance(index, int):
+            raise TypeError(
+                f"list indices must be integers or slices, not {type(index).__name__}"
+            )
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("list index out of range")
+        return self._store._node(*self._store._child_by_pos(self._id, index))
+
+    def __iter__(self) -> Iterator[Any]:
+        for _, *row in self._store._children(self._id):
+            yield self._store._node(*row)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return f"<StoredList with {self._size} items>"
+
+
+class _Ingester:
+    """Write the nodes of a JSON document into a store in batches."""
+
+    def __init__(self, conn: sqlite3.Connection, buf: Any) -> None:
+        self._conn = conn
+        self._buf = buf
+        self._rows: list[tuple[Any, ...]] = []
+        self._next_id = 0
+        self.duplicate_keys: list[tuple[int, str]] = []
+
+    def _add(self, *row: Any) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= _BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        self._conn.executemany(
+            "INSERT INTO nodes (id, parent, pos, key, kind, size, data)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._rows,
+        )
+        self._rows.clear()
+
+    def value(self, pos: int, parent: int | None, index: int, key: str | None) -> int:
+        """Ingest the value at pos, returning the position just past it."""
+        buf = self._buf
+        node_id = self._next_id
+        self._next_id += 1
+
+        end = skip_value(buf, pos)
+        char = buf[pos : pos + 1]
+        if char not in (b"{", b"[") or end - pos <= INLINE_MAX_BYTES:
+            data = buf[pos:end]
+            json.loads(data)
+            self._add(node_id, parent, index, key, _KIND_INLINE, None, data)
+            return end
+
+        if char == b"{":
+            size = self._object(pos, node_id)
+            self._add(node_id, parent, index, key, _KIND_OBJECT, size, None)
+        else:
+            size = self._array(pos, node_id)
+            self._add(node_id, parent, index, key, _KIND_ARRAY, size, None)
+        return end
+
+    def _object(self, pos: int, node_id: int) -> int:
+        buf = self._buf
+        pos = skip_ws(buf, pos + 1)
+        if buf[pos : pos + 1] == b"}":
+            return 0
+        keys: set[str] = set()
+        index = 0
+        while True:
+            key, pos = read_key(buf, pos)
+            pos = skip_ws(buf, self.value(pos, node_id, index, key))
+            if key in keys:
+                self.duplicate_keys.append((node_id, key))
+            keys.add(key)
+            index += 1
+            char = buf[pos : pos + 1]
+            if char == b"}":
+                return len(keys)
+            if char != b",":
+                raise ValueError(f"Expecting ',' delimiter at byte {pos}")
+            pos = skip_ws(buf, pos + 1)
+
+    def _array(self, pos: int, node_id: int) -> int:
+        buf = self._buf
+        pos = skip_ws(buf, pos + 1)
+        if buf[pos : pos + 1] == b"]":
+            return 0
+        index = 0
+        while True:
+            pos = skip_ws(buf, self.value(pos, node_id, index, None))
+            index += 1
+            char = buf[pos : pos + 1]
+            if char == b"]":
+                return index
+            if char != b",":
+                raise ValueError(f"Expecting ',' delimiter at byte {pos}")
+            pos = skip_ws(buf, pos + 1)
+
+
+def _ingest_json(file_path: Path, db_path: Path, stamp: str) -> None:
+    """Ingest a JSON document into a new store file.
+
+    Raises:
+        DocumentLoadError: If the document is not valid JSON
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(_SCHEMA)
+        with file_path.open("rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise DocumentLoadError(
+                    f"Invalid JSON in {file_path}: Expecting value at line 1, column 1"
+                )
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                ingester = _Ingester(conn, buf)
+                try:
+                    end = ingester.value(skip_ws(buf, 0), None, 0, None)
+                    if skip_ws(buf, end) != len(buf):
+                        raise ValueError(f"Extra data at byte {end}")
+                except json.JSONDecodeError as e:
+                    raise DocumentLoadError(f"Invalid JSON in {file_path}: {e.msg}")
+                except ValueError as e:
+                    raise DocumentLoadError(f"Invalid JSON in {file_path}: {e}")
+                ingester.flush()
+        conn.executescript(_INDEXES)
+        # Like json.loads, keep only the last value of a repeated key.
+        conn.executemany(
+            "DELETE FROM nodes WHERE parent = ? AND key = ? AND pos <"
+            " (SELECT MAX(pos) FROM nodes WHERE parent = ? AND key = ?)",
+            [(p, k, p, k) for p, k in ingester.duplicate_keys],
+        )
+        conn.execute("INSERT INTO meta VALUES ('stamp', ?)", (stamp,))
+        conn.commit()
+    finally:
+        conn.close()
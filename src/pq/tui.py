@@ -1,27 +1,85 @@
 """Main Textual application module."""
 
 import asyncio
+from collections.abc import Callable, Iterator
+from functools import partial
+import itertools
 import re
-from typing import Any, ClassVar, cast
+import threading
+import time
+from typing import Any, ClassVar, NamedTuple, cast
 
+from rich.cells import cell_len
+from rich.style import Style
 from rich.syntax import Syntax
+from rich.text import Text
 from textual.app import App, ComposeResult
 from textual.binding import BindingType
+from textual.containers import Vertical
+from textual.cache import LRUCache
+from textual.geometry import Size
+from textual.screen import ModalScreen
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.timer import Timer
 from textual.types import CSSPathType
 from textual.widget import Widget
-from textual.widgets import Footer, Header, OptionList, Static
+from textual.widgets import Footer, Header, OptionList, ProgressBar, Static, Tree
 from textual.widgets._input import Input as BaseInput, Selection
 from textual.widgets.option_list import Option
-
-from pq.completion import FuzzyMatcher, PathExtractor
-from pq.evaluator import QueryEvaluationError, evaluate_query
+from textual.widgets.tree import TreeNode
+from textual.worker import Worker, WorkerState
+
+from pq.budget import Budget, needs_supervision, run_with_budget
+from pq.completion import (
+    DEFAULT_MAX_INDICES,
+    FuzzyMatcher,
+    LazyPathIndex,
+    PathIndex,
+    SchemaIndex,
+)
+from pq.evaluator import (
+    EvaluationCancelled,
+    IncrementalEvaluator,
+    QueryEvaluationError,
+    cancel_evaluation,
+)
+from pq.loader import DocumentLoadError, ProgressFunc
 from pq.output import OutputFormatter
 from pq.theme_mapping import map_theme_to_pygments
+from pq.types import LazyMapping, LazySequence
 
 _BRACKET_PATH_RE = r"(_(?:\[(?:\d+|'[^']*'|\"[^\"]*\")\])*)"
 
 _DEBOUNCE_DELAY = 0.15
 
+_INDEX_REFRESH_INTERVAL = 0.25
+
+_LOAD_PROGRESS_INTERVAL = 0.1
+
+_SPINNER_FRAMES = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+
+_SPINNER_INTERVAL = 0.1
+
+_STRIP_CACHE_SIZE = 1024
+
+_ERROR_STYLE = Style(color="red", bold=True)
+
+_TREE_PAGE_SIZE = 100
+
+_TREE_LABEL_MAX = 200
+
+_NO_MORE = object()
+
+
+class _Evaluation(NamedTuple):
+    """Outcome of a query evaluated in a worker thread."""
+
+    generation: int
+    query: str
+    result: Any
+    error: str | None
+
 
 def _parse_bracket_context(before_cursor: str) -> tuple[str, str, str] | None:
     """Parse bracket context from text before cursor.
@@ -144,8 +202,23 @@ class QueryPrompt(Widget):
         )
 
 
-class ResultDisplay(Static):
-    """Display query results or errors."""
+class ResultDisplay(ScrollView):
+    """Display query results or errors, drawing only the visible lines.
+
+    Result lines are taken from OutputFormatter.iter_lines as the view
+    scrolls toward them, a screen ahead of the viewport, and each line is
+    highlighted when it is first drawn. The cost of showing a result
+    depends on the terminal height, not on the size of the result.
+    """
+
+    def __init__(self, id: str | None = None) -> None:
+        super().__init__(id=id)
+        self._lines: list[str] = []
+        self._source: Iterator[str] | None = None
+        self._width = 0
+        self._is_error = False
+        self._syntax: Syntax | None = None
+        self._strips: LRUCache[int, Strip] = LRUCache(_STRIP_CACHE_SIZE)
 
     def update_result(self, result: Any, is_error: bool = False) -> None:
         """Update the display with new result.
@@ -155,12 +228,204 @@ class ResultDisplay(Static):
             is_error: Whether this is an error message
         """
         if is_error:
-            self.update(f"[error]{result}[/error]")
+            self._show(iter(str(result).split("\n")), is_error=True)
+        else:
+            self._show(OutputFormatter.iter_lines(result))
+
+    def _show(self, lines: Iterator[str], is_error: bool = False) -> None:
+        """Replace the displayed lines with a new source of lines."""
+        self._lines = []
+        self._source = lines
+        self._width = 0
+        self._is_error = is_error
+        self._syntax = None
+        self._strips.clear()
+        self.scroll_to(0, 0, animate=False)
+        self._fill(self.size.height)
+        self.refresh()
+
+    def _fill(self, bottom: int) -> None:
+        """Take lines from the source until a screen past bottom is covered.
+
+        Args:
+            bottom: Index of the last line that must be available
+        """
+        target = bottom + max(self.size.height, 1)
+        while self._source is not None and len(self._lines) <= target:
+            try:
+                line = next(self._source)
+            except StopIteration:
+                self._source = None
+                break
+            except (
+                QueryEvaluationError,
+                DocumentLoadError,
+                TypeError,
+                ValueError,
+            ) as e:
+                self._show(iter([f"Cannot display result: {e}"]), is_error=True)
+                return
+            self._lines.append(line)
+            self._width = max(self._width, cell_len(line))
+
+        height = len(self._lines)
+        if self._source is not None:
+            height += self.size.height
+        self.virtual_size = Size(self._width, height)
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        self._fill(int(new_value) + self.size.height)
+
+    def on_resize(self) -> None:
+        """Cover the resized viewport with lines."""
+        self._fill(self.scroll_offset.y + self.size.height)
+
+    def render_line(self, y: int) -> Strip:
+        """Render one line of the viewport.
+
+        Args:
+            y: Line of the viewport, counted from its top
+
+        Returns:
+            The line, cropped to the horizontal scroll position
+        """
+        scroll_x, scroll_y = self.scroll_offset
+        index = scroll_y + y
+        width = self.size.width
+        rich_style = self.rich_style
+        if index >= len(self._lines):
+            return Strip.blank(width, rich_style)
+
+        strip = self._strips.get(index)
+        if strip is None:
+            strip = self._render_strip(self._lines[index], rich_style)
+            self._strips[index] = strip
+        return strip.crop_extend(scroll_x, scroll_x + width, rich_style)
+
+    def _render_strip(self, line: str, rich_style: Style) -> Strip:
+        """Highlight a whole line."""
+        if self._is_error:
+            text = Text(line, style=_ERROR_STYLE)
         else:
-            formatted = OutputFormatter.format_output(result)
-            pygments_theme = map_theme_to_pygments(cast(QueryApp, self.app).theme)
-            syntax = Syntax(formatted, "json", theme=pygments_theme, line_numbers=False)
-            self.update(syntax)
+            if self._syntax is None:
+                theme = map_theme_to_pygments(cast(QueryApp, self.app).theme)
+                self._syntax = Syntax("", "json", theme=theme)
+            text = self._syntax.highlight(line)
+            text.rstrip()
+        text.no_wrap = True
+        text.stylize_before(rich_style)
+        return Strip(text.render(self.app.console), cell_len(line))
+
+
+class _TreeEntry:
+    """A value shown in the result tree and the children still to be added."""
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+        self.children: Iterator[tuple[Any, Any]] | None = None
+        self.load_more: TreeNode[_TreeEntry | None] | None = None
+
+
+class ResultTree(Tree[_TreeEntry | None]):
+    """Display a result as a tree whose nodes are built when expanded.
+
+    Children are added _TREE_PAGE_SIZE at a time; a "load more" node at the
+    end of a page adds the next one when selected.
+    """
+
+    def show_result(self, result: Any) -> None:
+        """Show a new result, collapsed to its root.
+
+        Args:
+            result: Result to display
+        """
+        self.reset(_tree_label("_", result), _tree_entry(result))
+        if self.root.data is None:
+            self.root.allow_expand = False
+        else:
+            self.root.expand()
+
+    def on_tree_node_expanded(
+        self, event: Tree.NodeExpanded[_TreeEntry | None]
+    ) -> None:
+        """Add the first page of children the first time a node is expanded.
+
+        Args:
+            event: Node expanded event
+        """
+        entry = event.node.data
+        if entry is not None and entry.children is None:
+            value = entry.value
+            if isinstance(value, (dict, LazyMapping)):
+                entry.children = iter(value.items())
+            else:
+                entry.children = enumerate(value)
+            self._add_page(event.node)
+
+    def on_tree_node_selected(
+        self, event: Tree.NodeSelected[_TreeEntry | None]
+    ) -> None:
+        """Load the next page of children when a "load more" node is selected.
+
+        Args:
+            event: Node selected event
+        """
+        parent = event.node.parent
+        if parent is not None and parent.data is not None:
+            if parent.data.load_more is event.node:
+                event.node.remove()
+                parent.data.load_more = None
+                self._add_page(parent)
+
+    def _add_page(self, node: TreeNode[_TreeEntry | None]) -> None:
+        """Add the next page of children to a node."""
+        entry = node.data
+        assert entry is not None and entry.children is not None
+        for key, value in itertools.islice(entry.children, _TREE_PAGE_SIZE):
+            child = _tree_entry(value)
+            label = _tree_label(key, value)
+            if child is None:
+                node.add_leaf(label)
+            else:
+                node.add(label, child)
+
+        more = next(entry.children, _NO_MORE)
+        if more is not _NO_MORE:
+            entry.children = itertools.chain([more], entry.children)
+            entry.load_more = node.add_leaf(f"… load {_TREE_PAGE_SIZE} more")
+
+
+def _tree_entry(value: Any) -> _TreeEntry | None:
+    """Create the tree data for a value; None for values without children.
+
+    Lazy containers are not measured, since that can mean scanning them.
+    """
+    if isinstance(value, (LazyMapping, LazySequence)):
+        return _TreeEntry(value)
+    if isinstance(value, (dict, list, tuple)) and value:
+        return _TreeEntry(value)
+    return None
+
+
+def _tree_label(key: Any, value: Any) -> Text:
+    """Label a tree node with its key and a summary of its value."""
+    label = Text.assemble((str(key), "bold"), ": ")
+    if isinstance(value, (dict, LazyMapping)):
+        summary = "{…}"
+    elif isinstance(value, (list, tuple, LazySequence)):
+        summary = "[…]"
+    else:
+        summary = OutputFormatter.format_record(value)
+        if len(summary) > _TREE_LABEL_MAX:
+            summary = summary[: _TREE_LABEL_MAX - 1] + "…"
+        return label.append(summary)
+
+    if isinstance(value, (dict, list, tuple)):
+        noun = "keys" if isinstance(value, dict) else "items"
+        summary = f"{summary[0]}{summary[2]}" if not value else summary
+        summary += f" ({len(value)} {noun})"
+    return label.append(summary, "dim")
 
 
 class SuggestionBox(Widget):
@@ -210,6 +475,17 @@ class SuggestionBox(Widget):
         end_pos = len(suggestion)
         input_widget.selection = Selection.cursor(end_pos)
 
+    def set_indexing(self, indexing: bool) -> None:
+        """Mark the suggestions as partial while the index is being built.
+
+        Args:
+            indexing: Whether the completion index is still being built
+        """
+        title = "Suggestions (indexing…)" if indexing else "Suggestions"
+        self.query_one("#suggestion-header", SectionHeader).update(
+            f"[dim]{title}[/dim]"
+        )
+
     def compose(self) -> ComposeResult:
         yield SectionHeader("Suggestions", id="suggestion-header")
         yield OptionList(id="suggestion-list")
@@ -225,13 +501,91 @@ class SectionHeader(Static):
 class StatusBar(Static):
     """Display status and helpful hints."""
 
+    _message: str = ""
+    _busy_label: str | None = None
+    _busy_since: float = 0.0
+    _busy_timer: Timer | None = None
+    _frame: int = 0
+
     def set_status(self, message: str) -> None:
         """Update the status message.
 
+        While busy, the message is shown again once the work is done.
+
         Args:
             message: Status message to display
         """
-        self.update(f"[dim]{message}[/dim]")
+        self._message = message
+        if self._busy_label is None:
+            self.update(f"[dim]{message}[/dim]")
+
+    def start_busy(self, label: str) -> None:
+        """Show a spinner and elapsed time until stop_busy is called.
+
+        Args:
+            label: Description of the work in progress
+        """
+        self._busy_label = label
+        self._busy_since = time.monotonic()
+        if self._busy_timer is None:
+            self._busy_timer = self.set_interval(_SPINNER_INTERVAL, self._show_busy)
+        self._show_busy()
+
+    def stop_busy(self) -> None:
+        """Remove the spinner and show the status message again."""
+        if self._busy_timer is not None:
+            self._busy_timer.stop()
+            self._busy_timer = None
+        self._busy_label = None
+        self.update(f"[dim]{self._message}[/dim]")
+
+    def _show_busy(self) -> None:
+        frame = _SPINNER_FRAMES[self._frame % len(_SPINNER_FRAMES)]
+        self._frame += 1
+        elapsed = time.monotonic() - self._busy_since
+        self.update(f"[dim]{frame} {self._busy_label} {elapsed:.1f}s[/dim]")
+
+
+def _format_size(size: int) -> str:
+    """Format a byte count for display, e.g. "12.3 MB"."""
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            break
+        value /= 1024
+    return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+
+
+class LoadingScreen(ModalScreen[None]):
+    """Show progress while the document is loaded in the background."""
+
+    BINDINGS: ClassVar[list[BindingType]] = [
+        ("escape", "app.quit", "Cancel"),
+    ]
+
+    def compose(self) -> ComposeResult:
+        with Vertical(id="loading-dialog"):
+            yield Static("[dim]Loading…[/dim]", id="loading-label")
+            yield ProgressBar(id="loading-progress", show_eta=False)
+
+    def on_mount(self) -> None:
+        """Poll the load progress reported by the loader thread."""
+        self.set_interval(_LOAD_PROGRESS_INTERVAL, self._show_progress)
+
+    def _show_progress(self) -> None:
+        read, size = cast(QueryApp, self.app).load_progress
+        label = self.query_one("#loading-label", Static)
+        bar = self.query_one("#loading-progress", ProgressBar)
+        if size is None or read == 0:
+            message = "Loading…" if read == 0 else f"Read {_format_size(read)}"
+            bar.update(total=None)
+        elif read < size:
+            message = f"Reading {_format_size(read)} of {_format_size(size)}"
+            bar.update(total=size, progress=read)
+        else:
+            message = f"Parsing {_format_size(size)}…"
+            bar.update(total=None)
+        label.update(f"[dim]{message}  Press Esc or Ctrl+C to cancel.[/dim]")
 
 
 class QueryApp(App[None]):
@@ -243,24 +597,60 @@ class QueryApp(App[None]):
 
     BINDINGS: ClassVar[list[BindingType]] = [
         ("ctrl+c", "quit", "Cancel & Quit"),
+        ("ctrl+t", "toggle_tree", "Tree/Text View"),
     ]
 
     _pending_query: str | None = None
     _eval_timer: Any = None
-
-    def __init__(self, data: Any, theme: str | None = None) -> None:
-        """Initialize app with document data.
+    _eval_generation: int = 0
+    _has_result: bool = False
+    tree_view: bool = False
+    _eval_thread: int | None = None
+
+    def __init__(
+        self,
+        data: Any = None,
+        theme: str | None = None,
+        schema_index: bool = False,
+        max_indices: int = DEFAULT_MAX_INDICES,
+        loader: Callable[[ProgressFunc], Any] | None = None,
+        budget: Budget = Budget(),
+    ) -> None:
+        """Initialize app with document data, or a function that loads it.
 
         Args:
-            data: Document data to query
+            data: Document data to query, if loader is not given
             theme: Textual theme name (optional)
+            schema_index: Whether to complete paths from a SchemaIndex that
+                collapses list elements into one shape
+            max_indices: Number of indices suggested per list by a SchemaIndex,
+                or when completing a lazy document
+            loader: Function that loads the document, reporting progress to
+                the function it is passed. It runs in a background thread
+                while a loading screen is shown.
+            budget: CPU time and memory each evaluation may use
         """
         self.data = data
+        self.budget = budget
+        self.loader = loader
+        self.loaded = loader is None
+        self.load_error: Exception | None = None
+        self.load_progress: tuple[int, int | None] = (0, None)
+        self._load_cancelled = threading.Event()
         self.final_result: Any = None
-
-        path_extractor = PathExtractor(data)
-        self.paths = path_extractor.get_paths()
-        self.fuzzy_matcher = FuzzyMatcher(self.paths)
+        self._eval_lock = threading.Lock()
+        self._eval_run_lock = threading.Lock()
+        # Reuses sub-expression results while a query is edited; only used
+        # by the one evaluation thread running at a time.
+        self._evaluator = IncrementalEvaluator()
+
+        self.max_indices = max_indices
+        if schema_index:
+            index: PathIndex = SchemaIndex(max_indices=max_indices)
+        else:
+            index = PathIndex()
+        self.fuzzy_matcher = FuzzyMatcher(index)
+        self.indexing = True
         self.query_string: str = "_"
 
         super().__init__()
@@ -280,6 +670,7 @@ class QueryApp(App[None]):
         yield SuggestionBox(id="suggestion-box")
         yield SectionHeader("Results", id="results-header")
         yield ResultDisplay(id="result-display")
+        yield ResultTree("_", id="result-tree")
         yield StatusBar(id="status-bar")
         yield Footer()
 
@@ -290,6 +681,93 @@ class QueryApp(App[None]):
         status_bar.set_status(
             "Type a Python expression to query the data. Press Enter to exit."
         )
+        if self.loader is None:
+            self._start_indexing()
+            return
+
+        self.push_screen(LoadingScreen())
+        # A plain daemon thread rather than a worker: a parser stuck in C
+        # cannot be interrupted, and must not keep the process alive once
+        # the user has cancelled.
+        threading.Thread(
+            target=self._load_in_thread, args=(self.loader,), daemon=True
+        ).start()
+
+    def _load_in_thread(self, loader: Callable[[ProgressFunc], Any]) -> None:
+        """Load the document and hand it to the app; runs in a thread."""
+        try:
+            data = loader(self._report_load_progress)
+        except Exception as e:
+            if not self._load_cancelled.is_set():
+                self._call_from_loader(self._load_failed, e)
+        else:
+            self._call_from_loader(self._load_finished, data)
+
+    def _call_from_loader(self, callback: Callable[..., Any], *args: Any) -> None:
+        """Run a callback on the event loop, unless the app has exited."""
+        try:
+            self.call_from_thread(callback, *args)
+        except RuntimeError:
+            pass
+
+    def _report_load_progress(self, read: int, size: int | None) -> None:
+        """Record load progress; stops the load once it is cancelled."""
+        if self._load_cancelled.is_set():
+            raise DocumentLoadError("Loading cancelled")
+        self.load_progress = (read, size)
+
+    def _load_finished(self, data: Any) -> None:
+        """Make the loaded document queryable."""
+        self.data = data
+        self.loaded = True
+        self.pop_screen()
+        self._start_indexing()
+        query = self.query_one("#query-input", QueryInput).value
+        if query.strip():
+            self._evaluate_and_display(query)
+
+    def _load_failed(self, error: Exception) -> None:
+        """Exit, leaving the load error for the caller to report."""
+        self.load_error = error
+        self.exit(return_code=1)
+
+    def _start_indexing(self) -> None:
+        """Build the completion index in the background.
+
+        Lazy and out-of-core documents are not walked, which would load their
+        whole structure: paths are listed as they are completed instead.
+        """
+        if isinstance(self.data, (LazyMapping, LazySequence)):
+            self.fuzzy_matcher = FuzzyMatcher(
+                LazyPathIndex(max_indices=self.max_indices)
+            )
+        self.run_worker(self._build_index(), group="index", exit_on_error=False)
+
+    async def _build_index(self) -> None:
+        """Build the completion index a chunk at a time on the event loop.
+
+        The UI stays responsive while the document is walked, and the
+        suggestions for the current query are refreshed as paths are added.
+        """
+        suggestion_box = self.query_one("#suggestion-box", SuggestionBox)
+        suggestion_box.set_indexing(True)
+        refreshed = time.monotonic()
+        try:
+            for _count in self.fuzzy_matcher.index.build(self.data):
+                await asyncio.sleep(0)
+                if time.monotonic() - refreshed >= _INDEX_REFRESH_INTERVAL:
+                    self._refresh_suggestions()
+                    refreshed = time.monotonic()
+        finally:
+            self.indexing = False
+            suggestion_box.set_indexing(False)
+            self._refresh_suggestions()
+
+    def _refresh_suggestions(self) -> None:
+        """Update the suggestions for the query currently in the input."""
+        query = self.query_one("#query-input", QueryInput).value
+        if query.strip():
+            self._update_suggestions(query)
 
     def _update_suggestions(self, query: str) -> None:
         """Update suggestion box immediately (no debounce)."""
@@ -298,16 +776,96 @@ class QueryApp(App[None]):
         suggestion_box.update_suggestions(suggestions)
 
     def _evaluate_and_display(self, query: str) -> None:
-        """Evaluate query and update result display."""
-        result_display = self.query_one("#result-display", ResultDisplay)
+        """Evaluate query in a worker thread and display the result when done.
+
+        Any evaluation still in flight is cancelled, and only the outcome of
+        the latest query is ever displayed.
+        """
+        self._abandon_evaluation()
+        self.query_one("#status-bar", StatusBar).start_busy("Evaluating…")
+        self.run_worker(
+            partial(self._evaluate_in_thread, query, self._eval_generation),
+            group="evaluate",
+            exclusive=True,
+            thread=True,
+            exit_on_error=False,
+        )
+
+    def _evaluate_in_thread(self, query: str, generation: int) -> _Evaluation | None:
+        """Evaluate a query; runs in a worker thread.
+
+        Generators in the result are drained here so the query itself never
+        runs on the event loop; everything else is formatted as displayed.
+
+        Evaluations run one at a time, so a cancelled evaluation has stopped
+        before the next one touches the document.
+
+        Returns:
+            The outcome, or None if the evaluation was cancelled or superseded
+        """
+        thread_id = threading.get_ident()
         try:
-            result = evaluate_query(query, self.data)
-            result_display.update_result(result, is_error=False)
-            self.query_string = query
-            self.final_result = result
-        except QueryEvaluationError as e:
-            result_display.update_result(str(e), is_error=True)
+            with self._eval_run_lock:
+                if generation != self._eval_generation:
+                    return None
+                with self._eval_lock:
+                    self._eval_thread = thread_id
+                try:
+                    if needs_supervision(query, self.budget):
+                        result = run_with_budget(
+                            partial(self._evaluate, query), self.budget
+                        )
+                    else:
+                        result = self._evaluate(query)
+                    return _Evaluation(generation, query, result, None)
+                except EvaluationCancelled:
+                    raise
+                except QueryEvaluationError as e:
+                    return _Evaluation(generation, query, None, str(e))
+                finally:
+                    with self._eval_lock:
+                        if self._eval_thread == thread_id:
+                            self._eval_thread = None
+        except EvaluationCancelled:
+            return None
+
+    def _evaluate(self, query: str) -> Any:
+        """Evaluate a query, draining a generator result into a list."""
+        result = self._evaluator.evaluate(query, self.data)
+        if isinstance(result, Iterator):
+            result = list(result)
+        return result
+
+    def _abandon_evaluation(self) -> None:
+        """Cancel the evaluation in flight and ignore its outcome."""
+        self._eval_generation += 1
+        with self._eval_lock:
+            if self._eval_thread is not None:
+                cancel_evaluation(self._eval_thread)
+                self._eval_thread = None
+
+    def on_worker_state_changed(self, event: Worker.StateChanged) -> None:
+        """Display the outcome of the latest evaluation.
+
+        Args:
+            event: Worker state changed event
+        """
+        worker = event.worker
+        if worker.group != "evaluate" or event.state != WorkerState.SUCCESS:
+            return
+
+        evaluation = worker.result
+        if evaluation is None or evaluation.generation != self._eval_generation:
+            return
+
+        self.query_one("#status-bar", StatusBar).stop_busy()
+        if evaluation.error is not None:
+            self._show_message(evaluation.error, is_error=True)
             self.final_result = None
+        else:
+            self._show_result(evaluation.result)
+            self.query_string = evaluation.query
+            self.final_result = evaluation.result
 
     def on_input_changed(self, event: QueryInput.Changed) -> None:
         """Handle input changes for real-time evaluation with debouncing.
@@ -315,14 +873,18 @@ class QueryApp(App[None]):
         Args:
             event: Input changed event
         """
+        if not self.loaded:
+            return
+
         query = event.value
-        result_display = self.query_one("#result-display", ResultDisplay)
 
         if not query.strip():
-            result_display.update_result("")
+            self._show_message("")
             self.query_one("#suggestion-box", SuggestionBox).update_suggestions([])
             self.final_result = None
             self._cancel_eval_timer()
+            self._abandon_evaluation()
+            self.query_one("#status-bar", StatusBar).stop_busy()
             return
 
         self._update_suggestions(query)
@@ -352,10 +914,57 @@ class QueryApp(App[None]):
 
         self._eval_timer = self.set_timer(_DEBOUNCE_DELAY, _debounced_eval)
 
+    def _show_result(self, result: Any) -> None:
+        """Show a result in the active result view.
+
+        Args:
+            result: Result to display
+        """
+        self._has_result = True
+        tree = self.query_one("#result-tree", ResultTree)
+        display = self.query_one("#result-display", ResultDisplay)
+        tree.display = self.tree_view
+        display.display = not self.tree_view
+        if self.tree_view:
+            tree.show_result(result)
+        else:
+            display.update_result(result)
+
+    def _show_message(self, message: str, is_error: bool = False) -> None:
+        """Show an error or message in the text view, whichever view is active.
+
+        Args:
+            message: Message to display
+            is_error: Whether this is an error message
+        """
+        self._has_result = False
+        self.query_one("#result-tree", ResultTree).display = False
+        display = self.query_one("#result-display", ResultDisplay)
+        display.display = True
+        display.update_result(message, is_error=is_error)
+
+    def action_toggle_tree(self) -> None:
+        """Switch between the text and tree views of the current result.
+
+        The query is not evaluated again; the view shows the result the
+        latest evaluation produced. The tree takes focus for navigation, and
+        toggling back returns focus to the query input.
+        """
+        self.tree_view = not self.tree_view
+        if self._has_result:
+            self._show_result(self.final_result)
+        if self.tree_view and self._has_result:
+            self.query_one("#result-tree", ResultTree).focus()
+        else:
+            self.query_one("#query-input", QueryInput).focus()
+
     def action_accept_query(self) -> None:
         """Accept the current query and exit."""
+        self._abandon_evaluation()
         self.exit(return_code=0)
 
     async def action_quit(self) -> None:
-        """Quit without printing."""
+        """Quit without printing, cancelling a load in progress."""
+        self._load_cancelled.set()
+        self._abandon_evaluation()
         self.exit(return_code=130)
@@ -1,3 +1,5 @@
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any
 from enum import StrEnum
 
 
@@ -6,3 +8,69 @@ class FileTypes(StrEnum):
     yaml = "yaml"
     xml = "xml"
     toml = "toml"
+    jsonl = "jsonl"
+
+
+class LazyMapping(Mapping):
+    """Read-only mapping whose values are loaded on demand.
+
+    Output treats it like a dict, so results serialize as JSON objects, and
+    merging it with | gives a dict.
+    """
+
+    def __or__(self, other: object) -> Any:
+        if isinstance(other, Mapping):
+            return self.materialize() | dict(other)
+        return NotImplemented
+
+    def __ror__(self, other: object) -> Any:
+        if isinstance(other, Mapping):
+            return dict(other) | self.materialize()
+        return NotImplemented
+
+    def materialize(self) -> dict[Any, Any]:
+        """Load the whole mapping as a dict."""
+        return dict(self.items())
+
+    def iter_structure(self) -> Iterator[tuple[Any, Any]]:
+        """Yield (key, value) pairs for walking the shape of the data.
+
+        Implementations may yield None in place of scalar values so that
+        walking the structure does not load them.
+        """
+        yield from self.items()
+
+
+class LazySequence(Sequence):
+    """Read-only sequence whose items are loaded on demand.
+
+    Output treats it like a list, so results serialize as JSON arrays, and
+    concatenating it with + gives a list.
+    """
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, LazySequence)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __add__(self, other: object) -> Any:
+        if isinstance(other, (list, LazySequence)):
+            return list(self) + list(other)
+        return NotImplemented
+
+    def __radd__(self, other: object) -> Any:
+        if isinstance(other, (list, LazySequence)):
+            return list(other) + list(self)
+        return NotImplemented
+
+    def materialize(self) -> list[Any]:
+        """Load the whole sequence as a list."""
+        return list(self)
+
+    def iter_structure(self) -> Iterator[tuple[int, Any]]:
+        """Yield (index, item) pairs for walking the shape of the data.
+
+        Implementations may yield None in place of scalar items so that
+        walking the structure does not load them.
+        """
+        yield from enumerate(self)
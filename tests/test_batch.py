@@ -0,0 +1,137 @@
+"""Test batch mode."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from pq.batch import common_static_path, iter_batch, read_queries, run_batch_query
+from pq.output import OutputFormatter
+
+
+def run_cli(*args: str, stdin: str | None = None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "pq.cli", *args],
+        input=stdin,
+        capture_output=True,
+        text=True,
+    )
+
+
+def records(output: str) -> list[dict]:
+    return [json.loads(line) for line in output.splitlines()]
+
+
+class TestReadQueries:
+    def test_skips_blank_and_comment_lines(self, tmp_path):
+        file = tmp_path / "queries.txt"
+        file.write_text("# names\n_['a']\n\n  _['b']  \n")
+        assert read_queries(file) == ["_['a']", "_['b']"]
+
+
+class TestCommonStaticPath:
+    def test_shared_prefix(self):
+        queries = ["_['spec']['a'][0]", "[c for c in _['spec']['a']]"]
+        assert common_static_path(queries) == ("spec", "a")
+
+    def test_disjoint_paths(self):
+        assert common_static_path(["_['a']", "_['b']"]) == ()
+
+    def test_no_queries(self):
+        assert common_static_path([]) == ()
+
+
+class TestRunBatchQuery:
+    def test_result(self, test_data):
+        record = run_batch_query("_['metadata']['version']", test_data)
+        assert json.loads(record.line) == {
+            "query": "_['metadata']['version']",
+            "result": test_data["metadata"]["version"],
+        }
+        assert not record.failed
+
+    def test_error(self, test_data):
+        record = run_batch_query("_['missing']", test_data)
+        assert record.failed
+        assert "missing" in json.loads(record.line)["error"]
+
+    def test_generator_error_is_recorded(self, test_data):
+        record = run_batch_query("(i['missing'] for i in _['items'])", test_data)
+        assert record.failed
+
+    def test_unserializable_result(self, test_data):
+        record = run_batch_query("[len]", test_data)
+        assert record.failed
+        assert "not JSON serializable" in json.loads(record.line)["error"]
+
+    def test_tuple_written_as_array(self, test_data):
+        record = run_batch_query("(1, 2)", test_data)
+        assert json.loads(record.line)["result"] == [1, 2]
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("set([3, 1, 2])", [1, 2, 3]),
+            ("{i['name'] for i in _['items']}", ["Alice", "Bob", "Charlie"]),
+            ("[{1}, set()]", [[1], []]),
+        ],
+    )
+    def test_set_written_as_sorted_array(self, test_data, query, expected):
+        record = run_batch_query(query, test_data)
+        assert not record.failed
+        assert json.loads(record.line)["result"] == expected
+
+    def test_frozenset_written_as_array(self):
+        line = OutputFormatter.format_labeled_record({"result": frozenset("ba")})
+        assert json.loads(line)["result"] == ["a", "b"]
+
+    def test_set_of_mixed_types_written_as_array(self, test_data):
+        record = run_batch_query("{1, 'a'}", test_data)
+        assert sorted(json.loads(record.line)["result"], key=str) == [1, "a"]
+
+
+class TestIterBatch:
+    @pytest.mark.parametrize("jobs", [1, 3])
+    def test_records_in_query_order(self, test_data, jobs):
+        queries = [f"_['items'][{i}]['name']" for i in range(3)] * 4
+        lines = [record.line for record in iter_batch(queries, test_data, jobs)]
+        assert [json.loads(line)["query"] for line in lines] == queries
+        assert [json.loads(line)["result"] for line in lines[:3]] == [
+            item["name"] for item in test_data["items"]
+        ]
+
+
+class TestBatchCLI:
+    def test_repeated_query_option(self, test_data_path, test_data):
+        result = run_cli(
+            "-q", "_['metadata']", "-q", "len(_['items'])", str(test_data_path)
+        )
+        assert result.returncode == 0, result.stderr
+        assert records(result.stdout) == [
+            {"query": "_['metadata']", "result": test_data["metadata"]},
+            {"query": "len(_['items'])", "result": len(test_data["items"])},
+        ]
+
+    def test_queries_file(self, tmp_path, test_data_path):
+        queries = tmp_path / "queries.txt"
+        queries.write_text("_['items'][0]['name']\n_['items'][1]['name']\n")
+        result = run_cli("--queries", str(queries), "--jobs", "2", str(test_data_path))
+        assert result.returncode == 0, result.stderr
+        assert [r["result"] for r in records(result.stdout)] == ["Alice", "Bob"]
+
+    def test_stdin(self):
+        result = run_cli("-j", "-q", "_['k']", stdin='{"k": 1}')
+        assert records(result.stdout) == [{"query": "_['k']", "result": 1}]
+
+    def test_failed_query_sets_exit_code(self, test_data_path):
+        result = run_cli("-q", "_['missing']", "-q", "1", str(test_data_path))
+        assert result.returncode == 1
+        assert [sorted(r) for r in records(result.stdout)] == [
+            ["error", "query"],
+            ["query", "result"],
+        ]
+
+    def test_query_argument_rejected(self, test_data_path):
+        result = run_cli("_", str(test_data_path), "-q", "_")
+        assert result.returncode == 2
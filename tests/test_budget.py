@@ -0,0 +1,210 @@
+"""Test CPU time and memory budgets for query evaluation."""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from pq import budget as budget_module
+from pq import lazy
+from pq.budget import Budget, needs_supervision, run_with_budget
+from pq.config import load_config
+from pq.evaluator import QueryEvaluationError, evaluate_query
+from pq.lazy import LazyDocument
+from pq.store import DocumentStore
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork"), reason="budgets are enforced in forked workers"
+)
+
+
+class TestBudget:
+    def test_disabled_by_default(self):
+        assert not Budget().enabled
+
+    def test_str(self):
+        assert str(Budget(2, 512)) == "2s / 512MB"
+        assert str(Budget(memory=64)) == "64MB"
+
+    def test_paths_run_in_process(self):
+        budget = Budget(cpu_time=1)
+        assert not needs_supervision("_['items'][0]", budget)
+        assert needs_supervision("len(_['items'])", budget)
+        assert not needs_supervision("len(_['items'])", Budget())
+
+
+class TestRunWithBudget:
+    def test_result_returned(self, test_data):
+        result = run_with_budget(
+            lambda: evaluate_query("[i['age'] for i in _['items']]", test_data),
+            Budget(cpu_time=5, memory=256),
+        )
+        assert result == [30, 25, 35]
+
+    def test_unlimited_runs_in_process(self):
+        assert run_with_budget(os.getpid, Budget()) == os.getpid()
+
+    def test_runs_in_worker(self):
+        assert run_with_budget(os.getpid, Budget(cpu_time=5)) != os.getpid()
+
+    def test_error_reraised(self, test_data):
+        with pytest.raises(QueryEvaluationError, match="Key 'missing' not found"):
+            run_with_budget(
+                lambda: evaluate_query("len(_['missing'])", test_data),
+                Budget(cpu_time=5),
+            )
+
+    def test_cpu_time_exceeded(self):
+        with pytest.raises(QueryEvaluationError, match="exceeded 1s: .*CPU time"):
+            run_with_budget(
+                lambda: evaluate_query("sum(x for x in range(10**12))", {}),
+                Budget(cpu_time=1),
+            )
+
+    def test_memory_exceeded(self):
+        with pytest.raises(QueryEvaluationError, match="exceeded 64MB: .*memory"):
+            run_with_budget(
+                lambda: evaluate_query("len(list(range(10**9)))", {}),
+                Budget(memory=64),
+            )
+
+    def test_wall_clock_deadline(self, monkeypatch):
+        monkeypatch.setattr(budget_module, "_WALL_CLOCK_FACTOR", 0)
+        monkeypatch.setattr(budget_module, "_WALL_CLOCK_GRACE", 0.2)
+        start = time.monotonic()
+        with pytest.raises(QueryEvaluationError, match="0.2s of wall-clock time"):
+            run_with_budget(lambda: time.sleep(30), Budget(cpu_time=1))
+        assert time.monotonic() - start < 10
+
+    def test_wall_clock_deadline_without_cpu_limit(self, monkeypatch):
+        monkeypatch.setattr(budget_module, "_WALL_CLOCK_DEFAULT", 0.2)
+        start = time.monotonic()
+        with pytest.raises(QueryEvaluationError, match="0.2s of wall-clock time"):
+            run_with_budget(lambda: time.sleep(30), Budget(memory=512))
+        assert time.monotonic() - start < 10
+
+    def test_killed_worker_not_reported_as_cpu_time(self):
+        with pytest.raises(QueryEvaluationError, match="SIGKILL") as error:
+            run_with_budget(
+                lambda: os.kill(os.getpid(), signal.SIGKILL), Budget(cpu_time=5)
+            )
+        assert "CPU time" not in str(error.value)
+
+    def test_lazy_result_materialized(self, tmp_path, monkeypatch):
+        # Keep every container a proxy, however small.
+        monkeypatch.setattr(lazy, "MATERIALIZE_MAX_BYTES", 0)
+        file = tmp_path / "doc.json"
+        file.write_text(json.dumps({"items": [{"n": 1, "tags": ["a"]}, {"n": 2}]}))
+        data = LazyDocument(file).root()
+        result = run_with_budget(
+            lambda: evaluate_query("[r for r in _['items'] if r['n']]", data),
+            Budget(cpu_time=5),
+        )
+        assert result == [{"n": 1, "tags": ["a"]}, {"n": 2}]
+        assert type(result[0]) is dict
+        assert type(result[0]["tags"]) is list
+
+    def test_out_of_core_worker_gets_own_connection(self, tmp_path):
+        file = tmp_path / "doc.json"
+        file.write_text(json.dumps({"items": [{"n": i} for i in range(5)]}))
+        store = DocumentStore.open(file, tmp_path / "stores")
+        data = store.root()
+        inherited = store._conn
+
+        def query():
+            assert store._conn is not inherited
+            return evaluate_query("sum(r['n'] for r in _['items'])", data)
+
+        assert run_with_budget(query, Budget(cpu_time=5)) == 10
+        # The parent keeps using its own connection.
+        assert store._conn is inherited
+        assert evaluate_query("_['items'][4]['n']", data) == 4
+        store.close()
+
+    def test_lazy_document_lock_not_inherited_held(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(lazy, "MATERIALIZE_MAX_BYTES", 0)
+        file = tmp_path / "doc.json"
+        file.write_text(json.dumps({"items": [{"n": 1}, {"n": 2}]}))
+        document = LazyDocument(file)
+        data = document.root()
+        locked = threading.Event()
+
+        def hold_lock():
+            with document.lock:
+                locked.set()
+                time.sleep(0.3)
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        locked.wait(5)
+        # The fork waits for the lock, instead of the worker inheriting it
+        # held by a thread that does not exist in the child.
+        result = run_with_budget(
+            lambda: evaluate_query("[r['n'] for r in _['items']]", data),
+            Budget(cpu_time=5),
+        )
+        holder.join()
+        assert result == [1, 2]
+
+    def test_unpicklable_result(self):
+        with pytest.raises(QueryEvaluationError, match="type function"):
+            run_with_budget(lambda: evaluate_query("lambda: 1", {}), Budget(cpu_time=5))
+
+
+class TestBudgetConfig:
+    def test_limits_loaded(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / ".pq-cli.toml").write_text(
+            "[limits]\ncpu_time = 2\nmemory_mb = 512\n"
+        )
+        config = load_config()
+        assert config.cpu_time_limit == 2
+        assert config.memory_limit_mb == 512
+
+    def test_unlimited_by_default(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / ".pq-cli.toml").write_text('[theme]\nname = "nord"\n')
+        config = load_config()
+        assert config.cpu_time_limit is None
+        assert config.memory_limit_mb is None
+
+
+class TestBudgetCLI:
+    def test_cpu_limit_option(self, test_data_path):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pq.cli",
+                "--cpu-limit",
+                "1",
+                "sum(x for x in range(10**12))",
+                str(test_data_path),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 1
+        assert "exceeded 1s" in result.stderr
+
+    def test_query_within_budget(self, test_data_path):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pq.cli",
+                "--memory-limit",
+                "256",
+                "len(_['items'])",
+                str(test_data_path),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == "3\n"
@@ -0,0 +1,156 @@
+"""Test persistent parse cache."""
+
+import os
+
+import pytest
+
+from pq.cache import ParseCache
+from pq.config import Config, load_config
+from pq.loader import ParserBackend, _parsers, available_parsers, load_document
+from pq.types import FileTypes
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParseCache(tmp_path / "cache", max_size_bytes=1024 * 1024)
+
+
+@pytest.fixture
+def document(tmp_path):
+    file = tmp_path / "doc.json"
+    file.write_text('{"items": [1, 2, 3]}')
+    return file
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, file_path):
+        self.calls += 1
+        return load_document(file_path)
+
+
+class TestParseCache:
+    def test_second_load_is_cached(self, cache, document):
+        loader = CountingLoader()
+        assert cache.load(document, loader) == {"items": [1, 2, 3]}
+        assert cache.load(document, loader) == {"items": [1, 2, 3]}
+        assert loader.calls == 1
+
+    def test_modified_file_is_reparsed(self, cache, document):
+        loader = CountingLoader()
+        cache.load(document, loader)
+        document.write_text('{"items": [4]}')
+        stat = document.stat()
+        os.utime(document, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert cache.load(document, loader) == {"items": [4]}
+        assert loader.calls == 2
+
+    def test_corrupt_entry_is_a_miss(self, cache, document):
+        loader = CountingLoader()
+        cache.load(document, loader)
+        for entry in cache.cache_dir.iterdir():
+            entry.write_bytes(b"garbage")
+        assert cache.load(document, loader) == {"items": [1, 2, 3]}
+        assert loader.calls == 2
+
+    @pytest.mark.parametrize(
+        "corrupted",
+        [
+            pytest.param(b"\x80\x04\x8c\x03\xff\xff\xff.", id="UnicodeDecodeError"),
+            pytest.param(b"cno_such_module\nname\n.", id="ModuleNotFoundError"),
+            pytest.param(b"cos\nno_such_attr\n.", id="AttributeError"),
+            pytest.param(b"\x80\x04)R.", id="UnpicklingError"),
+        ],
+    )
+    def test_entry_failing_to_unpickle_is_replaced(self, cache, document, corrupted):
+        loader = CountingLoader()
+        cache.load(document, loader)
+        (entry,) = cache.cache_dir.iterdir()
+        entry.write_bytes(corrupted)
+        assert cache.load(document, loader) == {"items": [1, 2, 3]}
+        assert cache.load(document, loader) == {"items": [1, 2, 3]}
+        assert loader.calls == 2
+
+    def test_unreadable_entry_removed_when_not_rewritten(
+        self, cache, document, monkeypatch
+    ):
+        loader = CountingLoader()
+        cache.load(document, loader)
+        (entry,) = cache.cache_dir.iterdir()
+        entry.write_bytes(b"cos\nno_such_attr\n.")
+        monkeypatch.setattr(cache, "_store", lambda entry, data: None)
+        assert cache.load(document, loader) == {"items": [1, 2, 3]}
+        assert not entry.exists()
+
+    def test_least_recently_used_entry_evicted(self, tmp_path):
+        files = []
+        for i in range(3):
+            file = tmp_path / f"doc{i}.json"
+            file.write_text(f'{{"value": "{"x" * 400}", "id": {i}}}')
+            files.append(file)
+
+        cache = ParseCache(tmp_path / "cache", max_size_bytes=1000)
+        for i, file in enumerate(files):
+            cache.load(file, load_document)
+            entry = cache._entry_path(file)
+            os.utime(entry, ns=(i * 1_000_000_000, i * 1_000_000_000))
+
+        assert not cache._entry_path(files[0]).exists()
+        assert cache._entry_path(files[2]).exists()
+
+    def test_switching_parser_backend_reparses(self, cache, tmp_path, monkeypatch):
+        # A backend that loses precision on wide integers, as some orjson
+        # releases do.
+        def lossy(text):
+            return {"big": float(123456789012345678901234567890)}
+
+        monkeypatch.setitem(
+            _parsers(FileTypes.json), "lossy", ParserBackend(lossy, lambda f: lossy(f))
+        )
+        file = tmp_path / "big.json"
+        file.write_text('{"big": 123456789012345678901234567890}')
+
+        def load(parser):
+            return cache.load(file, lambda path: load_document(path, parser), parser)
+
+        assert load("lossy") == {"big": 1.2345678901234568e29}
+        assert load("json") == {"big": 123456789012345678901234567890}
+        assert type(load("json")["big"]) is int
+        assert cache._entry_path(file, "lossy") != cache._entry_path(file, "json")
+
+    def test_default_parser_shares_entry_with_named_one(self, cache, tmp_path):
+        file = tmp_path / "doc.json"
+        file.write_text("{}")
+        default = available_parsers(FileTypes.json)[0]
+        assert cache._entry_path(file) == cache._entry_path(file, default)
+
+    def test_unsupported_file_left_to_loader(self, cache, tmp_path):
+        file = tmp_path / "doc.csv"
+        file.write_text("a,b")
+        assert cache.load(file, lambda path: "parsed") == "parsed"
+
+    def test_entry_larger_than_budget_not_stored(self, tmp_path, document):
+        cache = ParseCache(tmp_path / "cache", max_size_bytes=1)
+        assert cache.load(document, load_document) == {"items": [1, 2, 3]}
+        assert list(cache.cache_dir.glob("*.pickle")) == []
+
+
+class TestCacheConfig:
+    def test_cache_disabled_by_default(self):
+        assert ParseCache.from_config(Config(theme=None)) is None
+
+    def test_cache_settings_loaded(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / ".pq-cli.toml").write_text(
+            '[cache]\nenabled = true\ndir = "cachedir"\nmax_size_mb = 8\n'
+        )
+        config = load_config()
+        assert config.cache_enabled is True
+        assert config.cache_max_size_mb == 8
+
+        cache = ParseCache.from_config(config)
+        assert cache is not None
+        assert cache.cache_dir.name == "cachedir"
+        assert cache.max_size_bytes == 8 * 1024 * 1024
@@ -0,0 +1,230 @@
+"""Test column-wise storage of record arrays."""
+
+from array import array
+import json
+import pickle
+import subprocess
+import sys
+
+import pytest
+
+from pq.columnar import (
+    MIN_ROWS,
+    ColumnarRecords,
+    RowView,
+    aggregate_column,
+    to_columnar,
+)
+from pq.evaluator import QueryEvaluationError, evaluate_query
+from pq.output import OutputFormatter
+
+
+def metrics(rows: int = 20) -> list[dict]:
+    return [
+        {
+            "host": f"web{i % 3}",
+            "cpu": i * 0.5,
+            "requests": i * 10,
+            "healthy": i % 4 != 0,
+            "labels": {"zone": "a" if i % 2 else "b"},
+        }
+        for i in range(rows)
+    ]
+
+
+@pytest.fixture
+def document():
+    return {"metrics": metrics(), "name": "export"}
+
+
+@pytest.fixture
+def columnar(document):
+    return to_columnar(json.loads(json.dumps(document)))
+
+
+class TestToColumnar:
+    def test_record_array_stored_by_column(self, columnar):
+        records = columnar["metrics"]
+        assert isinstance(records, ColumnarRecords)
+        assert records.keys == ("host", "cpu", "requests", "healthy", "labels")
+        assert isinstance(records._columns["cpu"], array)
+        assert isinstance(records._columns["requests"], array)
+
+    def test_repeated_strings_shared(self, columnar):
+        hosts = columnar["metrics"]._columns["host"]
+        assert hosts[0] is hosts[3]
+
+    def test_booleans_kept(self, columnar):
+        assert columnar["metrics"][1]["healthy"] is True
+
+    def test_nested_arrays_converted(self):
+        data = to_columnar({"a": [{"b": metrics()}]})
+        assert isinstance(data["a"][0]["b"], ColumnarRecords)
+
+    @pytest.mark.parametrize(
+        "records",
+        [
+            metrics(MIN_ROWS - 1),
+            metrics() + [{"host": "x"}],
+            metrics() + [[1]],
+            [{"a": 1, "b": 2}] * 4 + [{"b": 2, "a": 1}] * 4,
+            [{}] * MIN_ROWS,
+        ],
+    )
+    def test_other_lists_kept(self, records):
+        assert type(to_columnar(records)) is list
+
+    def test_values_round_trip(self, document, columnar):
+        assert columnar["metrics"].materialize() == document["metrics"]
+        assert columnar["metrics"] == document["metrics"]
+
+    def test_large_integers_kept(self):
+        records = [{"n": 2**70 + i} for i in range(MIN_ROWS)]
+        assert to_columnar(records).materialize() == records
+
+    def test_mixed_numbers_keep_their_type(self):
+        records = [{"n": i if i % 2 else float(i)} for i in range(MIN_ROWS)]
+        values = [r["n"] for r in to_columnar(records)]
+        assert [type(v) for v in values] == [type(r["n"]) for r in records]
+
+
+class TestColumnarRecords:
+    def test_indexing(self, columnar, document):
+        records = columnar["metrics"]
+        assert records[-1] == document["metrics"][-1]
+        assert records[2:5] == document["metrics"][2:5]
+        with pytest.raises(IndexError):
+            records[len(records)]
+        with pytest.raises(TypeError, match="not str"):
+            records["cpu"]
+
+    def test_row_view(self, columnar):
+        row = columnar["metrics"][1]
+        assert isinstance(row, RowView)
+        assert list(row) == ["host", "cpu", "requests", "healthy", "labels"]
+        assert row.get("missing") is None
+        with pytest.raises(KeyError):
+            row["missing"]
+
+    def test_row_pickled_as_dict(self, columnar):
+        row = pickle.loads(pickle.dumps(columnar["metrics"][1]))
+        assert type(row) is dict
+        assert row["cpu"] == 0.5
+
+    def test_output_matches_list(self, columnar, document):
+        assert OutputFormatter.format_output(
+            columnar["metrics"]
+        ) == OutputFormatter.format_output(document["metrics"])
+        assert "".join(OutputFormatter.iter_chunks(columnar)) == "".join(
+            OutputFormatter.iter_chunks(document)
+        )
+
+
+class TestQueries:
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "sum(r['cpu'] for r in _['metrics'])",
+            "sum([r['requests'] for r in _['metrics']])",
+            "min(r['host'] for r in _['metrics'])",
+            "max(r['healthy'] for r in _['metrics'])",
+            "max(r['requests'] for r in _['metrics'][5:])",
+            "sum(column(_['metrics'], 'requests'))",
+            "len(column(_['metrics'], 'cpu'))",
+            "sorted(column(_['metrics'], 'cpu'))[-3:]",
+            "len(_['metrics'])",
+            "[r['host'] for r in _['metrics'] if r['labels']['zone'] == 'a']",
+            "Counter(r['host'] for r in _['metrics'])",
+            "{r['host']: r for r in _['metrics']}",
+            "_['metrics'][3]['labels']['zone']",
+            "sum(r['cpu'] for r in _['metrics'] if r['healthy'])",
+        ],
+    )
+    def test_matches_list_of_dicts(self, document, columnar, query):
+        assert evaluate_query(query, columnar) == evaluate_query(query, document)
+
+    @pytest.mark.parametrize(
+        "query,message",
+        [
+            ("sum(r['nope'] for r in _['metrics'])", "Key 'nope' not found"),
+            ("max(r['host'] for r in _['metrics'][:0])", "empty"),
+            ("column(_['metrics'], 'nope')", "Key 'nope' not found"),
+        ],
+    )
+    def test_errors_match_list_of_dicts(self, document, columnar, query, message):
+        for data in (document, columnar):
+            with pytest.raises(QueryEvaluationError, match=message):
+                evaluate_query(query, data)
+
+    def test_aggregate_does_not_touch_records(self, columnar, monkeypatch):
+        monkeypatch.setattr(
+            RowView, "__getitem__", lambda self, key: pytest.fail("record read")
+        )
+        query = "sum(r['requests'] for r in _['metrics'])"
+        assert evaluate_query(query, columnar) == 1900
+
+    def test_other_functions_get_the_values(self, columnar):
+        assert aggregate_column(list, columnar["metrics"], "requests") == [
+            r["requests"] for r in metrics()
+        ]
+
+
+class TestOperators:
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "[r | {'extra': 1} for r in _['metrics']]",
+            "{'extra': 1} | _['metrics'][2]",
+            "_['metrics'][2] | _['metrics'][3]",
+            "_['metrics'] + [1]",
+            "[0] + _['metrics'][:2]",
+            "_['metrics'][:2] + _['metrics'][-1:]",
+            "_['metrics'][1] == {**_['metrics'][1]}",
+            "[isinstance(_['metrics'], list), isinstance(_['metrics'][0], dict)]",
+            "isinstance(_['metrics'][0], (list, int))",
+            "isinstance(_['metrics'], dict | tuple)",
+        ],
+    )
+    def test_match_list_of_dicts(self, document, columnar, query):
+        assert evaluate_query(query, columnar) == evaluate_query(query, document)
+
+    def test_results_are_plain(self, columnar):
+        merged = evaluate_query("_['metrics'][0] | {}", columnar)
+        assert type(merged) is dict
+        assert type(evaluate_query("_['metrics'] + []", columnar)) is list
+
+    def test_unsupported_operand(self, columnar):
+        with pytest.raises(QueryEvaluationError, match="unsupported operand"):
+            evaluate_query("_['metrics'] + (1,)", columnar)
+
+
+class TestColumnarCLI:
+    def test_option(self, tmp_path):
+        doc = tmp_path / "metrics.json"
+        doc.write_text(json.dumps({"metrics": metrics()}))
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pq.cli",
+                "--columnar",
+                "[sum(r['requests'] for r in _['metrics']), _['metrics'][1]]",
+                str(doc),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout) == [1900, metrics()[1]]
+
+    @pytest.mark.parametrize("option", ["--lazy", "--out-of-core"])
+    def test_rejects_unloaded_documents(self, tmp_path, option):
+        doc = tmp_path / "metrics.json"
+        doc.write_text(json.dumps({"metrics": metrics()}))
+        result = subprocess.run(
+            [sys.executable, "-m", "pq.cli", "--columnar", option, "_", str(doc)],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode != 0
+        assert "cannot be combined with --lazy or --out-of-core" in result.stderr
@@ -1,8 +1,28 @@
 """Test path completion and fuzzy matching."""
 
+import json
+
 import pytest
 
-from pq.completion import FuzzyMatcher, PathExtractor
+from pq import completion, lazy
+from pq.completion import (
+    ANY_INDEX,
+    LAZY_NODE_CACHE_SIZE,
+    FieldStats,
+    FuzzyMatcher,
+    LazyPathIndex,
+    PathExtractor,
+    PathIndex,
+    SchemaIndex,
+    fuzzy_score,
+    parse_path,
+)
+from pq.lazy import LazyDocument
+
+
+def path_depth(path):
+    """Count the subscripts of a complete path."""
+    return len(parse_path(path[1:])[0])
 
 
 @pytest.fixture
@@ -44,14 +64,14 @@ class TestNextLevelSuggestions:
         matches = matcher.find_matches("_")
         assert "_['items']" in matches
         assert "_['metadata']" in matches
-        assert all(matcher._get_path_depth(m) == 1 for m in matches)
+        assert all(path_depth(m) == 1 for m in matches)
 
     def test_complete_key_shows_array_indices(self, matcher):
         matches = matcher.find_matches("_['items']")
         assert "_['items'][0]" in matches
         assert "_['items'][1]" in matches
         assert "_['items'][2]" in matches
-        assert all(matcher._get_path_depth(m) == 2 for m in matches)
+        assert all(path_depth(m) == 2 for m in matches)
 
     def test_complete_index_shows_nested_keys(self, matcher):
         matches = matcher.find_matches("_['items'][0]")
@@ -59,12 +79,12 @@ class TestNextLevelSuggestions:
         assert "_['items'][0]['age']" in matches
         assert "_['items'][0]['city']" in matches
         assert "_['items'][0]['active']" in matches
-        assert all(matcher._get_path_depth(m) == 3 for m in matches)
+        assert all(path_depth(m) == 3 for m in matches)
 
     def test_partial_key_fuzzy_match(self, matcher):
         matches = matcher.find_matches("_['ite")
         assert "_['items']" in matches
-        assert all(matcher._get_path_depth(m) == 1 for m in matches)
+        assert all(path_depth(m) == 1 for m in matches)
 
     def test_out_of_bounds_index(self, matcher):
         matches = matcher.find_matches("_['items'][10]")
@@ -75,9 +95,164 @@ class TestNextLevelSuggestions:
         assert "_['metadata']['count']" in matches
         assert "_['metadata']['version']" in matches
         assert "_['metadata']['updated']" in matches
-        assert all(matcher._get_path_depth(m) == 2 for m in matches)
+        assert all(path_depth(m) == 2 for m in matches)
 
     def test_partial_nested_key(self, matcher):
         matches = matcher.find_matches("_['items'][0]['n")
         assert "_['items'][0]['name']" in matches
-        assert all(matcher._get_path_depth(m) == 3 for m in matches)
+        assert all(path_depth(m) == 3 for m in matches)
+
+
+class TestPathIndex:
+    def test_children_lookup(self, test_data):
+        index = PathIndex.from_data(test_data)
+        assert list(index.children([])) == ["items", "metadata"]
+        assert list(index.children(["items"])) == [0, 1, 2]
+        assert "name" in index.children(["items", 0])
+        assert index.children(["items", 0, "name"]) is None
+        assert index.children(["missing"]) is None
+
+    def test_paths_round_trip(self, test_data):
+        paths = PathExtractor(test_data).get_paths()
+        assert list(PathIndex.from_paths(paths).iter_paths()) == paths
+
+    def test_matcher_accepts_index(self, test_data, matcher):
+        indexed = FuzzyMatcher(PathIndex.from_data(test_data))
+        for query in ["_", "_['items']", "_['items'][0]['a", "_['metadata']['v"]:
+            assert indexed.find_matches(query) == matcher.find_matches(query)
+
+    def test_build_in_chunks(self):
+        data = {"a": list(range(10)), "b": {"c": 1}}
+        index = PathIndex()
+        counts = []
+        for count in index.build(data, chunk_size=4):
+            counts.append(count)
+            assert index.children([]) is not None
+        assert counts == [4, 8, 12]
+        assert index.root == PathIndex.from_data(data).root
+
+    def test_quoted_keys(self):
+        index = PathIndex.from_data({"it's": {"a]b": 1}})
+        paths = list(index.iter_paths())
+        assert paths == ['_["it\'s"]', "_[\"it's\"]['a]b']"]
+        matcher = FuzzyMatcher(index)
+        assert matcher.find_matches(paths[0]) == [paths[1]]
+
+
+RECORDS = {
+    "items": [
+        {"id": i, "tags": ["a"], **({"email": "e@example.com"} if i % 2 else {})}
+        for i in range(1000)
+    ]
+}
+
+
+class TestSchemaIndex:
+    def test_list_elements_collapse(self):
+        index = SchemaIndex.from_data(RECORDS, max_indices=5)
+        assert list(index.children(["items"])) == [ANY_INDEX, 0, 1, 2, 3, 4]
+        assert list(index.children(["items", ANY_INDEX])) == ["id", "tags", "email"]
+
+    def test_unenumerated_index_uses_merged_shape(self):
+        matcher = FuzzyMatcher(SchemaIndex.from_data(RECORDS, max_indices=5))
+        assert matcher.find_matches("_['items']") == [
+            f"_['items'][{i}]" for i in range(5)
+        ]
+        assert matcher.find_matches("_['items'][998]['e") == [
+            "_['items'][998]['email']"
+        ]
+        assert matcher.get_keys_at_path("_['items'][500]") == ["email", "id", "tags"]
+
+    def test_field_stats(self):
+        index = SchemaIndex.from_data(RECORDS)
+        assert index.field_stats(["items", 7, "email"]) == FieldStats(500, {"str": 500})
+        assert index.field_stats(["items", 0, "tags", 0]) == FieldStats(
+            1000, {"str": 1000}
+        )
+        assert index.field_stats(["items"]) == FieldStats(1, {"list": 1})
+        assert index.field_stats(["missing"]) is None
+
+    def test_mixed_element_types(self):
+        index = SchemaIndex.from_data({"values": [1, {"a": None}, "x"]})
+        assert index.field_stats(["values", 0]) == FieldStats(
+            3, {"int": 1, "dict": 1, "str": 1}
+        )
+        assert index.children(["values", 2]) == {"a": None}
+
+
+class TestLazyPathIndex:
+    @pytest.fixture
+    def root(self, tmp_path, monkeypatch):
+        # Keep every container a proxy, however small.
+        monkeypatch.setattr(lazy, "MATERIALIZE_MAX_BYTES", 0)
+        file = tmp_path / "records.json"
+        file.write_text(json.dumps(RECORDS))
+        return LazyDocument(file).root()
+
+    def test_children_listed_on_demand(self, root):
+        matcher = FuzzyMatcher(LazyPathIndex.from_data(root, max_indices=5))
+        assert matcher.find_matches("_") == ["_['items']"]
+        assert matcher.find_matches("_['items']") == [
+            f"_['items'][{i}]" for i in range(5)
+        ]
+        assert matcher.find_matches("_['items'][999]['e") == [
+            "_['items'][999]['email']"
+        ]
+        assert matcher.get_keys_at_path("_['items'][0]") == ["id", "tags"]
+        assert matcher.find_matches("_['missing']['a") == []
+        assert matcher.find_matches("_['items']['x']") == []
+
+    def test_only_completed_paths_indexed(self, root, monkeypatch):
+        walked = []
+
+        def iter_entries(obj):
+            walked.append(obj)
+            return iter_entries.wrapped(obj)
+
+        iter_entries.wrapped = completion._iter_entries
+        monkeypatch.setattr(completion, "_iter_entries", iter_entries)
+        matcher = FuzzyMatcher(LazyPathIndex.from_data(root, max_indices=5))
+        for typed in ("_['items'][7]", "_['items'][7]['", "_['items'][7]['t"):
+            matcher.find_matches(typed)
+        # The root and its one key, then item 7 and its three fields.
+        assert len(walked) == 6
+
+    def test_node_cache_bounded(self, root):
+        index = LazyPathIndex.from_data(root)
+        for i in range(LAZY_NODE_CACHE_SIZE + 10):
+            assert index.children(["items", i]) is not None
+        assert len(index._nodes) == LAZY_NODE_CACHE_SIZE
+
+    def test_repeated_lookup_reuses_node(self, root):
+        index = LazyPathIndex.from_data(root)
+        assert index.children(["items", 3]) is index.children(["items", 3])
+
+
+class TestFuzzyRanking:
+    def test_subsequence_match(self):
+        assert fuzzy_score("nm", "name") is not None
+        assert fuzzy_score("mn", "name") is None
+        assert fuzzy_score("", "name") == 0
+
+    def test_prefers_consecutive_and_word_start(self):
+        assert fuzzy_score("ver", "version") > fuzzy_score("ver", "server")
+        assert fuzzy_score("fn", "first_name") > fuzzy_score("fn", "often")
+        assert fuzzy_score("ab", "a_xab") == fuzzy_score("ab", "xyzab")
+
+    def test_case_penalty(self):
+        assert fuzzy_score("id", "id") > fuzzy_score("id", "ID")
+
+    def test_best_matches_first(self):
+        index = PathIndex({"often": None, "last_name": None, "first_name": None})
+        matcher = FuzzyMatcher(index)
+        assert matcher.find_matches("_['fn") == ["_['first_name']", "_['often']"]
+        assert matcher.find_matches("_['fn", max_results=1) == ["_['first_name']"]
+
+    def test_extending_query_refines_previous_matches(self):
+        index = PathIndex({f"key{i}": None for i in range(100)} | {"other": None})
+        matcher = FuzzyMatcher(index)
+        assert len(matcher.find_matches("_['k", max_results=-1)) == 100
+        assert matcher._last_match is not None
+        assert len(matcher._last_match[3]) == 100
+        assert matcher.find_matches("_['key99") == ["_['key99']"]
+        assert matcher.find_matches("_['o") == ["_['other']"]
@@ -0,0 +1,246 @@
+"""Test the query daemon and its client."""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from pq import daemon
+from pq.budget import Budget
+from pq.completion import PathIndex
+from pq.daemon import DaemonError, QueryServer, request_completions, request_query
+from pq.evaluator import QueryEvaluationError
+from pq.loader import DocumentLoadError, load_document
+from pq.output import OutputFormatter
+
+
+class QuietQueryServer(QueryServer):
+    """QueryServer that records request errors instead of printing them."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.errors = []
+
+    def handle_error(self, request, client_address):
+        self.errors.append(sys.exc_info()[1])
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return tmp_path / "daemon.sock"
+
+
+@pytest.fixture
+def loads():
+    return []
+
+
+@pytest.fixture
+def server(socket_path, loads):
+    def loader(path):
+        loads.append(path)
+        return load_document(path)
+
+    server = QuietQueryServer(socket_path, loader)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def query(socket_path, file_path, expression):
+    out = io.BytesIO()
+    request_query(socket_path, file_path, expression, out)
+    return out.getvalue().decode()
+
+
+def local_output(result):
+    return "".join(OutputFormatter.iter_chunks(result))
+
+
+class TestQueries:
+    def test_output_matches_local_run(
+        self, server, socket_path, test_data_path, test_data
+    ):
+        output = query(socket_path, test_data_path, "_['items']")
+        assert output == local_output(test_data["items"])
+
+    def test_generator_result_is_streamed(self, server, socket_path, test_data_path):
+        output = query(socket_path, test_data_path, "(i['age'] for i in _['items'])")
+        assert json.loads(output) == [30, 25, 35]
+
+    def test_document_is_loaded_once(self, server, socket_path, test_data_path, loads):
+        for _ in range(3):
+            query(socket_path, test_data_path, "_['metadata']")
+        assert loads == [test_data_path.resolve()]
+
+    def test_document_reloaded_when_file_changes(
+        self, server, socket_path, tmp_path, loads
+    ):
+        doc = tmp_path / "doc.json"
+        doc.write_text('{"a": 1}')
+        assert query(socket_path, doc, "_['a']") == "1\n"
+
+        doc.write_text('{"a": 22}')
+        stat = doc.stat()
+        os.utime(doc, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert query(socket_path, doc, "_['a']") == "22\n"
+        assert len(loads) == 2
+
+    def test_indexed_filters_follow_reloads(self, socket_path, tmp_path):
+        server = QuietQueryServer(socket_path, load_document, indexed=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            doc = tmp_path / "doc.json"
+            expression = "[r['n'] for r in _ if r['id'] == 'a']"
+            doc.write_text('[{"id": "a", "n": 1}, {"id": "b", "n": 2}]')
+            assert json.loads(query(socket_path, doc, expression)) == [1]
+
+            doc.write_text('[{"id": "b", "n": 1}, {"id": "a", "n": 2}]')
+            stat = doc.stat()
+            os.utime(doc, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            assert json.loads(query(socket_path, doc, expression)) == [2]
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    @pytest.mark.skipif(
+        not hasattr(os, "fork"), reason="budgets are enforced in forked workers"
+    )
+    def test_budget_stops_runaway_query(self, socket_path, test_data_path):
+        server = QuietQueryServer(socket_path, load_document, budget=Budget(cpu_time=1))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with pytest.raises(QueryEvaluationError, match="exceeded 1s"):
+                query(socket_path, test_data_path, "sum(x for x in range(10**10))")
+            output = query(socket_path, test_data_path, "len(_['items'])")
+            assert output == "3\n"
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def test_preload(self, server, test_data_path, loads):
+        server.preload(test_data_path)
+        assert loads == [test_data_path.resolve()]
+
+    def test_query_error(self, server, socket_path, test_data_path):
+        with pytest.raises(QueryEvaluationError, match="missing"):
+            query(socket_path, test_data_path, "_['missing']")
+
+    def test_unserializable_result(self, server, socket_path, test_data_path):
+        with pytest.raises(QueryEvaluationError, match="not JSON serializable"):
+            query(socket_path, test_data_path, "[len]")
+
+    def test_internal_error_not_reported_as_query_error(
+        self, server, socket_path, test_data_path, monkeypatch
+    ):
+        def broken(result):
+            raise RuntimeError("bug")
+
+        monkeypatch.setattr(OutputFormatter, "iter_chunks", broken)
+        with pytest.raises(DaemonError, match="Internal error: RuntimeError"):
+            query(socket_path, test_data_path, "_")
+        # The error is passed on to the server's handler once replied.
+        deadline = time.monotonic() + 5
+        while not server.errors and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [type(e) for e in server.errors] == [RuntimeError]
+
+    def test_least_recently_used_document_dropped(
+        self, server, socket_path, tmp_path, loads, monkeypatch
+    ):
+        monkeypatch.setattr(daemon, "DOCUMENT_CACHE_SIZE", 2)
+        files = []
+        for name in ("a", "b", "c"):
+            file = tmp_path / f"{name}.json"
+            file.write_text(json.dumps({"name": name}))
+            files.append(file.resolve())
+
+        for file in (files[0], files[1], files[0], files[2], files[0], files[1]):
+            query(socket_path, file, "_['name']")
+        # b was dropped when c was loaded, a was kept by its recent use.
+        assert loads == [files[0], files[1], files[2], files[1]]
+
+    def test_load_error(self, server, socket_path, tmp_path):
+        with pytest.raises(DocumentLoadError):
+            query(socket_path, tmp_path / "absent.json", "_")
+
+    def test_completions(self, server, socket_path, test_data_path):
+        suggestions = request_completions(socket_path, test_data_path, "_['meta")
+        assert suggestions[0] == "_['metadata']"
+
+    def test_completion_index_built_outside_document_lock(
+        self, test_data_path, monkeypatch
+    ):
+        document = daemon._ResidentDocument(test_data_path, load_document)
+        building, release = threading.Event(), threading.Event()
+        build = PathIndex.from_data
+
+        def slow_build(data):
+            building.set()
+            release.wait(5)
+            return build(data)
+
+        monkeypatch.setattr(PathIndex, "from_data", slow_build)
+        completer = threading.Thread(target=document.matcher)
+        completer.start()
+        try:
+            assert building.wait(5)
+            assert document._lock.acquire(timeout=2)
+            document._lock.release()
+            assert document.data()["metadata"]["count"] == 3
+        finally:
+            release.set()
+            completer.join()
+        assert document.matcher().find_matches("_['meta") == ["_['metadata']"]
+
+
+class TestServer:
+    def test_no_daemon(self, socket_path, test_data_path):
+        with pytest.raises(DaemonError, match="Cannot connect"):
+            query(socket_path, test_data_path, "_")
+
+    def test_refuses_socket_in_use(self, server, socket_path):
+        with pytest.raises(DaemonError, match="already listening"):
+            QueryServer(socket_path, load_document)
+
+    def test_replaces_stale_socket(self, socket_path):
+        socket_path.touch()
+        server = QueryServer(socket_path, load_document)
+        server.server_close()
+        assert not socket_path.exists()
+
+    def test_socket_is_private(self, server, socket_path):
+        assert socket_path.stat().st_mode & 0o077 == 0
+
+
+class TestCommandDispatch:
+    def run_help(self, cwd, command):
+        result = subprocess.run(
+            [sys.executable, "-m", "pq.cli", command, "--help"],
+            capture_output=True,
+            text=True,
+            cwd=cwd,
+        )
+        assert result.returncode == 0, result.stderr
+        return result.stdout
+
+    @pytest.mark.parametrize("command", ["serve", "client"])
+    def test_daemon_command(self, tmp_path, command):
+        assert f"pq-cli {command}" in self.run_help(tmp_path, command)
+
+    @pytest.mark.parametrize("command", ["serve", "client"])
+    def test_file_of_same_name_is_a_document(self, tmp_path, command):
+        (tmp_path / command).write_text("{}")
+        assert "Run a query against a document" in self.run_help(tmp_path, command)
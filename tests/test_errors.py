@@ -1,8 +1,10 @@
 """Test enhanced error messages."""
 
+import ast
+
 import pytest
 
-from pq.evaluator import QueryEvaluationError, evaluate_query
+from pq.evaluator import QueryEvaluationError, _validate_ast, evaluate_query
 
 
 class TestErrorMessages:
@@ -37,3 +39,53 @@ class TestErrorMessages:
     def test_dunder_access_blocked(self, test_data):
         with pytest.raises(QueryEvaluationError, match="dunder"):
             evaluate_query("_.__class__", test_data)
+
+
+class TestBooleanOperators:
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            (
+                "[i['name'] for i in _['items'] if i['age'] > 26 and i['active']]",
+                ["Alice", "Charlie"],
+            ),
+            ("_['metadata']['count'] == 3 or 1 / 0", True),
+            ("not _['items'] or len(_['items'])", 3),
+            ("[] and 1 / 0", []),
+        ],
+    )
+    def test_and_or_allowed(self, test_data, query, expected):
+        assert evaluate_query(query, test_data) == expected
+
+    def test_other_operator_rejected(self):
+        tree = ast.parse("a and b", mode="eval")
+        tree.body.op = ast.BitAnd()
+        with pytest.raises(QueryEvaluationError, match="'BitAnd' is not allowed"):
+            _validate_ast(tree)
+
+
+class TestPathErrors:
+    def test_missing_key_names_parent(self, test_data):
+        with pytest.raises(
+            QueryEvaluationError, match=r"Key 'nope' not found in _\['items'\]\[0\]\."
+        ):
+            evaluate_query("_['items'][0]['nope']", test_data)
+
+    def test_index_error_reports_length(self, test_data):
+        with pytest.raises(
+            QueryEvaluationError, match=r"_\['items'\] has 3 items, so \[7\]"
+        ):
+            evaluate_query("_['items'][7]", test_data)
+
+    def test_subscript_on_scalar_names_segment(self, test_data):
+        with pytest.raises(
+            QueryEvaluationError,
+            match=r"brackets on _\['items'\]\[0\]\['age'\] \(type int\)",
+        ):
+            evaluate_query("_['items'][0]['age']['x']", test_data)
+
+    def test_wrong_key_type(self, test_data):
+        with pytest.raises(
+            QueryEvaluationError, match=r"Type mismatch at _\['items'\]\['name'\]"
+        ):
+            evaluate_query("_['items']['name']", test_data)
@@ -35,6 +35,12 @@ def test_single_toml_flag():
     assert result == FileTypes.toml
 
 
+def test_single_jsonl_flag():
+    """Test with only JSON Lines flag set."""
+    result = consolidate_file_type_flags(False, False, False, False, True)
+    assert result == FileTypes.jsonl
+
+
 def test_multiple_flags_raises_error():
     """Test that multiple flags raise an error."""
     with pytest.raises(Exception) as exc_info:
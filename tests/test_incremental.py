@@ -0,0 +1,171 @@
+"""Test incremental evaluation with memoized sub-expressions."""
+
+from collections.abc import Iterator
+
+import pytest
+
+from pq.evaluator import IncrementalEvaluator, QueryEvaluationError, evaluate_query
+
+
+class CountingDict(dict):
+    """dict that counts lookups of each key."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lookups: dict = {}
+
+    def __getitem__(self, key):
+        self.lookups[key] = self.lookups.get(key, 0) + 1
+        return super().__getitem__(key)
+
+
+@pytest.fixture
+def evaluator():
+    return IncrementalEvaluator()
+
+
+class TestResults:
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "_",
+            "_['items'][0]['name']",
+            "[r['name'] for r in _['items'] if r['age'] > 25]",
+            "sorted(_['items'], key=lambda r: r['age'])[0]['name']",
+            "len(_['items']) + 1",
+            "_['items'][0]['age'] < 40 < 20",
+            "{**_['metadata'], 'extra': 1}",
+            "[*_['items'][:1], None]",
+            "_['items'][1:][0]['city']",
+            "Counter(r['city'] for r in _['items'])",
+            "{r['name']: r['age'] for r in _['items']}",
+            "[(a['name'], b['name']) for a in _['items'] for b in _['items']]",
+        ],
+    )
+    def test_matches_evaluate_query(self, evaluator, test_data, query):
+        for _ in range(2):
+            assert evaluator.evaluate(query, test_data) == evaluate_query(
+                query, test_data
+            )
+
+    def test_generator_result(self, evaluator, test_data):
+        result = evaluator.evaluate("(r['age'] for r in _['items'])", test_data)
+        assert isinstance(result, Iterator)
+        assert list(result) == [30, 25, 35]
+        result = evaluator.evaluate("(r['age'] for r in _['items'])", test_data)
+        assert list(result) == [30, 25, 35]
+
+    @pytest.mark.parametrize(
+        "query,message",
+        [
+            ("[r for r in _['nope']]", "Key 'nope' not found"),
+            ("len(_['items'][9])", "Index out of range"),
+            ("x", "'x' is not available"),
+            ("_['items'][0]['age'] + 'x'", "Type mismatch"),
+        ],
+    )
+    def test_errors(self, evaluator, test_data, query, message):
+        with pytest.raises(QueryEvaluationError, match=message):
+            evaluator.evaluate(query, test_data)
+
+    def test_skipped_operand_not_evaluated(self, evaluator, test_data):
+        query = "_['items'] if 1 else _['nope']"
+        assert evaluator.evaluate(query, test_data) == test_data["items"]
+        assert evaluator.evaluate("0 if len(_) else _['nope']", test_data) == 0
+        assert evaluator.evaluate("1 > 2 > _['nope']", test_data) is False
+        assert evaluator.evaluate("[x for x in [] for y in _['nope']]", test_data) == []
+
+
+class TestReuse:
+    def test_path_resumes_from_longest_prefix(self, evaluator):
+        inner = CountingDict(b=CountingDict(c=1))
+        data = CountingDict(a=inner)
+        evaluator.evaluate("_['a']", data)
+        evaluator.evaluate("_['a']['b']", data)
+        evaluator.evaluate("_['a']['b']['c']", data)
+        assert data.lookups == {"a": 1}
+        assert inner.lookups == {"b": 1}
+
+    def test_comprehension_iterable_reused_across_filter_edits(self, evaluator):
+        data = CountingDict(items=list(range(10)))
+        assert evaluator.evaluate("[x for x in _['items'] if x > 7]", data) == [8, 9]
+        assert evaluator.evaluate("[x for x in _['items'] if x > 8]", data) == [9]
+        assert data.lookups == {"items": 1}
+
+    def test_call_result_reused(self, evaluator, test_data):
+        ordered = evaluator.evaluate(
+            "sorted(_['items'], key=lambda r: r['age'])", test_data
+        )
+        reused = evaluator.evaluate(
+            "[r for r in sorted(_['items'], key=lambda r: r['age']) if r['age'] > 0]",
+            test_data,
+        )
+        assert reused == ordered
+        nested = evaluator.evaluate(
+            "[sorted(_['items'],   key=lambda r: r['age'])]", test_data
+        )
+        assert nested[0] is ordered
+
+    def test_new_document_clears_memo(self, evaluator):
+        assert evaluator.evaluate("_['a']", {"a": 1}) == 1
+        assert evaluator.evaluate("_['a']", {"a": 2}) == 2
+
+    def test_mutating_query_not_memoized(self, evaluator):
+        data = CountingDict(items=[3, 1, 2])
+        evaluator.evaluate("sorted(_['items']).sort()", data)
+        evaluator.evaluate("sorted(_['items']).sort()", data)
+        assert data.lookups == {"items": 2}
+
+    def test_defaultdict_not_memoized(self, evaluator):
+        data = {"a": [1]}
+        queries = [
+            "defaultdict(list, _)",
+            "defaultdict(list, _)['x']",
+            "defaultdict(list, _)",
+            "[defaultdict(list, _)][0]['y']",
+            "[defaultdict(list, _)]",
+        ]
+        for query in queries:
+            expected = evaluate_query(query, data)
+            assert evaluator.evaluate(query, data) == expected
+
+    def test_memo_is_bounded(self, test_data):
+        evaluator = IncrementalEvaluator(max_entries=2)
+        data = CountingDict(a=1, b=2, c=3)
+        for key in "abc":
+            evaluator.evaluate(f"_['{key}']", data)
+        evaluator.evaluate("_['a']", data)
+        assert data.lookups["a"] == 2
+        evaluator.evaluate("_['c']", data)
+        assert data.lookups["c"] == 1
+
+    def test_result_larger_than_budget_not_memoized(self):
+        evaluator = IncrementalEvaluator(max_bytes=10_000)
+        data = {"items": list(range(5000))}
+        first = evaluator.evaluate("sorted(_['items'])", data)
+        second = evaluator.evaluate("sorted(_['items'])", data)
+        assert first == second
+        assert first is not second
+        assert evaluator._memo_bytes < 10_000
+
+    def test_small_result_memoized(self):
+        evaluator = IncrementalEvaluator(max_bytes=10_000)
+        data = {"items": list(range(50))}
+        first = evaluator.evaluate("sorted(_['items'])", data)
+        assert evaluator.evaluate("sorted(_['items'])", data) is first
+
+    def test_memo_is_bounded_by_size(self):
+        evaluator = IncrementalEvaluator(max_bytes=20_000)
+        data = {"items": list(range(1000))}
+        for step in range(1, 6):
+            evaluator.evaluate(f"_['items'][::{step}]", data)
+            assert evaluator._memo_bytes <= 20_000
+        sizes = [size for _, size in evaluator._memo.values()]
+        assert sum(sizes) == evaluator._memo_bytes
+
+    def test_document_paths_take_no_budget(self):
+        evaluator = IncrementalEvaluator(max_bytes=1)
+        data = CountingDict(items=list(range(5000)))
+        evaluator.evaluate("_['items']", data)
+        evaluator.evaluate("_['items']", data)
+        assert data.lookups == {"items": 1}
@@ -0,0 +1,174 @@
+"""Test hash indexes for equality filters over record lists."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from pq.evaluator import QueryEvaluationError, evaluate_query
+from pq.index import clear_indexes, index_by, select_equal
+
+
+class CountingDict(dict):
+    """dict that counts lookups of each key."""
+
+    lookups = 0
+
+    def __getitem__(self, key):
+        CountingDict.lookups += 1
+        return super().__getitem__(key)
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes():
+    clear_indexes()
+    yield
+    clear_indexes()
+
+
+@pytest.fixture
+def records():
+    return {"items": [{"id": i % 5, "n": i} for i in range(20)]}
+
+
+class TestIndexBy:
+    def test_groups_records_in_order(self, records):
+        index = index_by(records["items"], "id")
+        assert [r["n"] for r in index[3]] == [3, 8, 13, 18]
+        assert len(index) == 5
+        assert index.get("missing") is None
+
+    def test_cached_per_list_and_key(self, records):
+        items = [CountingDict(r) for r in records["items"]]
+        index_by(items, "id")
+        before = CountingDict.lookups
+        index_by(items, "id")
+        assert CountingDict.lookups == before
+        index_by(items, "n")
+        assert CountingDict.lookups == before + len(items)
+
+    def test_rebuilt_when_list_grows(self):
+        items = [{"id": 1}]
+        assert len(index_by(items, "id")) == 1
+        items.append({"id": 2})
+        assert len(index_by(items, "id")) == 2
+
+    def test_builtin(self, records):
+        result = evaluate_query("index_by(_['items'], 'id')[4][0]['n']", records)
+        assert result == 4
+
+    def test_missing_key(self, records):
+        with pytest.raises(QueryEvaluationError, match="Key 'nope' not found"):
+            evaluate_query("index_by(_['items'], 'nope')", records)
+
+    def test_not_a_list(self):
+        with pytest.raises(QueryEvaluationError, match="needs a list of records"):
+            evaluate_query("index_by(_['a'], 'id')", {"a": {"id": 1}})
+
+    def test_serialized_as_object(self):
+        result = evaluate_query("index_by(_['a'], 'k')", {"a": [{"k": "x"}]})
+        assert result.materialize() == {"x": [{"k": "x"}]}
+
+
+class TestIndexedFilters:
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "[r['n'] for r in _['items'] if r['id'] == 3]",
+            "[r['n'] for r in _['items'] if 3 == r['id']]",
+            "[r['n'] for r in _['items'] if r['id'] == 3 and r['n'] > 5]",
+            "[r['n'] for r in _['items']"
+            " if r['id'] == 3 and r['n'] > 5 and r['n'] < 15]",
+            "[r['n'] for r in _['items'] if r['id'] in (4, 1, 1.0, True)]",
+            "[r['n'] for r in _['items'] if r['id'] in {2: 'x'}]",
+            "[r['n'] for r in _['items'] if r['id'] == 3 if r['n'] > 5]",
+            "[r['n'] for r in _['items'] if r['id'] == 9]",
+            "[r['n'] for r in _['items'] if r['id'] == [3]]",
+            "[r['n'] for r in _['items'] if r['id'] in [[3], 3]]",
+            "{r['n'] for r in _['items'] if r['id'] == 3}",
+            "{r['n']: r for r in _['items'] if r['id'] == 0}",
+            "sum(r['n'] for r in _['items'] if r['id'] == 2)",
+            "[[r['n'] for r in _['items'] if r['id'] == o['id']]"
+            " for o in _['items'][:3]]",
+            "[r['n'] for r in _['items'][::2] if r['id'] == len(_['items']) - 18]",
+            "[r for r in _['items'][:0] if r['id'] == _['nope']]",
+        ],
+    )
+    def test_matches_scan(self, records, query):
+        expected = evaluate_query(query, records)
+        assert evaluate_query(query, records, indexed=True) == expected
+        # Second run answers from the cached index.
+        assert evaluate_query(query, records, indexed=True) == expected
+
+    @pytest.mark.parametrize(
+        "query,message",
+        [
+            ("[r for r in _['mixed'] if r['id'] == 1]", "Key 'id' not found"),
+            ("[r for r in _['items'] if r['id'] in 'abc']", "requires string"),
+            ("[r for r in _['items'] if r['id'] == _['nope']]", "Key 'nope' not found"),
+        ],
+    )
+    def test_errors_match_scan(self, query, message):
+        data = {"mixed": [{"id": 1}, {}], "items": [{"id": 1}]}
+        for indexed in (False, True):
+            with pytest.raises(QueryEvaluationError, match=message):
+                evaluate_query(query, data, indexed=indexed)
+
+    def test_generator_over_lazy_iterable_is_scanned(self):
+        query = "[r for r in map(dict, _) if r['id'] == 1]"
+        data = [{"id": 1}, {"id": 2}]
+        assert evaluate_query(query, data, indexed=True) == [{"id": 1}]
+
+    def test_repeated_filter_does_not_scan(self, records):
+        data = {"items": [CountingDict(r) for r in records["items"]]}
+        query = "[r['n'] for r in _['items'] if r['id'] == 1]"
+        evaluate_query(query, data, indexed=True)
+        before = CountingDict.lookups
+        assert evaluate_query(query, data, indexed=True) == [1, 6, 11, 16]
+        # Only the selected records' 'n' is looked up.
+        assert CountingDict.lookups == before + 4
+
+    def test_filter_on_loop_variable_not_rewritten(self):
+        data = {"items": [{"a": 1, "b": 1}, {"a": 1, "b": 2}]}
+        query = "[r['b'] for r in _['items'] if r['a'] == r['b']]"
+        assert evaluate_query(query, data, indexed=True) == [1]
+
+    def test_unhashable_values_are_scanned(self):
+        data = {"items": [{"id": [1]}, {"id": [2]}, {"id": 2}]}
+        query = "[r for r in _['items'] if r['id'] == [2]]"
+        assert evaluate_query(query, data, indexed=True) == [{"id": [2]}]
+
+    def test_unexpected_errors_not_swallowed(self):
+        class Broken(dict):
+            def __getitem__(self, key):
+                raise RuntimeError("broken record")
+
+        with pytest.raises(RuntimeError, match="broken record"):
+            select_equal([Broken()], "k", lambda: 1)
+
+    def test_operand_evaluated_once(self):
+        selected = select_equal([{"k": 1}, {"k": 2}], "k", iter([2]).__next__)
+        assert list(selected) == [{"k": 2}]
+
+
+class TestIndexCLI:
+    def test_batch_option(self, test_data_path):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pq.cli",
+                "--index",
+                "-q",
+                "[r['age'] for r in _['items'] if r['name'] == 'Bob']",
+                "-q",
+                "[r['age'] for r in _['items'] if r['name'] in ('Alice', 'Charlie')]",
+                str(test_data_path),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        results = [json.loads(line)["result"] for line in result.stdout.splitlines()]
+        assert results == [[25], [30, 35]]
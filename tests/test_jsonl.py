@@ -0,0 +1,81 @@
+"""Test JSON Lines streaming mode."""
+
+import io
+import subprocess
+import sys
+
+import pytest
+
+from pq.loader import DocumentLoadError, iter_records, load_document, records_from_file
+
+
+class TestIterRecords:
+    def test_records_parsed_one_per_line(self):
+        lines = io.StringIO('{"id": 1}\n{"id": 2}\n')
+        assert list(iter_records(lines, "test")) == [{"id": 1}, {"id": 2}]
+
+    def test_blank_lines_skipped(self):
+        lines = io.StringIO('{"id": 1}\n\n   \n{"id": 2}')
+        assert list(iter_records(lines, "test")) == [{"id": 1}, {"id": 2}]
+
+    def test_invalid_record_reports_line(self):
+        lines = io.StringIO('{"id": 1}\n{"id": }\n')
+        with pytest.raises(DocumentLoadError, match="at line 2"):
+            list(iter_records(lines, "test"))
+
+    def test_records_are_lazy(self):
+        records = iter_records(iter(['{"id": 1}\n', "not json\n"]), "test")
+        assert next(records) == {"id": 1}
+
+
+class TestRecordsFromFile:
+    def test_stream_from_file(self, tmp_path):
+        file = tmp_path / "events.jsonl"
+        file.write_text('{"id": 1}\n{"id": 2}\n')
+        assert list(records_from_file(file)) == [{"id": 1}, {"id": 2}]
+
+    def test_missing_file_raises_immediately(self, tmp_path):
+        with pytest.raises(DocumentLoadError, match="File not found"):
+            records_from_file(tmp_path / "missing.jsonl")
+
+    def test_load_document_returns_list(self, tmp_path):
+        file = tmp_path / "events.jsonl"
+        file.write_text('{"id": 1}\n{"id": 2}\n')
+        assert load_document(file_path=file) == [{"id": 1}, {"id": 2}]
+
+
+class TestStreamingCLI:
+    def test_jsonl_flag_evaluates_per_record(self):
+        result = subprocess.run(
+            [sys.executable, "-m", "pq.cli", "-l", "_['id']"],
+            input='{"id": 1}\n{"id": 2}\n{"id": 3}\n',
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0
+        assert result.stdout.splitlines() == ["1", "2", "3"]
+
+    def test_jsonl_file_output_is_one_line_per_record(self, tmp_path):
+        file = tmp_path / "events.jsonl"
+        file.write_text('{"a": {"b": 1}}\n{"a": {"b": 2}}\n')
+        result = subprocess.run(
+            [sys.executable, "-m", "pq.cli", "_['a']", str(file)],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0
+        assert result.stdout.splitlines() == ['{"b": 1}', '{"b": 2}']
+
+    @pytest.mark.parametrize(
+        "option", [["--lazy"], ["--index"], ["--cpu-limit", "1"], ["--columnar"]]
+    )
+    def test_whole_document_options_rejected(self, tmp_path, option):
+        file = tmp_path / "events.jsonl"
+        file.write_text('{"a": 1}\n')
+        result = subprocess.run(
+            [sys.executable, "-m", "pq.cli", *option, "_['a']", str(file)],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 2
+        assert "cannot be used with JSON Lines input" in result.stderr
@@ -0,0 +1,149 @@
+"""Test lazy memory-mapped JSON documents."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from pq import lazy as lazy_module
+from pq.completion import PathExtractor
+from pq.evaluator import QueryEvaluationError, evaluate_query
+from pq.lazy import LazyDocument, LazyJSONArray, LazyJSONObject
+from pq.loader import DocumentLoadError
+from pq.output import OutputFormatter
+
+DOCUMENT = {
+    "meta": {"version": "1.0", "count": 3},
+    "items": [
+        {"id": "a", "tags": ["x", "y"], "size": 1},
+        {"id": "b", "tags": [], "size": 2},
+        {"id": "c", "tags": ["z"], "size": 3},
+    ],
+    "empty": {},
+}
+
+
+@pytest.fixture(autouse=True)
+def small_nodes(monkeypatch):
+    monkeypatch.setattr(lazy_module, "MATERIALIZE_MAX_BYTES", 16)
+
+
+@pytest.fixture
+def document_file(tmp_path):
+    file = tmp_path / "doc.json"
+    file.write_text(json.dumps(DOCUMENT, indent=2))
+    return file
+
+
+@pytest.fixture
+def root(document_file):
+    return LazyDocument(document_file).root()
+
+
+class TestLazyDocument:
+    def test_root_is_lazy(self, root):
+        assert isinstance(root, LazyJSONObject)
+        assert isinstance(root["items"], LazyJSONArray)
+        assert len(root) == 3
+
+    def test_access_scans_only_preceding_items(self, root):
+        assert root["items"][0]["id"] == "a"
+        assert len(root["items"]._starts) == 1
+
+    def test_key_lookup_skips_sibling_values(self, root):
+        assert root["meta"]["version"] == "1.0"
+        assert len(root._starts) == 3
+        assert len(root["items"]._starts) == 0
+
+    def test_repeated_key_keeps_last(self, tmp_path):
+        file = tmp_path / "repeated.json"
+        file.write_text('{"a": 1, "b": {"c": 1, "c": 2}, "a": 2}')
+        root = LazyDocument(file).root()
+        assert root["a"] == 2
+        assert root["b"]["c"] == 2
+        assert list(root) == ["a", "b"]
+        assert root.materialize() == json.loads(file.read_text())
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "_['meta']['version']",
+            "_['items'][2]['id']",
+            "_['items'][-1]",
+            "_['items'][1:]",
+            "_['items'][::2]",
+            "[i['id'] for i in _['items'] if i['size'] > 1]",
+            "sum(i['size'] for i in _['items'])",
+            "len(_['items'])",
+            "list(_.keys())",
+            "'meta' in _",
+            "_['empty']",
+            "sorted(_['items'], key=lambda i: -i['size'])[0]",
+        ],
+    )
+    def test_queries_match_in_memory(self, root, query):
+        assert evaluate_query(query, root) == evaluate_query(query, DOCUMENT)
+
+    @pytest.mark.parametrize(
+        "query", ["_['missing']", "_['items'][10]", "_['items']['id']"]
+    )
+    def test_errors_match_in_memory(self, root, query):
+        with pytest.raises(QueryEvaluationError) as lazy_error:
+            evaluate_query(query, root)
+        with pytest.raises(QueryEvaluationError) as memory_error:
+            evaluate_query(query, DOCUMENT)
+        assert str(lazy_error.value) == str(memory_error.value)
+
+    def test_output_serializes_proxies(self, root):
+        assert json.loads(OutputFormatter.format_output(root)) == DOCUMENT
+        assert (
+            json.loads(OutputFormatter.format_output(root["items"]))
+            == (DOCUMENT["items"])
+        )
+
+    def test_nodes_are_reused(self, root):
+        assert root["items"] is root["items"]
+
+    def test_path_extractor_walks_proxies(self, root):
+        assert PathExtractor(root).get_paths() == PathExtractor(DOCUMENT).get_paths()
+
+    def test_scalar_document(self, tmp_path):
+        file = tmp_path / "scalar.json"
+        file.write_text(" 42 ")
+        assert LazyDocument(file).root() == 42
+
+    def test_invalid_json_raises_on_access(self, tmp_path):
+        file = tmp_path / "bad.json"
+        file.write_text('{"items": [1, 2}')
+        root = LazyDocument(file).root()
+        with pytest.raises(DocumentLoadError, match="Invalid JSON"):
+            list(root["items"])
+
+    def test_empty_file_raises(self, tmp_path):
+        file = tmp_path / "empty.json"
+        file.write_text("")
+        with pytest.raises(DocumentLoadError, match="Invalid JSON"):
+            LazyDocument(file)
+
+    def test_non_json_rejected(self, tmp_path):
+        file = tmp_path / "doc.yaml"
+        file.write_text("a: 1")
+        with pytest.raises(DocumentLoadError, match="JSON files only"):
+            LazyDocument(file)
+
+    def test_cli_lazy_flag(self, document_file):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pq.cli",
+                "--lazy",
+                "_['items'][1]",
+                str(document_file),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0
+        assert json.loads(result.stdout) == DOCUMENT["items"][1]
@@ -1,8 +1,12 @@
 """Test output formatting."""
 
 import json
+import subprocess
+import sys
 
+import pytest
 
+from pq.evaluator import QueryEvaluationError, evaluate_query
 from pq.output import OutputFormatter
 
 
@@ -56,3 +60,47 @@ class TestFormatOutput:
     def test_unknown_type_output(self):
         result = OutputFormatter.format_output({1, 2, 3})
         assert "set" in result or "{" in result
+
+
+class TestStreamingOutput:
+    def test_pieces_match_format_output(self, test_data):
+        for value in (test_data, test_data["items"], [], {}, "text", 1, None):
+            streamed = "".join(OutputFormatter.iter_output(value))
+            assert streamed == OutputFormatter.format_output(value)
+
+    def test_generator_streams_as_array(self, test_data):
+        items = test_data["items"]
+        pieces = OutputFormatter.iter_output(item for item in items)
+        assert json.loads(next(pieces) + "]") == [items[0]]
+        assert "".join(pieces)
+        streamed = "".join(OutputFormatter.iter_output(item for item in items))
+        assert streamed == OutputFormatter.format_output(items)
+
+    def test_empty_generator(self):
+        assert "".join(OutputFormatter.iter_output(iter(()))) == "[]"
+
+    def test_print_to_stdout_writes_bytes(self, capsysbinary, test_data):
+        OutputFormatter.print_to_stdout(item["name"] for item in test_data["items"])
+        output = capsysbinary.readouterr().out
+        assert output.endswith(b"]\n")
+        assert json.loads(output) == [item["name"] for item in test_data["items"]]
+
+    def test_generator_query_from_cli(self, test_data_path, test_data):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pq.cli",
+                "(i['name'] for i in _['items'])",
+                str(test_data_path),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0
+        assert json.loads(result.stdout) == [i["name"] for i in test_data["items"]]
+
+    def test_generator_errors_are_query_errors(self, test_data):
+        result = evaluate_query("(i['missing'] for i in _['items'])", test_data)
+        with pytest.raises(QueryEvaluationError, match="Key 'missing' not found"):
+            "".join(OutputFormatter.iter_output(result))
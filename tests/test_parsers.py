@@ -0,0 +1,168 @@
+"""Test pluggable parser backends."""
+
+import io
+import subprocess
+import sys
+
+import pytest
+
+from pq.loader import (
+    DocumentLoadError,
+    available_parsers,
+    get_parser,
+    load_content,
+    load_document,
+    load_stream,
+    parser_identity,
+)
+from pq.types import FileTypes
+
+
+class TestParserRegistry:
+    def test_pure_python_fallbacks_always_available(self):
+        assert "json" in available_parsers(FileTypes.json)
+        assert "pyyaml" in available_parsers(FileTypes.yaml)
+        assert available_parsers(FileTypes.xml) == ["xmltodict"]
+        assert available_parsers(FileTypes.toml) == ["tomllib"]
+
+    def test_default_json_parser_is_lossless(self):
+        content = '{"big": 123456789012345678901234567890}'
+        result = load_content(content, FileTypes.json, "test")
+        assert result["big"] == 123456789012345678901234567890
+
+    def test_jsonl_uses_json_backends(self):
+        assert available_parsers(FileTypes.jsonl) == available_parsers(FileTypes.json)
+
+    def test_unknown_parser_raises(self):
+        with pytest.raises(DocumentLoadError, match="Parser 'nope' is not available"):
+            get_parser(FileTypes.json, "nope")
+
+    def test_identity_names_backend_and_version(self):
+        python = f"python{sys.version_info.major}.{sys.version_info.minor}"
+        assert parser_identity(FileTypes.json, "json").startswith(f"json-{python}")
+        assert parser_identity(FileTypes.xml).startswith("xmltodict-")
+        assert "unknown" not in parser_identity(FileTypes.yaml, "pyyaml")
+        with pytest.raises(DocumentLoadError):
+            parser_identity(FileTypes.json, "nope")
+
+
+@pytest.mark.parametrize("parser", available_parsers(FileTypes.json))
+class TestJSONBackends:
+    def test_same_result(self, parser):
+        content = '{"a": [1, 2.5, null, true], "b": {"c": "d"}, "e": NaN}'
+        result = load_content(content, FileTypes.json, "test", parser)
+        assert result["a"] == [1, 2.5, None, True]
+        assert result["b"] == {"c": "d"}
+        assert result["e"] != result["e"]
+
+    def test_identical_error_message(self, parser):
+        with pytest.raises(DocumentLoadError) as exc_info:
+            load_content('{"a": }', FileTypes.json, "test", parser)
+        assert str(exc_info.value) == (
+            "Invalid JSON in test: Expecting value at line 1, column 7"
+        )
+
+
+@pytest.mark.parametrize("parser", available_parsers(FileTypes.yaml))
+class TestYAMLBackends:
+    def test_same_result(self, parser):
+        content = "a:\n  - 1\n  - two\nb: {c: true}\n"
+        assert load_content(content, FileTypes.yaml, "test", parser) == {
+            "a": [1, "two"],
+            "b": {"c": True},
+        }
+
+    def test_invalid_yaml_raises(self, parser):
+        with pytest.raises(DocumentLoadError, match="Invalid YAML in test"):
+            load_content("a: [1, 2", FileTypes.yaml, "test", parser)
+
+    def test_unsafe_tags_rejected(self, parser):
+        with pytest.raises(DocumentLoadError):
+            load_content(
+                "!!python/object/apply:os.system ['true']", "yaml", "t", parser
+            )
+
+
+def test_parser_flag():
+    result = subprocess.run(
+        [sys.executable, "-m", "pq.cli", "-j", "--parser", "json", "_['key']"],
+        input='{"key": "value"}',
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    assert "value" in result.stdout
+
+
+class TestStreamLoading:
+    @pytest.mark.parametrize(
+        "suffix,content",
+        [
+            ("json", '{"a": {"b": [1, 2]}}'),
+            ("yaml", "a:\n  b: [1, 2]\n"),
+            ("toml", "[a]\nb = [1, 2]\n"),
+        ],
+    )
+    def test_load_document_from_bytes(self, tmp_path, suffix, content):
+        file = tmp_path / f"doc.{suffix}"
+        file.write_text(content)
+        assert load_document(file_path=file) == {"a": {"b": [1, 2]}}
+
+    def test_xml_parsed_from_stream(self, tmp_path):
+        file = tmp_path / "doc.xml"
+        file.write_text("<root><key>value</key></root>")
+        assert load_document(file_path=file) == {"root": {"key": "value"}}
+
+    @pytest.mark.parametrize("parser", available_parsers(FileTypes.json))
+    def test_json_backends_from_file(self, tmp_path, parser):
+        file = tmp_path / "doc.json"
+        file.write_text('{"a": [1, 2]}')
+        assert load_document(file, parser) == {"a": [1, 2]}
+
+    @pytest.mark.parametrize("parser", available_parsers(FileTypes.json))
+    def test_empty_json_file_raises(self, tmp_path, parser):
+        file = tmp_path / "empty.json"
+        file.write_bytes(b"")
+        with pytest.raises(DocumentLoadError, match="Invalid JSON"):
+            load_document(file, parser)
+
+    def test_invalid_utf8_raises(self, tmp_path):
+        file = tmp_path / "bad.toml"
+        file.write_bytes(b'key = "\xff"\n')
+        with pytest.raises(DocumentLoadError, match="Invalid UTF-8"):
+            load_document(file)
+
+    @pytest.mark.parametrize(
+        "suffix,content",
+        [
+            ("json", '{"a": {"b": [1, 2]}}'),
+            ("yaml", "a:\n  b: [1, 2]\n"),
+            ("toml", "[a]\nb = [1, 2]\n"),
+            ("xml", "<a><b>1</b><b>2</b></a>"),
+        ],
+    )
+    def test_load_document_reports_progress(self, tmp_path, suffix, content):
+        file = tmp_path / f"doc.{suffix}"
+        file.write_text(content)
+        reports = []
+        data = load_document(
+            file, progress=lambda read, size: reports.append((read, size))
+        )
+        assert data == load_document(file)
+        size = file.stat().st_size
+        assert reports[-1] == (size, size)
+        assert [read for read, _ in reports] == sorted(read for read, _ in reports)
+
+    def test_progress_can_abort_load(self, tmp_path):
+        file = tmp_path / "doc.json"
+        file.write_text('{"a": 1}')
+
+        def cancel(read, size):
+            raise DocumentLoadError("Loading cancelled")
+
+        with pytest.raises(DocumentLoadError, match="cancelled"):
+            load_document(file, progress=cancel)
+
+    def test_load_stream(self):
+        stream = io.BytesIO(b"key: value\n")
+        assert load_stream(stream, FileTypes.yaml, "stdin") == {"key": "value"}
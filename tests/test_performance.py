@@ -4,7 +4,8 @@ import time
 
 import pytest
 
-from pq.evaluator import evaluate_query
+from pq import evaluator
+from pq.evaluator import compile_query, evaluate_query
 
 
 class TestPerformance:
@@ -38,3 +39,97 @@ class TestPerformance:
             total += (time.perf_counter() - start) * 1000
         avg = total / len(test_queries)
         assert avg < 100, f"Average time {avg:.2f}ms exceeded 100ms"
+
+
+class CallCounter:
+    """Wrap a function, counting its calls."""
+
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.func(*args, **kwargs)
+
+
+@pytest.fixture
+def spies(monkeypatch):
+    """Count the evaluator's calls to validate, compile and eval."""
+    counters = {
+        "_validate_ast": CallCounter(evaluator._validate_ast),
+        "compile": CallCounter(compile),
+        "eval": CallCounter(eval),
+    }
+    for name, counter in counters.items():
+        monkeypatch.setattr(evaluator, name, counter, raising=False)
+    compile_query.cache_clear()
+    yield counters
+    compile_query.cache_clear()
+
+
+class TestSubscriptFastPath:
+    """The TUI's hot loop: a path typed keystroke by keystroke."""
+
+    TYPED = ("_", "_['items']", "_['items'][0]", "_['items'][0]['name']")
+
+    def test_chain_is_not_compiled_or_evaluated(self, test_data, spies):
+        results = [evaluate_query(query, test_data) for query in self.TYPED]
+        assert results == [
+            test_data,
+            test_data["items"],
+            test_data["items"][0],
+            test_data["items"][0]["name"],
+        ]
+        assert {name: spy.calls for name, spy in spies.items()} == {
+            "_validate_ast": 0,
+            "compile": 0,
+            "eval": 0,
+        }
+
+    def test_other_queries_are_evaluated(self, test_data, spies):
+        assert evaluate_query("len(_['items'])", test_data) == 3
+        assert spies["compile"].calls == 1
+        assert spies["eval"].calls == 1
+
+
+class TestIndexedFilters:
+    """Repeated equality filters, as run in batch mode."""
+
+    def test_repeated_lookups_build_one_index(self, monkeypatch):
+        from pq import index
+
+        index.clear_indexes()
+        build = CallCounter(index._build_positions)
+        scan = CallCounter(index._scan)
+        monkeypatch.setattr(index, "_build_positions", build)
+        monkeypatch.setattr(index, "_scan", scan)
+
+        data = {"items": [{"id": f"id{i}", "n": i} for i in range(10_000)]}
+        queries = [
+            f"[r['n'] for r in _['items'] if r['id'] == 'id{i}']"
+            for i in range(0, 10_000, 100)
+        ]
+        looked_up = [evaluate_query(query, data, indexed=True) for query in queries]
+        index.clear_indexes()
+
+        assert looked_up == [evaluate_query(query, data) for query in queries]
+        assert build.calls == 1
+        assert scan.calls == 0
+
+
+class TestColumnarAggregates:
+    """Aggregates over a key of many records."""
+
+    def test_sum_does_not_iterate_records(self, monkeypatch):
+        from pq.columnar import ColumnarRecords, to_columnar
+
+        rows = [{"host": f"h{i % 10}", "cpu": i * 0.5} for i in range(100_000)]
+        columnar = to_columnar({"rows": [dict(row) for row in rows]})
+        query = "sum(r['cpu'] for r in _['rows'])"
+        expected = evaluate_query(query, {"rows": rows})
+
+        monkeypatch.setattr(
+            ColumnarRecords, "__iter__", lambda self: pytest.fail("records iterated")
+        )
+        assert evaluate_query(query, columnar) == expected
@@ -0,0 +1,160 @@
+"""Test projection pushdown loading."""
+
+import json
+
+import pytest
+
+from pq import projection
+from pq.evaluator import QueryEvaluationError, evaluate_query, extract_static_path
+from pq.loader import DocumentLoadError, load_document
+from pq.projection import load_projected
+
+DOCUMENT = {
+    "spec": {
+        "containers": [
+            {"name": "web", "ports": [80, 443], "env": {"A": "1"}},
+            {"name": "db", "ports": [5432], "env": {}},
+        ],
+        "note": 'brackets ] } [ { and "quotes" \\ inside',
+    },
+    "status": {"phase": "Running", "big": 123456789012345678901234567890},
+    "items": [1, 2.5, None, True, "x"],
+    "unié": "value",
+}
+
+QUERIES = [
+    "_['spec']['containers'][0]",
+    "_['spec']['containers'][1]['name']",
+    "[c['name'] for c in _['spec']['containers']]",
+    "_['spec']['note']",
+    "_['status']['big']",
+    "_['items'][4]",
+    "_['unié']",
+    "len(_['spec']['containers'][0]['ports'])",
+    "_['spec']['containers'][0]['env'].keys()",
+]
+
+ERROR_QUERIES = [
+    "_['missing']",
+    "_['spec']['containers'][5]",
+    "_['spec']['containers']['name']",
+    "_['items'][4]['x']",
+]
+
+
+@pytest.fixture(autouse=True)
+def always_project(monkeypatch):
+    monkeypatch.setattr(projection, "PROJECTION_MIN_SIZE", 0)
+
+
+@pytest.fixture(params=["json", "yaml"])
+def document_file(request, tmp_path):
+    file = tmp_path / f"doc.{request.param}"
+    if request.param == "json":
+        file.write_text(json.dumps(DOCUMENT, indent=2))
+    else:
+        import yaml
+
+        file.write_text(yaml.safe_dump(DOCUMENT, allow_unicode=True))
+    return file
+
+
+class TestExtractStaticPath:
+    def test_simple_path(self):
+        assert extract_static_path("_['a'][0]['b']") == ("a", 0, "b")
+
+    def test_common_prefix(self):
+        assert extract_static_path("_['a']['b'] + _['a']['c']") == ("a",)
+
+    def test_comprehension(self):
+        query = "[c['name'] for c in _['spec']['containers']]"
+        assert extract_static_path(query) == ("spec", "containers")
+
+    def test_bare_document(self):
+        assert extract_static_path("len(_)") == ()
+
+    def test_negative_index_ends_path(self):
+        assert extract_static_path("_['items'][-1]") == ("items",)
+
+    def test_computed_subscript_ends_path(self):
+        assert extract_static_path("_['items'][len(_['items']) - 1]") == ("items",)
+
+    def test_shadowed_underscore(self):
+        assert extract_static_path("[_ for _ in _['items']]") == ()
+        assert extract_static_path("list(map(lambda _: _['x'], [1]))") == ()
+
+    def test_invalid_syntax(self):
+        assert extract_static_path("_['a'") == ()
+
+
+class TestLoadProjected:
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_same_result_as_full_load(self, document_file, query):
+        data = load_projected(document_file, extract_static_path(query))
+        full = load_document(document_file)
+        assert evaluate_query(query, data) == evaluate_query(query, full)
+
+    @pytest.mark.parametrize("query", ERROR_QUERIES)
+    def test_same_error_as_full_load(self, document_file, query):
+        data = load_projected(document_file, extract_static_path(query))
+        full = load_document(document_file)
+        with pytest.raises(QueryEvaluationError) as projected_error:
+            evaluate_query(query, data)
+        with pytest.raises(QueryEvaluationError) as full_error:
+            evaluate_query(query, full)
+        assert str(projected_error.value) == str(full_error.value)
+
+    def test_siblings_not_loaded(self, document_file):
+        data = load_projected(document_file, ("spec", "containers", 1))
+        assert data == {
+            "spec": {"containers": [None, DOCUMENT["spec"]["containers"][1]]}
+        }
+
+    def test_duplicate_json_keys_keep_last(self, tmp_path):
+        file = tmp_path / "dup.json"
+        file.write_text('{"a": {"b": 1}, "a": {"b": 2}}')
+        assert load_projected(file, ("a", "b")) == {"a": {"b": 2}}
+
+    def test_yaml_alias_falls_back(self, tmp_path):
+        file = tmp_path / "alias.yaml"
+        file.write_text("base: &b {x: 1}\nderived:\n  <<: *b\n  y: 2\n")
+        assert load_projected(file, ("derived", "x")) == load_document(file)
+
+    def test_invalid_document_raises(self, tmp_path):
+        file = tmp_path / "bad.json"
+        file.write_text('{"a": [1, 2}')
+        with pytest.raises(DocumentLoadError, match="Invalid JSON"):
+            load_projected(file, ("a",))
+
+    @pytest.mark.parametrize(
+        "skipped",
+        [
+            '"tab\tin string"',
+            '"bad \\x escape"',
+            '"\\u12"',
+            "[1 2]",
+            "[1,]",
+            '{"k" 1}',
+            '{"k": 1,}',
+            "{1: 2}",
+            "01",
+            "1.",
+            "tru",
+            "[{'k': 1}]",
+        ],
+    )
+    def test_invalid_skipped_region_raises(self, tmp_path, skipped):
+        file = tmp_path / "bad.json"
+        file.write_text(f'{{"skipped": {skipped}, "a": [1, 2]}}')
+        with pytest.raises(DocumentLoadError, match="Invalid JSON"):
+            load_projected(file, ("a",))
+
+    def test_invalid_utf8_in_skipped_region_raises(self, tmp_path):
+        file = tmp_path / "bad.json"
+        file.write_bytes(b'{"skipped": "\xff", "a": 1}')
+        with pytest.raises(DocumentLoadError):
+            load_projected(file, ("a",))
+
+    def test_small_files_fully_loaded(self, monkeypatch, document_file):
+        monkeypatch.setattr(projection, "PROJECTION_MIN_SIZE", 1 << 40)
+        assert load_projected(document_file, ("spec",)) == DOCUMENT
@@ -0,0 +1,81 @@
+"""Test compiled query caching."""
+
+import pytest
+
+from pq.evaluator import (
+    QueryEvaluationError,
+    compile_query,
+    evaluate_query,
+    format_path,
+    resolve_path,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    compile_query.cache_clear()
+    yield
+    compile_query.cache_clear()
+
+
+class TestCompiledQueryCache:
+    def test_repeated_query_hits_cache(self, test_data):
+        evaluate_query("_['items'][0]['name']", test_data)
+        evaluate_query("_['items'][0]['name']", test_data)
+        info = compile_query.cache_info()
+        assert info.hits == 1
+        assert info.misses == 1
+
+    def test_cached_query_uses_new_data(self):
+        assert evaluate_query("_['a']", {"a": 1}) == 1
+        assert evaluate_query("_['a']", {"a": 2}) == 2
+
+    def test_invalid_query_not_cached(self, test_data):
+        with pytest.raises(QueryEvaluationError):
+            evaluate_query("_.__class__", test_data)
+        assert compile_query.cache_info().currsize == 0
+
+    def test_syntax_error_still_reported(self, test_data):
+        for _ in range(2):
+            with pytest.raises(QueryEvaluationError, match="Invalid Python syntax"):
+                evaluate_query("_['items'", test_data)
+
+
+class TestSubscriptChains:
+    @pytest.mark.parametrize(
+        "query,path",
+        [
+            ("_", ()),
+            ("_['items'][0]['name']", ("items", 0, "name")),
+            ("_['items'][-1]", ("items", -1)),
+            ("_['items'][1:]", ("items", slice(1, None))),
+            ("_['items'][::-2]", ("items", slice(None, None, -2))),
+        ],
+    )
+    def test_chain_is_not_compiled(self, query, path):
+        compiled = compile_query(query)
+        assert compiled.code is None
+        assert compiled.path == path
+
+    @pytest.mark.parametrize(
+        "query",
+        ["_[True]", "_['items'][len(_)]", "_['items'][0:x]", "len(_)", "x['a']"],
+    )
+    def test_other_queries_are_compiled(self, query):
+        compiled = compile_query(query)
+        assert compiled.code is not None
+        assert compiled.path is None
+
+    @pytest.mark.parametrize(
+        "query",
+        ["_['items'][0]['name']", "_['items'][-1]", "_['items'][1:]", "_['metadata']"],
+    )
+    def test_chain_matches_eval(self, query, test_data):
+        assert evaluate_query(query, test_data) == eval(query, {"_": test_data})
+
+    def test_resolve_path(self, test_data):
+        assert resolve_path(test_data, ("items", 1, "name")) == "Bob"
+
+    def test_format_path(self):
+        path = ("items", 0, slice(1, None, 2), slice(None, -1))
+        assert format_path(path) == "_['items'][0][1::2][:-1]"
@@ -0,0 +1,136 @@
+"""Test the virtualized result display."""
+
+import asyncio
+import time
+
+from pq.output import OutputFormatter
+from pq.tui import _TREE_PAGE_SIZE, QueryApp, QueryInput, ResultDisplay, ResultTree
+
+LARGE_DATA = {"items": [{"id": i, "tags": ["a", "b"]} for i in range(20000)]}
+
+
+async def wait_for(pilot, condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await pilot.pause(0.05)
+
+
+def run_display_scenario(data, query, check):
+    async def scenario():
+        app = QueryApp(data=data)
+        async with app.run_test(size=(80, 24)) as pilot:
+            app.query_one("#query-input", QueryInput).value = query
+            await wait_for(pilot, lambda: app.final_result is not None)
+            await pilot.pause()
+            await check(pilot, app.query_one("#result-display", ResultDisplay))
+
+    asyncio.run(scenario())
+
+
+class TestIterLines:
+    def test_lines_match_format_output(self, test_data):
+        for value in (
+            test_data,
+            test_data["items"],
+            [],
+            {},
+            {1: None, None: [{}], 2.5: "\u00fc"},
+        ):
+            lines = list(OutputFormatter.iter_lines(value))
+            assert "\n".join(lines) == OutputFormatter.format_output(value)
+
+    def test_lines_are_produced_on_demand(self):
+        lines = OutputFormatter.iter_lines(iter(LARGE_DATA["items"]))
+        assert next(lines) == "["
+        assert next(lines) == "  {"
+        assert next(lines) == '    "id": 0,'
+
+
+class TestResultDisplay:
+    def test_only_visible_lines_are_formatted(self):
+        async def check(pilot, display):
+            assert 0 < len(display._lines) < 100
+            assert display._lines[:3] == ["{", '  "items": [', "    {"]
+
+        run_display_scenario(LARGE_DATA, "_", check)
+
+    def test_scrolling_formats_more_lines(self):
+        async def check(pilot, display):
+            before = len(display._lines)
+            display.scroll_to(y=before, animate=False)
+            await pilot.pause()
+            assert len(display._lines) > before
+            assert len(display._lines) < before + 100
+
+        run_display_scenario(LARGE_DATA, "_", check)
+
+    def test_short_result_is_complete(self, test_data):
+        async def check(pilot, display):
+            expected = OutputFormatter.format_output(test_data["items"][0])
+            assert "\n".join(display._lines) == expected
+            assert display._source is None
+            assert display.virtual_size.height == len(display._lines)
+
+        run_display_scenario(test_data, "_['items'][0]", check)
+
+    def test_unserializable_result_shows_error(self, test_data):
+        async def check(pilot, display):
+            assert display._is_error
+            assert display._lines[0].startswith("Cannot display result")
+
+        run_display_scenario(test_data, "[{1, 2}]", check)
+
+
+class TestResultTree:
+    def test_toggle_does_not_reevaluate(self):
+        async def check(pilot, display):
+            app = display.app
+            generation = app._eval_generation
+            await pilot.press("ctrl+t")
+            tree = app.query_one("#result-tree", ResultTree)
+            assert tree.display and not display.display
+            assert app._eval_generation == generation
+            assert [str(n.label) for n in tree.root.children] == [
+                "items: […] (20000 items)"
+            ]
+
+            await pilot.press("ctrl+t")
+            assert display.display and not tree.display
+            assert app._eval_generation == generation
+
+        run_display_scenario(LARGE_DATA, "_", check)
+
+    def test_children_are_paged(self):
+        async def check(pilot, display):
+            app = display.app
+            await pilot.press("ctrl+t")
+            tree = app.query_one("#result-tree", ResultTree)
+            items = tree.root.children[0]
+            assert not items.children
+
+            items.expand()
+            await pilot.pause()
+            assert len(items.children) == _TREE_PAGE_SIZE + 1
+            assert str(items.children[0].label) == "0: {…} (2 keys)"
+            load_more = items.children[-1]
+            assert "more" in str(load_more.label)
+
+            tree.select_node(load_more)
+            await pilot.pause()
+            assert len(items.children) == 2 * _TREE_PAGE_SIZE + 1
+            assert str(items.children[_TREE_PAGE_SIZE].label).startswith("100:")
+
+        run_display_scenario(LARGE_DATA, "_", check)
+
+    def test_new_result_uses_tree_view(self, test_data):
+        async def check(pilot, display):
+            app = display.app
+            await pilot.press("ctrl+t")
+            app.query_one("#query-input", QueryInput).value = "_['items'][0]['name']"
+            await wait_for(pilot, lambda: app.query_string == "_['items'][0]['name']")
+            tree = app.query_one("#result-tree", ResultTree)
+            name = test_data["items"][0]["name"]
+            assert str(tree.root.label) == f'_: "{name}"'
+
+        run_display_scenario(test_data, "_", check)
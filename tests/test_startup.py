@@ -0,0 +1,58 @@
+"""Test that startup only imports what a run needs."""
+
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = {"textual", "rich", "yaml", "xmltodict"}
+
+
+def imported_modules(*args: str) -> set[str]:
+    """Run the CLI with -X importtime and return the top-level modules imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "pq.cli", *args],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            name = line.rsplit("|", 1)[1].strip()
+            modules.add(name.split(".")[0])
+    return modules
+
+
+def test_import_cli_skips_heavy_modules():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, pq.cli; print(' '.join(sorted(sys.modules)))",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    loaded = {name.split(".")[0] for name in result.stdout.split()}
+    assert not loaded & HEAVY_MODULES
+
+
+def test_json_query_skips_heavy_modules(test_data_path):
+    assert not imported_modules("_['metadata']", str(test_data_path)) & HEAVY_MODULES
+
+
+@pytest.mark.parametrize(
+    "suffix,content,expected",
+    [
+        ("yaml", "a: 1\n", "yaml"),
+        ("xml", "<a>1</a>", "xmltodict"),
+    ],
+)
+def test_parser_imported_only_for_its_format(tmp_path, suffix, content, expected):
+    file = tmp_path / f"doc.{suffix}"
+    file.write_text(content)
+    modules = imported_modules("_", str(file))
+    assert expected in modules
+    assert not modules & (HEAVY_MODULES - {expected})
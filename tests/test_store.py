@@ -0,0 +1,111 @@
+"""Test out-of-core document store."""
+
+import json
+
+import pytest
+
+from pq import store as store_module
+from pq.evaluator import QueryEvaluationError, evaluate_query
+from pq.loader import DocumentLoadError
+from pq.output import OutputFormatter
+from pq.store import DocumentStore, StoredDict, StoredList
+
+DOCUMENT = {
+    "meta": {"version": "1.0", "count": 3},
+    "items": [
+        {"id": "a", "tags": ["x", "y"], "size": 1},
+        {"id": "b", "tags": [], "size": 2},
+        {"id": "c", "tags": ["z"], "size": 3},
+    ],
+    "empty": {},
+}
+
+
+@pytest.fixture(autouse=True)
+def small_pages(monkeypatch):
+    monkeypatch.setattr(store_module, "INLINE_MAX_BYTES", 16)
+    monkeypatch.setattr(store_module, "PAGE_SIZE", 2)
+
+
+@pytest.fixture
+def document_file(tmp_path):
+    file = tmp_path / "doc.json"
+    file.write_text(json.dumps(DOCUMENT))
+    return file
+
+
+@pytest.fixture
+def root(tmp_path, document_file):
+    return DocumentStore.open(document_file, tmp_path / "stores").root()
+
+
+class TestDocumentStore:
+    def test_root_is_lazy(self, root):
+        assert isinstance(root, StoredDict)
+        assert isinstance(root["items"], StoredList)
+        assert len(root) == 3
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "_['meta']['version']",
+            "_['items'][2]['id']",
+            "_['items'][-1]",
+            "_['items'][1:]",
+            "_['items'][::2]",
+            "[i['id'] for i in _['items'] if i['size'] > 1]",
+            "sum(i['size'] for i in _['items'])",
+            "len(_['items'])",
+            "list(_.keys())",
+            "'meta' in _",
+            "_['empty']",
+            "sorted(_['items'], key=lambda i: -i['size'])[0]",
+        ],
+    )
+    def test_queries_match_in_memory(self, root, query):
+        assert evaluate_query(query, root) == evaluate_query(query, DOCUMENT)
+
+    @pytest.mark.parametrize(
+        "query", ["_['missing']", "_['items'][10]", "_['items']['id']"]
+    )
+    def test_errors_match_in_memory(self, root, query):
+        with pytest.raises(QueryEvaluationError) as stored_error:
+            evaluate_query(query, root)
+        with pytest.raises(QueryEvaluationError) as memory_error:
+            evaluate_query(query, DOCUMENT)
+        assert str(stored_error.value) == str(memory_error.value)
+
+    def test_output_serializes_proxies(self, root):
+        assert json.loads(OutputFormatter.format_output(root)) == DOCUMENT
+
+    def test_store_reused_until_file_changes(self, tmp_path, document_file):
+        stores = tmp_path / "stores"
+        first = DocumentStore.open(document_file, stores)
+        second = DocumentStore.open(document_file, stores)
+        assert first.db_path == second.db_path
+        mtime = first.db_path.stat().st_mtime_ns
+
+        document_file.write_text(json.dumps({"items": [1]}))
+        third = DocumentStore.open(document_file, stores)
+        assert third.root()["items"][0] == 1
+        assert third.db_path.stat().st_mtime_ns != mtime
+
+    def test_duplicate_keys_keep_last(self, tmp_path):
+        file = tmp_path / "dup.json"
+        file.write_text('{"a": "first value", "a": "second value", "b": 1}')
+        root = DocumentStore.open(file, tmp_path / "stores").root()
+        assert root["a"] == "second value"
+        assert len(root) == 2
+
+    def test_invalid_json_raises(self, tmp_path):
+        file = tmp_path / "bad.json"
+        file.write_text('{"items": [1, 2}')
+        with pytest.raises(DocumentLoadError, match="Invalid JSON"):
+            DocumentStore.open(file, tmp_path / "stores")
+        assert list((tmp_path / "stores").iterdir()) == []
+
+    def test_non_json_rejected(self, tmp_path):
+        file = tmp_path / "doc.yaml"
+        file.write_text("a: 1")
+        with pytest.raises(DocumentLoadError, match="JSON files only"):
+            DocumentStore.open(file, tmp_path / "stores")
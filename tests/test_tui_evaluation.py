@@ -0,0 +1,250 @@
+"""Test background query evaluation in the TUI."""
+
+import asyncio
+import json
+import threading
+import time
+
+from pq import lazy
+from pq.budget import Budget
+from pq.completion import LazyPathIndex
+from pq.evaluator import EvaluationCancelled, cancel_evaluation, evaluate_query
+from pq.lazy import LazyDocument
+from pq.loader import DocumentLoadError
+from pq.tui import (
+    LoadingScreen,
+    QueryApp,
+    QueryInput,
+    ResultDisplay,
+    StatusBar,
+    SuggestionBox,
+)
+
+SLOW_QUERY = "sum(x for x in range(10**10))"
+
+
+async def wait_for(pilot, condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await pilot.pause(0.05)
+
+
+class TestCancelEvaluation:
+    def test_interrupts_running_query(self):
+        outcome = []
+        started = threading.Event()
+
+        def run():
+            started.set()
+            try:
+                evaluate_query(SLOW_QUERY, {})
+            except EvaluationCancelled:
+                outcome.append("cancelled")
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        started.wait()
+        time.sleep(0.05)
+        assert cancel_evaluation(thread.ident)
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert outcome == ["cancelled"]
+
+
+class TestBackgroundEvaluation:
+    def test_result_displayed(self, test_data):
+        async def scenario():
+            app = QueryApp(data=test_data)
+            async with app.run_test() as pilot:
+                app.query_one(
+                    "#query-input", QueryInput
+                ).value = "_['items'][0]['name']"
+                await wait_for(pilot, lambda: app.final_result is not None)
+                assert app.final_result == test_data["items"][0]["name"]
+                assert app.query_string == "_['items'][0]['name']"
+
+        asyncio.run(scenario())
+
+    def test_newer_query_supersedes_slow_one(self, test_data):
+        async def scenario():
+            app = QueryApp(data=test_data)
+            async with app.run_test() as pilot:
+                query_input = app.query_one("#query-input", QueryInput)
+                query_input.value = SLOW_QUERY
+                await wait_for(pilot, lambda: app._eval_thread is not None)
+                status = app.query_one("#status-bar", StatusBar)
+                assert status._busy_label is not None
+
+                query_input.value = "len(_['items'])"
+                await wait_for(pilot, lambda: app.final_result is not None)
+                assert app.final_result == len(test_data["items"])
+                assert app.query_string == "len(_['items'])"
+                assert status._busy_label is None
+
+                await pilot.pause(0.3)
+                assert app.query_string == "len(_['items'])"
+
+        asyncio.run(scenario())
+
+    def test_error_displayed(self, test_data):
+        async def scenario():
+            app = QueryApp(data=test_data)
+            async with app.run_test() as pilot:
+                app.query_one("#query-input", QueryInput).value = "_['missing']"
+                status = app.query_one("#status-bar", StatusBar)
+                await wait_for(pilot, lambda: app._eval_generation > 0)
+                await wait_for(pilot, lambda: status._busy_label is None)
+                assert app.final_result is None
+                assert app.query_string == "_"
+
+        asyncio.run(scenario())
+
+
+class TestEvaluationBudget:
+    def test_query_over_budget_reports_error(self, test_data):
+        async def scenario():
+            app = QueryApp(data=test_data, budget=Budget(cpu_time=1))
+            async with app.run_test() as pilot:
+                app.query_one("#query-input", QueryInput).value = SLOW_QUERY
+                display = app.query_one("#result-display", ResultDisplay)
+                await wait_for(
+                    pilot, lambda: any("exceeded 1s" in line for line in display._lines)
+                )
+                assert app.final_result is None
+
+        asyncio.run(scenario())
+
+    def test_supervised_query_superseded(self, test_data):
+        async def scenario():
+            app = QueryApp(data=test_data, budget=Budget(cpu_time=60))
+            async with app.run_test() as pilot:
+                query_input = app.query_one("#query-input", QueryInput)
+                query_input.value = SLOW_QUERY
+                await wait_for(pilot, lambda: app._eval_thread is not None)
+                query_input.value = "[i['age'] for i in _['items']]"
+                await wait_for(pilot, lambda: app.final_result == [30, 25, 35], 5)
+
+        asyncio.run(scenario())
+
+    def test_lazy_document_under_budget(self, tmp_path, monkeypatch):
+        # Keep every container a proxy, however small.
+        monkeypatch.setattr(lazy, "MATERIALIZE_MAX_BYTES", 0)
+        file = tmp_path / "doc.json"
+        file.write_text('{"items": [{"age": 30}, {"age": 25}]}')
+
+        async def scenario():
+            data = LazyDocument(file).root()
+            app = QueryApp(data=data, budget=Budget(cpu_time=60))
+            async with app.run_test() as pilot:
+                query_input = app.query_one("#query-input", QueryInput)
+                query_input.value = "[i for i in _['items'] if i['age'] > 26]"
+                await wait_for(pilot, lambda: app.final_result == [{"age": 30}], 5)
+
+        asyncio.run(scenario())
+
+
+class TestBackgroundIndexing:
+    def test_suggestions_fill_in_after_indexing(self):
+        data = {"records": [{"id": i, "name": str(i)} for i in range(50_000)]}
+
+        async def scenario():
+            app = QueryApp(data=data)
+            assert app.indexing
+            async with app.run_test() as pilot:
+                query_input = app.query_one("#query-input", QueryInput)
+                query_input.value = "_['records'][0]['n"
+                await wait_for(pilot, lambda: not app.indexing)
+                suggestion_box = app.query_one("#suggestion-box", SuggestionBox)
+                await wait_for(pilot, lambda: bool(suggestion_box.suggestions))
+                assert suggestion_box.suggestions == ["_['records'][0]['name']"]
+                await wait_for(pilot, lambda: app._eval_generation > 0)
+
+        asyncio.run(scenario())
+
+    def test_lazy_document_completed_on_demand(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(lazy, "MATERIALIZE_MAX_BYTES", 0)
+        file = tmp_path / "doc.json"
+        file.write_text(json.dumps({"records": [{"id": i} for i in range(1000)]}))
+
+        async def scenario():
+            app = QueryApp(data=LazyDocument(file).root(), max_indices=3)
+            async with app.run_test() as pilot:
+                query_input = app.query_one("#query-input", QueryInput)
+                query_input.value = "_['records'][500]['i"
+                await wait_for(pilot, lambda: not app.indexing)
+                assert isinstance(app.fuzzy_matcher.index, LazyPathIndex)
+                suggestion_box = app.query_one("#suggestion-box", SuggestionBox)
+                await wait_for(
+                    pilot,
+                    lambda: suggestion_box.suggestions == ["_['records'][500]['id']"],
+                )
+                assert app.fuzzy_matcher.index.root == {"records": {}}
+
+        asyncio.run(scenario())
+
+
+class TestBackgroundLoading:
+    def test_queryable_once_loaded(self, test_data):
+        release = threading.Event()
+
+        def loader(progress):
+            progress(10, 100)
+            release.wait(5)
+            return test_data
+
+        async def scenario():
+            app = QueryApp(loader=loader)
+            async with app.run_test() as pilot:
+                await wait_for(pilot, lambda: isinstance(app.screen, LoadingScreen))
+                await wait_for(pilot, lambda: app.load_progress == (10, 100))
+                assert not app.loaded
+                release.set()
+                await wait_for(pilot, lambda: app.loaded)
+                assert not isinstance(app.screen, LoadingScreen)
+                await wait_for(pilot, lambda: app.final_result == test_data)
+                app.query_one("#query-input", QueryInput).value = "_['metadata']"
+                await wait_for(pilot, lambda: app.final_result == test_data["metadata"])
+
+        asyncio.run(scenario())
+
+    def test_load_error_exits(self):
+        def loader(progress):
+            raise DocumentLoadError("Invalid JSON in doc.json")
+
+        async def scenario():
+            app = QueryApp(loader=loader)
+            async with app.run_test() as pilot:
+                await wait_for(pilot, lambda: app.load_error is not None)
+            assert app.return_code == 1
+            assert not app.loaded
+
+        asyncio.run(scenario())
+
+    def test_cancel_stops_loading(self):
+        reading = threading.Event()
+        outcome = []
+
+        def loader(progress):
+            reading.set()
+            try:
+                while True:
+                    progress(0, None)
+                    time.sleep(0.01)
+            except DocumentLoadError as e:
+                outcome.append(str(e))
+                raise
+
+        async def scenario():
+            app = QueryApp(loader=loader)
+            async with app.run_test() as pilot:
+                await wait_for(pilot, reading.is_set)
+                await pilot.press("escape")
+            assert app.return_code == 130
+            assert app.load_error is None
+
+        asyncio.run(scenario())
+        deadline = time.monotonic() + 5
+        while not outcome and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert outcome == ["Loading cancelled"]